@@ -0,0 +1,9 @@
+import os
+import sys
+
+# the geodata scripts import their siblings directly (e.g., from feature_writer import write_features)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GEODATA_DIR = os.path.join(REPO_DIR, "geodata")
+for path in (REPO_DIR, GEODATA_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
@@ -0,0 +1,108 @@
+import argparse
+import fnmatch
+import importlib
+import inspect
+import os
+import sys
+import traceback
+from benchmarks import generators
+from fun import profiling
+
+# suite modules (asv naming: classes with params, setup, teardown, time_* and peakmem_* methods)
+suite_modules = ("benchmarks.bench_fun", "benchmarks.bench_geodata")
+
+
+def get_suites(pattern="*"):
+    """
+    :param pattern: STR of a shell pattern of suite or benchmark names (default: "*")
+    :output: LIST of (suite class, LIST of method names) TUPLEs (suites of modules with missing dependencies
+             are skipped)
+    """
+    suites = []
+    for module_name in suite_modules:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            print("WARNING: Skipping %s (%s)." % (module_name, str(e)))
+            continue
+        for name, suite in inspect.getmembers(module, inspect.isclass):
+            if suite.__module__ != module_name or not hasattr(suite, "params"):
+                continue
+            methods = [m for m in dir(suite) if m.startswith(("time_", "peakmem_"))
+                       and (fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch("%s.%s" % (name, m), pattern))]
+            if methods:
+                suites.append((suite, methods))
+    return suites
+
+
+def run_suite(suite, methods, repeat=1):
+    """
+    Run the benchmarks of one suite for all sizes and record each run as a profiling stage
+    :param suite: class of an asv-style suite
+    :param methods: LIST of benchmark method names
+    :param repeat: INT of runs per benchmark and size (default: 1)
+    :output: LIST of DICTs of records
+    """
+    records = []
+    for size in suite.params:
+        instance = suite()
+        try:
+            # setup may create files before it fails: teardown runs in any case
+            try:
+                instance.setup(size)
+            except ImportError as e:
+                print("WARNING: Skipping %s (%s)." % (suite.__name__, str(e)))
+                return records
+            except Exception:
+                print("ERROR: Setup of %s failed for size %i:" % (suite.__name__, size))
+                traceback.print_exc()
+                continue
+            for method in methods:
+                stage_name = "%s.%s" % (suite.__name__, method)
+                for i in range(repeat):
+                    try:
+                        with profiling.Stage(stage_name, n_items=size, unit=suite.unit, size=size) as stage:
+                            getattr(instance, method)(size)
+                    except Exception:
+                        print("ERROR: %s failed for size %i:" % (stage_name, size))
+                        traceback.print_exc()
+                        break
+                    records.append(stage.record)
+                    print("%-56s %10i %-8s %9.3f s %14.0f /s %9.1f MB" % (
+                        stage_name, size, suite.unit, stage.record["wall_time_s"],
+                        stage.record["items_per_s"] or 0, stage.record["peak_rss_mb"] or 0))
+        finally:
+            if hasattr(instance, "teardown"):
+                instance.teardown(size)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suites and write JSON lines records.")
+    parser.add_argument("pattern", nargs="?", default="*", help="shell pattern of suites or benchmarks")
+    parser.add_argument("--max-exponent", type=int, default=None, help="largest size as power of ten (3 to 8)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark and size")
+    parser.add_argument("--output", default=None, help="JSON lines file that records are appended to")
+    parser.add_argument("--baseline", default=None, help="JSON lines file of earlier records to compare with")
+    args = parser.parse_args()
+    if args.max_exponent:
+        # the suite params are evaluated on import
+        os.environ[generators.MAX_EXPONENT_ENV] = str(args.max_exponent)
+    if args.output:
+        profiling.enable(args.output)
+    else:
+        profiling.disable()
+
+    records = []
+    for suite, methods in get_suites(args.pattern):
+        records += run_suite(suite, methods, repeat=args.repeat)
+    if args.baseline:
+        regressions = profiling.compare(records, args.baseline)
+        for stage, reference, wall_time in regressions:
+            print("REGRESSION: %s %.3f s -> %.3f s" % (stage, reference, wall_time))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import numpy as np
+from benchmarks.generators import sizes, unit_values
+from fun import converter
+
+
+class ConverterSuite:
+    # asv-style suite: time_* and peakmem_* methods run once per size after setup(size)
+    params = sizes()
+    param_names = ["n_values"]
+    unit = "values"
+
+    def setup(self, n_values):
+        self.values = unit_values(n_values)
+        self.mixed = self.values.astype(object)
+        self.mixed[::100] = "n/a"
+        self.out = np.empty_like(self.values)
+
+    def time_convert(self, n_values):
+        converter.convert(self.values, "ft", "m")
+
+    def time_convert_in_place(self, n_values):
+        converter.convert(self.values, "ft", "m", out=self.out)
+
+    def time_convert_mixed(self, n_values):
+        # non-numeric entries fall back to the element-wise parser
+        converter.convert(self.mixed, "cfs", "m3/s")
+
+    def peakmem_convert(self, n_values):
+        converter.convert(self.values, "ft", "m")
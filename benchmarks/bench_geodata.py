@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from benchmarks.generators import dem_rows, grid_shape, sizes, write_inundation_json, write_raster, write_vector
+
+
+class TempDirSuite:
+    def setup_dir(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="hypy-bench-")
+
+    def teardown(self, *args):
+        if hasattr(self, "tmp_dir"):
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class RasterBandInfoSuite(TempDirSuite):
+    params = sizes()
+    param_names = ["n_cells"]
+    unit = "cells"
+
+    def setup(self, n_cells):
+        # geodata modules are imported in setup, so that suites without their dependencies are skipped
+        from raster_band_info import compute_band_statistics
+        self.compute_band_statistics = compute_band_statistics
+        self.setup_dir()
+        self.raster = write_raster(os.path.join(self.tmp_dir, "dem.tif"), n_cells)
+
+    def time_compute_band_statistics(self, n_cells):
+        self.compute_band_statistics(self.raster, 1)
+
+    def time_compute_band_statistics_fixed_range(self, n_cells):
+        # one pass instead of two
+        self.compute_band_statistics(self.raster, 1, hist_range=(350.0, 600.0))
+
+
+class LeastCostPathSuite:
+    params = [n for n in sizes() if n <= 10 ** 7]
+    param_names = ["n_cells"]
+    unit = "cells"
+
+    def setup(self, n_cells):
+        from least_cost_path import route_from_source
+        self.route_from_source = route_from_source
+        rows, cols = grid_shape(n_cells)
+        self.cost_array = np.abs(np.gradient(dem_rows(0, rows, cols))[0]) + 0.01
+        self.stops = [(rows - 1, cols - 1), (rows - 1, 0), (0, cols - 1)]
+
+    def time_route_from_source(self, n_cells):
+        self.route_from_source((0, 0), self.stops, cost_array=self.cost_array)
+
+
+class ReprojectSuite(TempDirSuite):
+    params = sizes()
+    param_names = ["n_features"]
+    unit = "features"
+
+    def setup(self, n_features):
+        from reproject import reproject_layer
+        self.reproject_layer = reproject_layer
+        self.setup_dir()
+        self.points = write_vector(os.path.join(self.tmp_dir, "points.gpkg"), n_features, layer_type="point")
+        self.polygons = write_vector(os.path.join(self.tmp_dir, "polygons.gpkg"), n_features,
+                                     layer_type="polygon")
+
+    def time_reproject_points(self, n_features):
+        self.reproject_layer(self.points, os.path.join(self.tmp_dir, "points_web.gpkg"), 3857, n_workers=1)
+
+    def time_reproject_polygons(self, n_features):
+        self.reproject_layer(self.polygons, os.path.join(self.tmp_dir, "polygons_web.gpkg"), 3857, n_workers=1)
+
+
+class ShpPolygonSuite(TempDirSuite):
+    params = sizes()
+    param_names = ["n_features"]
+    unit = "features"
+
+    def setup(self, n_features):
+        from shp_polygon import write_inundation_shp
+        self.write_inundation_shp = write_inundation_shp
+        self.setup_dir()
+        self.json_file = write_inundation_json(os.path.join(self.tmp_dir, "inundation.json"), n_features)
+
+    def time_write_inundation_shp(self, n_features):
+        self.write_inundation_shp(self.json_file, os.path.join(self.tmp_dir, "inundation.gpkg"))
+
+    def peakmem_write_inundation_shp(self, n_features):
+        self.write_inundation_shp(self.json_file, os.path.join(self.tmp_dir, "inundation_mem.gpkg"))
@@ -0,0 +1,160 @@
+import json
+import os
+import numpy as np
+
+# problem sizes (cells or features) of the suites: 10 ** 3 ... 10 ** max_exponent
+MAX_EXPONENT_ENV = "BENCHMARK_MAX_EXPONENT"
+
+
+def sizes(max_exponent=None, min_exponent=3):
+    """
+    :param max_exponent: INT of the largest power of ten (default: None reads BENCHMARK_MAX_EXPONENT or uses 5;
+                         at most 8)
+    :param min_exponent: INT of the smallest power of ten (default: 3)
+    :output: LIST of INT problem sizes
+    """
+    max_exponent = int(max_exponent or os.environ.get(MAX_EXPONENT_ENV, 5))
+    return [10 ** e for e in range(min_exponent, min(max_exponent, 8) + 1)]
+
+
+def grid_shape(n_cells):
+    """
+    :param n_cells: INT of raster cells
+    :output: TUPLE of (rows, cols) of an approximately square grid with at least n_cells cells
+    """
+    cols = int(np.ceil(np.sqrt(n_cells)))
+    return int(np.ceil(n_cells / cols)), cols
+
+
+def dem_rows(row_start, row_stop, cols, seed=0):
+    """
+    Smooth synthetic terrain (tilted plane with hills and noise) of a row range, so that large rasters can be
+    generated strip by strip
+    :param row_start: INT of the first row
+    :param row_stop: INT of the row after the last row
+    :param cols: INT of columns
+    :param seed: INT of the random generator seed (default: 0)
+    :output: ndarray (FLOAT32) of shape (row_stop - row_start, cols)
+    """
+    rng = np.random.default_rng(seed + row_start)
+    y, x = np.mgrid[row_start:row_stop, 0:cols].astype(np.float32)
+    dem = 400.0 + 0.01 * x + 0.02 * y + 5.0 * np.sin(x / 50.0) * np.cos(y / 70.0)
+    return (dem + rng.normal(0.0, 0.1, dem.shape)).astype(np.float32)
+
+
+def write_raster(file_name, n_cells, pixel_size=1.0, origin=(400000.0, 5300000.0), epsg=25832, nan_value=-9999.0,
+                 strip_rows=512, seed=0):
+    """
+    Write a tiled GeoTIFF of synthetic terrain in strips (bounded memory up to 10 ** 8 cells)
+    :param file_name: STR of target file name, including directory; must end on ".tif"
+    :param n_cells: INT of cells (rounded up to a full rectangular grid)
+    :param pixel_size: FLOAT of the pixel width and height (default: 1.0)
+    :param origin: TUPLE of (x, y) coordinates of the upper-left corner (default: UTM zone 32N)
+    :param epsg: INT of the EPSG code (default: 25832)
+    :param nan_value: FLOAT of the no-data value (default: -9999.0)
+    :param strip_rows: INT of rows per written strip (default: 512)
+    :param seed: INT of the random generator seed (default: 0)
+    :output: STR of file_name
+    """
+    from osgeo import gdal, osr
+    gdal.UseExceptions()
+    rows, cols = grid_shape(n_cells)
+    ds = gdal.GetDriverByName("GTiff").Create(file_name, cols, rows, 1, gdal.GDT_Float32,
+                                              options=["TILED=YES", "BLOCKXSIZE=256", "BLOCKYSIZE=256",
+                                                       "BIGTIFF=IF_SAFER"])
+    ds.SetGeoTransform((origin[0], pixel_size, 0.0, origin[1], 0.0, -pixel_size))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(epsg)
+    ds.SetProjection(srs.ExportToWkt())
+    band = ds.GetRasterBand(1)
+    band.SetNoDataValue(nan_value)
+    for row in range(0, rows, strip_rows):
+        band.WriteArray(dem_rows(row, min(row + strip_rows, rows), cols, seed=seed), 0, row)
+    band.FlushCache()
+    band = None
+    ds = None
+    return file_name
+
+
+def random_points(n, bbox=(5.0, 45.0, 15.0, 50.0), seed=0):
+    """
+    :param n: INT of points
+    :param bbox: TUPLE of (min x, min y, max x, max y) (default: central Europe in EPSG:4326)
+    :param seed: INT of the random generator seed (default: 0)
+    :output: ndarray of shape (n, 2) with x-y coordinates
+    """
+    rng = np.random.default_rng(seed)
+    return rng.random((n, 2)) * (bbox[2] - bbox[0], bbox[3] - bbox[1]) + (bbox[0], bbox[1])
+
+
+def vector_records(n, layer_type="point", bbox=(5.0, 45.0, 15.0, 50.0), size=0.001, chunk_size=100000, seed=0):
+    """
+    Stream synthetic features for feature_writer.write_features (bounded memory up to 10 ** 8 features)
+    :param n: INT of features
+    :param layer_type: STR of "point" or "polygon" (default: "point")
+    :param bbox: TUPLE of (min x, min y, max x, max y) (default: central Europe in EPSG:4326)
+    :param size: FLOAT of the polygon edge length (default: 0.001)
+    :param chunk_size: INT of features generated at a time (default: 100000)
+    :param seed: INT of the random generator seed (default: 0)
+    :output: generator of (geometry WKB or WKT, DICT of attributes) TUPLEs
+    """
+    from reproject import points2wkb
+    for start in range(0, n, chunk_size):
+        coords = random_points(min(chunk_size, n - start), bbox=bbox, seed=seed + start)
+        values = np.round(coords[:, 0] - coords[:, 1], 3)
+        if layer_type == "point":
+            geometries = points2wkb(coords)
+        else:
+            geometries = ["POLYGON ((%f %f, %f %f, %f %f, %f %f, %f %f))" % (x, y, x + size, y, x + size, y + size,
+                                                                          x, y + size, x, y) for x, y in coords]
+        for i, geometry in enumerate(geometries):
+            yield geometry, {"id": start + i, "value": float(values[i])}
+
+
+def write_vector(file_name, n, layer_type="point", epsg=4326, **kwargs):
+    """
+    :param file_name: STR of the target file name, including directory (.shp, .gpkg, .fgb, or .geojson)
+    :param n: INT of features
+    :param layer_type: STR of "point" or "polygon" (default: "point")
+    :param epsg: INT of the EPSG code (default: 4326)
+    :param kwargs: optional keyword arguments of vector_records
+    :output: STR of file_name
+    """
+    from osgeo import ogr
+    from feature_writer import write_features
+    write_features(file_name, vector_records(n, layer_type=layer_type, **kwargs), layer_type=layer_type,
+                   fields={"id": ogr.OFTInteger64, "value": ogr.OFTReal}, epsg=epsg, layer_name="synthetic")
+    return file_name
+
+
+def write_inundation_json(file_name, n, cell_size=5.0, seed=0):
+    """
+    Write a JSON array of (wkt_geom, TBG_NAME) records like json/hq100-dreisam.json for shp_polygon.py
+    :param file_name: STR of the target JSON file name, including directory
+    :param n: INT of polygons
+    :param cell_size: FLOAT of the polygon edge length (default: 5.0)
+    :param seed: INT of the random generator seed (default: 0)
+    :output: STR of file_name
+    """
+    with open(file_name, "w") as f:
+        f.write("[\n")
+        for start in range(0, n, 100000):
+            coords = random_points(min(100000, n - start), bbox=(410000.0, 5310000.0, 420000.0, 5330000.0),
+                                   seed=seed + start)
+            rows = []
+            for i, (x, y) in enumerate(coords):
+                wkt = "MultiPolygon (((%.2f %.2f, %.2f %.2f, %.2f %.2f, %.2f %.2f, %.2f %.2f)))" % (
+                    x, y, x + cell_size, y, x + cell_size, y + cell_size, x, y + cell_size, x, y)
+                rows.append(json.dumps({"wkt_geom": wkt, "TBG_NAME": "class%i" % ((start + i) % 5)}))
+            f.write(("," if start else "") + ",\n".join(rows))
+        f.write("\n]\n")
+    return file_name
+
+
+def unit_values(n, seed=0):
+    """
+    :param n: INT of values
+    :param seed: INT of the random generator seed (default: 0)
+    :output: ndarray (FLOAT64) of positive values (e.g., lengths in feet)
+    """
+    return np.random.default_rng(seed).random(n) * 100.0
@@ -0,0 +1,270 @@
+import os
+import numpy as np
+import pandas as pd
+
+G = 9.81  # m/s2
+RHO_W = 1000.0  # kg/m3 water density
+S_SED = 2.65  # relative sediment density (quartz)
+
+# bedload formulas of the form q* = a * (tau* - tau*_cr) ^ b (dimensionless transport and Shields stress)
+excess_shear_formulas = {"mpm": (8.0, 0.047, 1.5),                 # Meyer-Peter & Mueller (1948)
+                         "wong_parker": (3.97, 0.0495, 1.5),       # Wong & Parker (2006)
+                         "fernandez_luque": (5.7, 0.05, 1.5)}      # Fernandez Luque & van Beek (1976)
+
+
+def parker(tau):
+    """
+    Parker (1979) approximation of the Einstein-Parker bedload function
+    :param tau: ndarray of Shields stresses
+    :output: ndarray of dimensionless bedload transport rates
+    """
+    excess = np.maximum(tau - 0.03, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(excess > 0, 11.2 * excess ** 4.5 / tau ** 3, 0.0)
+
+
+def excess_shear(tau, a, tau_cr, b):
+    """
+    :param tau: ndarray of Shields stresses
+    :param a: FLOAT of the formula coefficient
+    :param tau_cr: FLOAT of the critical Shields stress
+    :param b: FLOAT of the exponent
+    :output: ndarray of dimensionless bedload transport rates
+    """
+    return a * np.maximum(tau - tau_cr, 0.0) ** b
+
+
+def transport_functions():
+    """
+    :output: DICT of {formula name: callable(ndarray of Shields stresses) -> ndarray of q*}
+    """
+    functions = {name: (lambda tau, p=params: excess_shear(tau, *p)) for name, params in excess_shear_formulas.items()}
+    functions["parker"] = parker
+    return functions
+
+
+def shields_stress(H, S, W=None, D=0.03, s=S_SED):
+    """
+    :param H: ndarray of flow depths (m)
+    :param S: ndarray of energy slopes (-)
+    :param W: ndarray of channel widths (m) for the hydraulic radius of a rectangular profile (default: None
+              uses the flow depth, i.e., a wide channel)
+    :param D: FLOAT or ndarray of the characteristic grain size (m, default: 0.03)
+    :param s: FLOAT of the relative sediment density (default: 2.65)
+    :output: ndarray of Shields stresses (-)
+    """
+    R_h = H if W is None else W * H / (W + 2 * H)
+    return R_h * S / ((s - 1) * D)
+
+
+def bedload_arrays(W, S, H, D=0.03, formulas=None, s=S_SED, wide_channel=False):
+    """
+    Vectorized bedload transport of many reaches for several formulas
+    :param W: ndarray of channel widths (m)
+    :param S: ndarray of energy slopes (-)
+    :param H: ndarray of flow depths (m)
+    :param D: FLOAT or ndarray of the characteristic grain size (m, default: 0.03)
+    :param formulas: LIST of formula names (default: None uses all, see transport_functions)
+    :param s: FLOAT of the relative sediment density (default: 2.65)
+    :param wide_channel: BOOL to use the flow depth instead of the hydraulic radius (default: False)
+    :output: DICT of ndarrays with "tau" (Shields stress) and "Qb_<formula>" (bedload in m3/s over the width W)
+    """
+    functions = transport_functions()
+    formulas = formulas or list(functions.keys())
+    tau = shields_stress(H, S, None if wide_channel else W, D=D, s=s)
+    # Einstein scaling of the dimensionless transport rate to m2/s
+    scale = np.sqrt((s - 1) * G * np.asarray(D, dtype=float) ** 3) * W
+    results = {"tau": tau}
+    for name in formulas:
+        results["Qb_" + name] = functions[name](tau) * scale
+    return results
+
+
+def bedload(table, D=0.03, formulas=None, s=S_SED, wide_channel=False):
+    """
+    :param table: pandas.DataFrame with W, S, and H columns (e.g., data/bedload_dataset)
+    :param D: FLOAT, ndarray, or STR of a column name of the characteristic grain size (m, default: 0.03)
+    :param formulas: LIST of formula names (default: None uses all)
+    :param s: FLOAT of the relative sediment density (default: 2.65)
+    :param wide_channel: BOOL to use the flow depth instead of the hydraulic radius (default: False)
+    :output: pandas.DataFrame with tau and Qb_<formula> columns (same index as table)
+    """
+    if isinstance(D, str):
+        D = table[D].to_numpy(dtype=float)
+    results = bedload_arrays(table["W"].to_numpy(dtype=float), table["S"].to_numpy(dtype=float),
+                             table["H"].to_numpy(dtype=float), D=D, formulas=formulas, s=s,
+                             wide_channel=wide_channel)
+    return pd.DataFrame(results, index=table.index)
+
+
+class CategoryIndex:
+    def __init__(self, categories=()):
+        """
+        Precomputed integer codes of categories (e.g., Morphology) that stay stable across chunks, so that
+        grouped sums become np.bincount calls
+        :param categories: LIST of known categories (default: ())
+        """
+        self.categories = list(categories)
+
+    def encode(self, values):
+        """
+        :param values: pandas.Series or array of category labels
+        :output: ndarray (INT) of codes, where unseen labels are appended to self.categories and missing labels
+                 (np.nan or None) are -1
+        """
+        categorical = pd.Categorical(values)
+        new = [c for c in categorical.categories if c not in self.categories]
+        self.categories.extend(new)
+        return categorical.set_categories(self.categories).codes.astype(np.int64)
+
+    def group_moments(self, codes, values):
+        """
+        :param codes: ndarray (INT) of category codes (see encode), where rows with code -1 (missing label) are
+                      skipped like in pandas.DataFrame.groupby
+        :param values: ndarray of shape (n_rows, n_columns)
+        :output: ndarrays of shape (n_categories, n_columns) of count, mean, and m2 (sum of squared deviations)
+        """
+        labeled = codes >= 0
+        if not labeled.all():
+            codes = codes[labeled]
+            values = values[labeled]
+        n = len(self.categories)
+        count = np.bincount(codes, minlength=n).astype(float)
+        total = np.column_stack([np.bincount(codes, weights=values[:, i], minlength=n)
+                                 for i in range(values.shape[1])])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count[:, None] > 0, total / count[:, None], 0.0)
+        deviations = values - mean[codes]
+        m2 = np.column_stack([np.bincount(codes, weights=deviations[:, i] ** 2, minlength=n)
+                              for i in range(values.shape[1])])
+        return np.repeat(count[:, None], values.shape[1], axis=1), mean, m2
+
+
+def merge_moments(total, part):
+    """
+    Merge grouped moments (Chan et al.), where part may contain more categories than total
+    :param total: TUPLE of (count, mean, m2) ndarrays of shape (n_categories, n_columns) or None
+    :param part: TUPLE of (count, mean, m2) ndarrays
+    :output: TUPLE of merged (count, mean, m2) ndarrays
+    """
+    if total is None:
+        return part
+    pad = part[0].shape[0] - total[0].shape[0]
+    count, mean, m2 = [np.pad(array, ((0, pad), (0, 0))) for array in total]
+    count_b, mean_b, m2_b = part
+    merged = count + count_b
+    delta = mean_b - mean
+    with np.errstate(invalid="ignore", divide="ignore"):
+        new_mean = np.where(merged > 0, mean + delta * count_b / merged, 0.0)
+        new_m2 = np.where(merged > 0, m2 + m2_b + delta ** 2 * count * count_b / merged, 0.0)
+    return merged, new_mean, new_m2
+
+
+def moments2frame(moments, categories, columns, group_name="Morphology"):
+    """
+    :output: pandas.DataFrame with count, mean, and std (ddof=1) per category and column
+    """
+    count, mean, m2 = moments
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(m2 / (count - 1))
+    frames = {"count": pd.Series(count[:, 0], index=categories)}
+    for i, column in enumerate(columns):
+        frames["mean_" + column] = mean[:, i]
+        frames["std_" + column] = std[:, i]
+    return pd.DataFrame(frames, index=pd.Index(categories, name=group_name))
+
+
+def group_bedload(table, D=0.03, formulas=None, group_column="Morphology", **kwargs):
+    """
+    Bedload statistics per group (e.g., Morphology) of a table in memory
+    :param table: pandas.DataFrame with W, S, H, and group_column columns
+    :param D: FLOAT, ndarray, or STR of a column name of the characteristic grain size (m, default: 0.03)
+    :param formulas: LIST of formula names (default: None uses all)
+    :param group_column: STR of the group column (default: "Morphology")
+    :output: pandas.DataFrame with count, mean_<column>, and std_<column> per group
+    """
+    results = bedload(table, D=D, formulas=formulas, **kwargs)
+    index = CategoryIndex()
+    codes = index.encode(table[group_column])
+    moments = index.group_moments(codes, results.to_numpy())
+    return moments2frame(moments, index.categories, list(results.columns), group_column)
+
+
+def stream_bedload(csv_file, D=0.03, formulas=None, group_column="Morphology", chunksize=1000000, out_file=None,
+                   **kwargs):
+    """
+    Bedload statistics per group of CSV files shaped like data/bedload_dataset (W,S,Q,U,H,Morphology) in
+    constant memory
+    :param csv_file: STR of a csv file name, including directory
+    :param D: FLOAT or STR of a column name of the characteristic grain size (m, default: 0.03)
+    :param formulas: LIST of formula names (default: None uses all)
+    :param group_column: STR of the group column (default: "Morphology")
+    :param chunksize: INT of rows per chunk (default: 1000000)
+    :param out_file: STR of a csv file name to write the row-wise results to (default: None)
+    :output: pandas.DataFrame with count, mean_<column>, and std_<column> per group
+    """
+    usecols = ["W", "S", "H", group_column] + ([D] if isinstance(D, str) else [])
+    dtypes = {column: np.float64 for column in usecols}
+    dtypes[group_column] = str
+    index = CategoryIndex()
+    moments = None
+    columns = None
+    for i, chunk in enumerate(pd.read_csv(csv_file, chunksize=chunksize, usecols=usecols, dtype=dtypes)):
+        results = bedload(chunk, D=D, formulas=formulas, **kwargs)
+        columns = list(results.columns)
+        codes = index.encode(chunk[group_column])
+        moments = merge_moments(moments, index.group_moments(codes, results.to_numpy()))
+        if out_file:
+            results[group_column] = chunk[group_column]
+            results.to_csv(out_file, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return moments2frame(moments, index.categories, columns, group_column)
+
+
+def apply_row(row, D=0.03, s=S_SED):
+    """
+    Row-wise reference (DataFrame.apply) of bedload for the benchmark
+    :param row: pandas.Series with W, S, and H
+    :output: pandas.Series with tau and Qb_<formula>
+    """
+    R_h = row["W"] * row["H"] / (row["W"] + 2 * row["H"])
+    tau = R_h * row["S"] / ((s - 1) * D)
+    scale = ((s - 1) * G * D ** 3) ** 0.5 * row["W"]
+    result = {"tau": tau}
+    for name, (a, tau_cr, b) in excess_shear_formulas.items():
+        result["Qb_" + name] = a * max(tau - tau_cr, 0.0) ** b * scale
+    result["Qb_parker"] = (11.2 * (tau - 0.03) ** 4.5 / tau ** 3 if tau > 0.03 else 0.0) * scale
+    return pd.Series(result)
+
+
+if __name__ == "__main__":
+    # benchmark: DataFrame.apply versus vectorized kernels, groupby versus categorical index, and streaming
+    import tempfile
+    import time
+    table = pd.read_csv(os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + "/data/bedload_dataset")
+    large = pd.concat([table] * 1000, ignore_index=True)
+
+    t_start = time.perf_counter()
+    reference = table.apply(apply_row, axis=1)
+    t_apply = (time.perf_counter() - t_start) / len(table)
+    t_start = time.perf_counter()
+    results = bedload(large)
+    t_vector = (time.perf_counter() - t_start) / len(large)
+    print("max. difference to DataFrame.apply: %.2e" % np.nanmax(np.abs(bedload(table) - reference).to_numpy()))
+    print("DataFrame.apply: %8.0f rows/s" % (1 / t_apply))
+    print("vectorized:      %8.0f rows/s (%.0fx)" % (1 / t_vector, t_apply / t_vector))
+
+    t_start = time.perf_counter()
+    results.groupby(large["Morphology"]).agg(["count", "mean", "std"])
+    t_groupby = time.perf_counter() - t_start
+    t_start = time.perf_counter()
+    group_bedload(large)
+    t_index = time.perf_counter() - t_start
+    print("%i rows: bedload + DataFrame.groupby %.3f s, bedload + categorical index %.3f s" % (
+        len(large), t_vector * len(large) + t_groupby, t_index))
+
+    csv_file = os.path.join(tempfile.gettempdir(), "bedload_large.csv")
+    large.to_csv(csv_file, index=False)
+    t_start = time.perf_counter()
+    print(stream_bedload(csv_file, formulas=["mpm", "parker"]))
+    print("streamed %.1f MB in %.2f s" % (os.path.getsize(csv_file) / 1e6, time.perf_counter() - t_start))
+    os.remove(csv_file)
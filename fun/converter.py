@@ -1,3 +1,19 @@
+import numpy as np
+from fun.profiling import profiled
+
+
+# conversion factors to SI base units (m, m3/s) grouped by physical quantity
+UNITS = {
+    "m": ("length", 1.0),
+    "ft": ("length", 0.3048),
+    "in": ("length", 0.0254),
+    "mm": ("length", 0.001),
+    "m3/s": ("discharge", 1.0),
+    "m³/s": ("discharge", 1.0),
+    "cfs": ("discharge", 0.3048 ** 3),
+}
+
+
 def feet_to_meter(*args, **kwargs):
     """ 
     :param *args: numeric values in feet
@@ -22,3 +38,90 @@ def feet_to_meter(*args, **kwargs):
         return value_list
     else:
         return value_list[0]
+
+
+def get_conversion_factor(from_unit, to_unit):
+    """
+    :param from_unit: STR of a unit in UNITS (e.g., "ft")
+    :param to_unit: STR of a unit in UNITS of the same quantity (e.g., "m")
+    :output: FLOAT of the factor that converts from_unit values to to_unit values
+    """
+    try:
+        from_quantity, from_factor = UNITS[from_unit]
+        to_quantity, to_factor = UNITS[to_unit]
+    except KeyError as e:
+        raise ValueError("Unknown unit %s (available: %s)." % (str(e), ", ".join(UNITS)))
+    if from_quantity != to_quantity:
+        raise ValueError("Cannot convert %s (%s) to %s (%s)." % (from_unit, from_quantity, to_unit, to_quantity))
+    return from_factor / to_factor
+
+
+def to_float_array(values):
+    """
+    :param values: scalar, list, or ndarray that may contain non-numeric entries
+    :output: ndarray of FLOAT, where non-numeric entries are np.nan
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in "biuf":
+        return array
+    flat = []
+    for value in array.ravel():
+        try:
+            flat.append(float(value))
+        except (TypeError, ValueError):
+            flat.append(np.nan)
+    return np.array(flat, dtype=float).reshape(array.shape)
+
+
+def wrap_like(values, array):
+    """
+    :param values: pandas.Series or pandas.DataFrame
+    :param array: ndarray of the same shape as values
+    :output: pandas object of the type, index, and columns (or name) of values that shares the memory of array
+    """
+    if values.ndim == 1:
+        return type(values)(array, index=values.index, name=values.name, copy=False)
+    return type(values)(array, index=values.index, columns=values.columns, copy=False)
+
+
+@profiled(n_items=lambda result, values, *args, **kwargs: np.size(result[0]), unit="values")
+def convert(values, from_unit="ft", to_unit="m", out=None):
+    """
+    Convert values between hydraulic units with a single ufunc call
+    :param values: scalar, list, ndarray, pandas.Series or pandas.DataFrame
+    :param from_unit: STR of the unit of values (default: "ft"), see UNITS
+    :param to_unit: STR of the target unit (default: "m"), see UNITS
+    :param out: ndarray (FLOAT) to write the result to (default: None); out=values converts a float ndarray in place
+    :output: (1) converted values of the same type as values (scalar, ndarray, or pandas object that shares the
+                 memory of out if provided)
+             (2) BOOL mask (same shape) that is True where values are invalid (not numeric, np.nan, or inf)
+    """
+    factor = get_conversion_factor(from_unit, to_unit)
+    if out is not None and not (isinstance(out, np.ndarray) and out.dtype.kind == "f"):
+        raise TypeError("out must be a float ndarray (got %s)." % getattr(out, "dtype", type(out).__name__))
+
+    if hasattr(values, "to_numpy"):
+        # pandas objects: convert the values like ndarrays and restore index and columns
+        converted = np.multiply(to_float_array(values.to_numpy()), factor, out=out)
+        return wrap_like(values, converted), wrap_like(values, ~np.isfinite(converted))
+
+    array = to_float_array(values)
+    converted = np.multiply(array, factor, out=out)
+    invalid = ~np.isfinite(converted)
+    if converted.ndim == 0:
+        return float(converted), bool(invalid)
+    return converted, invalid
+
+
+if __name__ == "__main__":
+    # benchmark the vectorized conversion against feet_to_meter (run from the repository root: python -m fun.converter)
+    import timeit
+    gauge_series = np.random.rand(1000000) * 10.0
+    gauge_list = gauge_series.tolist()
+    n_runs = 5
+    t_loop = timeit.timeit(lambda: feet_to_meter(*gauge_list), number=n_runs) / n_runs
+    t_vector = timeit.timeit(lambda: convert(gauge_series), number=n_runs) / n_runs
+    t_inplace = timeit.timeit(lambda: convert(gauge_series, "ft", "ft", out=gauge_series), number=n_runs) / n_runs
+    print("feet_to_meter:        %8.2f ms" % (t_loop * 1000))
+    print("convert:              %8.2f ms (%.0fx faster)" % (t_vector * 1000, t_loop / t_vector))
+    print("convert (out=values): %8.2f ms (%.0fx faster)" % (t_inplace * 1000, t_loop / t_inplace))
@@ -0,0 +1,211 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+G = 9.81  # N/kg
+
+# pontoon (open box) geometry and densities of schwimmstabilitaet.ipynb
+case_dtype = np.dtype([("b_x", "f8"),     # m box width
+                       ("b_y", "f8"),     # m box length
+                       ("h", "f8"),       # m box height
+                       ("w", "f8"),       # m wall thickness
+                       ("rho_k", "f8"),   # kg/m3 body (material) density
+                       ("rho_f", "f8")])  # kg/m3 fluid density
+
+result_dtype = np.dtype([("V_k", "f8"), ("F_g", "f8"), ("V_v", "f8"), ("d", "f8"), ("f", "f8"), ("I_0", "f8"),
+                         ("h_g", "f8"), ("h_v", "f8"), ("h_gv", "f8"), ("h_M", "f8"), ("stability", "i1")])
+
+# stability classes
+SINKS, LABILE, INDIFFERENT, STABLE = 0, 1, 2, 3
+stability_names = {SINKS: "sinks", LABILE: "labile", INDIFFERENT: "indifferent", STABLE: "stable"}
+
+
+def make_cases(b_x, b_y, h, w, rho_k, rho_f=1000.0):
+    """
+    Build all combinations (full factorial grid) of geometry and density values
+    :param b_x, b_y, h, w, rho_k, rho_f: FLOAT or LIST/ndarray of values
+    :output: ndarray of case_dtype
+    """
+    axes = [np.atleast_1d(np.asarray(values, dtype=float)) for values in (b_x, b_y, h, w, rho_k, rho_f)]
+    grids = np.meshgrid(*axes, indexing="ij")
+    cases = np.empty(grids[0].size, dtype=case_dtype)
+    for name, grid in zip(case_dtype.names, grids):
+        cases[name] = grid.ravel()
+    return cases
+
+
+def evaluate_stability(cases, g=G, tolerance=1e-9):
+    """
+    Draft, freeboard, and metacentric height of open boxes (all cases at once)
+    :param cases: ndarray of case_dtype (or any structured array / DICT with its fields)
+    :param g: FLOAT of the gravitational acceleration (default: 9.81)
+    :param tolerance: FLOAT of |h_M| below which the box floats indifferently (default: 1e-9)
+    :output: ndarray of result_dtype, where stability is SINKS (f < 0), LABILE, INDIFFERENT, or STABLE
+    """
+    b_x = cases["b_x"]
+    b_y = cases["b_y"]
+    h = cases["h"]
+    w = cases["w"]
+    results = np.empty(np.shape(b_x), dtype=result_dtype)
+
+    # body volume and weight
+    V_k = b_x * b_y * h - (b_x - 2 * w) * (b_y - 2 * w) * (h - w)
+    results["V_k"] = V_k
+    results["F_g"] = V_k * cases["rho_k"] * g
+    # displacement volume, draft, and freeboard
+    V_v = results["F_g"] / (cases["rho_f"] * g)
+    results["V_v"] = V_v
+    results["d"] = V_v / (b_x * b_y)
+    results["f"] = h - results["d"]
+
+    # second moment of area of the waterline plane, centers of gravity and buoyancy, metacentric height
+    results["I_0"] = b_x ** 3 * b_y / 12
+    walls = 2 * (b_y - 2 * w) * (h - w) * w + 2 * b_x * (h - w) * w
+    results["h_g"] = (walls * (w + h / 2) + b_x * b_y * w * w / 2) / V_k
+    results["h_v"] = results["d"] / 2
+    results["h_gv"] = results["h_g"] - results["h_v"]
+    results["h_M"] = results["I_0"] / V_v - results["h_gv"]
+
+    results["stability"] = np.select([results["f"] < 0, results["h_M"] < -tolerance, results["h_M"] <= tolerance],
+                                     [SINKS, LABILE, INDIFFERENT], default=STABLE)
+    return results
+
+
+def get_grid_cases(axes, start, stop):
+    """
+    :param axes: LIST of ndarrays of b_x, b_y, h, w, rho_k, and rho_f values spanning a full factorial grid
+    :param start: INT of the first case (flat grid index)
+    :param stop: INT of the case after the last case
+    :output: ndarray of case_dtype with cases start ... stop - 1
+    """
+    index = np.unravel_index(np.arange(start, stop), tuple(len(values) for values in axes))
+    cases = np.empty(stop - start, dtype=case_dtype)
+    for name, values, i in zip(case_dtype.names, axes, index):
+        cases[name] = values[i]
+    return cases
+
+
+def screen_chunk(axes, start, stop, min_freeboard=0.0, min_h_M=0.0):
+    """
+    :param axes: LIST of ndarrays (see get_grid_cases)
+    :param start: INT of the first case
+    :param stop: INT of the case after the last case
+    :param min_freeboard: FLOAT of the minimum freeboard f of returned cases (default: 0.0)
+    :param min_h_M: FLOAT of the minimum metacentric height h_M of returned cases (default: 0.0)
+    :output: ndarray (INT) of case counts per stability class, ndarray (INT) of flat indices of the cases that
+             satisfy both margins, and ndarray of result_dtype of these cases
+    """
+    results = evaluate_stability(get_grid_cases(axes, start, stop))
+    counts = np.bincount(results["stability"], minlength=len(stability_names))
+    keep = (results["stability"] == STABLE) & (results["f"] >= min_freeboard) & (results["h_M"] >= min_h_M)
+    return counts, np.flatnonzero(keep) + start, results[keep]
+
+
+def screen_grid(b_x, b_y, h, w, rho_k, rho_f=1000.0, min_freeboard=0.0, min_h_M=0.0, chunk_size=2000000,
+                n_workers=None):
+    """
+    Screen a full factorial grid of pontoons (e.g., 10^8 cases) in chunks that are generated in the workers
+    :param b_x, b_y, h, w, rho_k, rho_f: FLOAT or LIST/ndarray of values
+    :param min_freeboard: FLOAT of the minimum freeboard f of returned cases (default: 0.0)
+    :param min_h_M: FLOAT of the minimum metacentric height h_M of returned cases (default: 0.0)
+    :param chunk_size: INT of cases per chunk (default: 2000000)
+    :param n_workers: INT of worker processes (default: None uses the number of CPUs; 1 runs in this process)
+    :output: DICT of {stability class name: INT of cases}, ndarray of case_dtype and ndarray of result_dtype
+             of the stable cases that satisfy both margins
+    """
+    axes = [np.atleast_1d(np.asarray(values, dtype=float)) for values in (b_x, b_y, h, w, rho_k, rho_f)]
+    n_cases = int(np.prod([len(values) for values in axes]))
+    starts = list(range(0, n_cases, chunk_size))
+    stops = [min(start + chunk_size, n_cases) for start in starts]
+    args = ([axes] * len(starts), starts, stops, [min_freeboard] * len(starts), [min_h_M] * len(starts))
+    if n_workers == 1:
+        chunks = list(map(screen_chunk, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            chunks = list(executor.map(screen_chunk, *args))
+
+    counts = np.sum([chunk[0] for chunk in chunks], axis=0)
+    index = np.concatenate([chunk[1] for chunk in chunks])
+    cases = np.empty(index.size, dtype=case_dtype)
+    for name, values, i in zip(case_dtype.names, axes,
+                               np.unravel_index(index, tuple(len(values) for values in axes))):
+        cases[name] = values[i]
+    return ({stability_names[c]: int(counts[c]) for c in stability_names}, cases,
+            np.concatenate([chunk[2] for chunk in chunks]))
+
+
+def monte_carlo_density(cases, rho_k_mean, rho_k_std, n_samples=1000, seed=None, chunk_size=1000000):
+    """
+    Stability of geometries with normally distributed material density (Monte Carlo)
+    :param cases: ndarray of case_dtype (rho_k is replaced by the samples)
+    :param rho_k_mean: FLOAT of the mean material density (kg/m3)
+    :param rho_k_std: FLOAT of the standard deviation of the material density (kg/m3)
+    :param n_samples: INT of density samples per case (default: 1000)
+    :param seed: INT of the random generator seed (default: None)
+    :param chunk_size: INT of evaluated case-sample pairs at a time (default: 1000000)
+    :output: DICT of ndarrays (one value per case) with p_stable, p_sinks, h_M_p05 (5 % quantile of h_M), and
+             f_p05 (5 % quantile of the freeboard)
+    """
+    rng = np.random.default_rng(seed)
+    out = {name: np.empty(cases.size) for name in ("p_stable", "p_sinks", "h_M_p05", "f_p05")}
+    cases_per_chunk = max(1, chunk_size // n_samples)
+    for start in range(0, cases.size, cases_per_chunk):
+        block = np.repeat(cases[start:start + cases_per_chunk], n_samples)
+        block["rho_k"] = rng.normal(rho_k_mean, rho_k_std, block.size)
+        results = evaluate_stability(block)
+        stability = results["stability"].reshape(-1, n_samples)
+        stop = start + stability.shape[0]
+        out["p_stable"][start:stop] = np.mean(stability == STABLE, axis=1)
+        out["p_sinks"][start:stop] = np.mean(stability == SINKS, axis=1)
+        out["h_M_p05"][start:stop] = np.percentile(results["h_M"].reshape(-1, n_samples), 5, axis=1)
+        out["f_p05"][start:stop] = np.percentile(results["f"].reshape(-1, n_samples), 5, axis=1)
+    return out
+
+
+def scalar_stability(b_x, b_y, h, w, rho_k, rho_f=1000.0, g=G):
+    """
+    One case with scalar arithmetic as in the notebook (reference for the benchmark)
+    :output: TUPLE of (freeboard f, metacentric height h_M)
+    """
+    V_k = b_x * b_y * h - (b_x - 2 * w) * (b_y - 2 * w) * (h - w)
+    F_g = V_k * rho_k * g
+    V_v = F_g / (rho_f * g)
+    d = V_v / (b_x * b_y)
+    f = h - d
+    I_0 = b_x ** 3 * b_y / 12
+    V_k_lat_waende = 2 * (b_y - 2 * w) * (h - w) * w
+    V_k_front_back = 2 * b_x * (h - w) * w
+    V_k_boden = b_x * b_y * w
+    h_g = ((V_k_lat_waende + V_k_front_back) * (w + h / 2) + V_k_boden * w / 2) / V_k
+    h_v = d / 2
+    h_M = I_0 / V_v - (h_g - h_v)
+    return f, h_M
+
+
+if __name__ == "__main__":
+    # benchmark: scalar loop versus vectorized and chunked evaluation
+    import time
+    cases = make_cases(np.linspace(0.5, 3.0, 26), np.linspace(1.0, 6.0, 26), np.linspace(0.3, 2.0, 18),
+                       np.linspace(0.005, 0.05, 10), np.linspace(400.0, 1200.0, 17))
+    t_start = time.perf_counter()
+    scalar = [scalar_stability(*case) for case in cases.tolist()]
+    t_scalar = time.perf_counter() - t_start
+    t_start = time.perf_counter()
+    results = evaluate_stability(cases)
+    t_vector = time.perf_counter() - t_start
+    print("%i cases: scalar %.3f s, vectorized %.3f s (%.0fx), max. h_M difference %.1e" % (
+        cases.size, t_scalar, t_vector, t_scalar / t_vector, np.max(np.abs(np.array(scalar)[:, 1] - results["h_M"]))))
+
+    t_start = time.perf_counter()
+    counts, stable_cases, stable_results = screen_grid(np.linspace(0.5, 3.0, 51), np.linspace(1.0, 6.0, 51),
+                                                       np.linspace(0.3, 2.0, 35), np.linspace(0.005, 0.05, 19),
+                                                       np.linspace(400.0, 1200.0, 61), min_freeboard=0.3,
+                                                       min_h_M=0.1)
+    n_cases = sum(counts.values())
+    elapsed = time.perf_counter() - t_start
+    print("%i cases screened in %.1f s (%.1f million cases/s): %s, %i with f >= 0.3 m and h_M >= 0.1 m" % (
+        n_cases, elapsed, n_cases / elapsed / 1e6, counts, stable_cases.size))
+
+    t_start = time.perf_counter()
+    probabilities = monte_carlo_density(cases[:1000], 870.0, 50.0, n_samples=1000, seed=1)
+    print("Monte Carlo (1000 geometries x 1000 densities): %.2f s, mean p_stable = %.3f" % (
+        time.perf_counter() - t_start, probabilities["p_stable"].mean()))
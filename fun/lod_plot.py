@@ -0,0 +1,347 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import matplotlib.pyplot as plt
+import matplotlib.cm as cm
+import numpy as np
+
+# default pyramid cache directory (shared with fun.table_cache)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", ".cache")
+
+# level-of-detail modes of plot_xy
+lod_modes = ("minmax", "lttb")
+
+
+def bin_extrema(y, bin_size, x=None, chunk_rows=1 << 18):
+    """
+    Minimum and maximum (with their positions) of consecutive bins of equal size, in row chunks for long or
+    memory-mapped series; np.nan is ignored
+    :param y: ndarray of values
+    :param bin_size: INT of values per bin (the last bin may be shorter)
+    :param x: ndarray of positions (same length as y, default: None uses the sample index)
+    :param chunk_rows: INT of bins per chunk (default: 262144)
+    :output: ndarrays of x_min, y_min, x_max, and y_max per bin
+    """
+    n_bins = int(np.ceil(len(y) / bin_size))
+    out = {name: np.empty(n_bins) for name in ("x_min", "y_min", "x_max", "y_max")}
+    for start in range(0, n_bins, chunk_rows):
+        stop = min(start + chunk_rows, n_bins)
+        block = np.asarray(y[start * bin_size:stop * bin_size], dtype=float)
+        pad = (stop - start) * bin_size - block.size
+        block = np.pad(block, (0, pad), constant_values=np.nan).reshape(-1, bin_size)
+        nan = np.isnan(block)
+        i_min = np.where(nan, np.inf, block).argmin(axis=1)
+        i_max = np.where(nan, -np.inf, block).argmax(axis=1)
+        rows = np.arange(block.shape[0])
+        out["y_min"][start:stop] = block[rows, i_min]
+        out["y_max"][start:stop] = block[rows, i_max]
+        # sample index of the extrema (clipped to the last sample of the padded bin)
+        i_min = np.minimum((rows + start) * bin_size + i_min, len(y) - 1)
+        i_max = np.minimum((rows + start) * bin_size + i_max, len(y) - 1)
+        out["x_min"][start:stop] = i_min if x is None else np.asarray(x[i_min], dtype=float)
+        out["x_max"][start:stop] = i_max if x is None else np.asarray(x[i_max], dtype=float)
+    return out["x_min"], out["y_min"], out["x_max"], out["y_max"]
+
+
+def merge_extrema(x_min, y_min, x_max, y_max, factor):
+    """
+    Merge factor consecutive bins of a pyramid level into one bin of the next coarser level
+    :param x_min, y_min, x_max, y_max: ndarrays of one pyramid level (see bin_extrema)
+    :param factor: INT of bins per merged bin
+    :output: ndarrays of x_min, y_min, x_max, and y_max per merged bin
+    """
+    n_bins = int(np.ceil(len(y_min) / factor))
+    pad = n_bins * factor - len(y_min)
+    arrays = [np.pad(np.asarray(a, dtype=float), (0, pad), constant_values=np.nan).reshape(n_bins, factor)
+              for a in (x_min, y_min, x_max, y_max)]
+    rows = np.arange(n_bins)
+    i_min = np.where(np.isnan(arrays[1]), np.inf, arrays[1]).argmin(axis=1)
+    i_max = np.where(np.isnan(arrays[3]), -np.inf, arrays[3]).argmax(axis=1)
+    return arrays[0][rows, i_min], arrays[1][rows, i_min], arrays[2][rows, i_max], arrays[3][rows, i_max]
+
+
+def interleave_extrema(x_min, y_min, x_max, y_max):
+    """
+    :param x_min, y_min, x_max, y_max: ndarrays of bin extrema
+    :output: ndarrays of x and y with the two extrema of every bin in x order (shape-preserving polyline)
+    """
+    swap = x_max < x_min
+    x = np.empty(2 * len(x_min))
+    y = np.empty(2 * len(x_min))
+    x[0::2] = np.where(swap, x_max, x_min)
+    x[1::2] = np.where(swap, x_min, x_max)
+    y[0::2] = np.where(swap, y_max, y_min)
+    y[1::2] = np.where(swap, y_min, y_max)
+    return x, y
+
+
+def minmax_downsample(x, y, n_bins):
+    """
+    Min/max decimation to at most 2 * n_bins points (keeps peaks that single-sample decimation drops)
+    :param x: ndarray of x values (sorted)
+    :param y: ndarray of y values
+    :param n_bins: INT of bins (e.g., the plot width in pixels)
+    :output: ndarrays of the decimated x and y values
+    """
+    if len(y) <= 2 * n_bins:
+        return np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    return interleave_extrema(*bin_extrema(y, int(np.ceil(len(y) / n_bins)), x=x))
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling (Steinarsson 2013), which keeps the first and the last point
+    :param x: ndarray of x values (sorted)
+    :param y: ndarray of y values (without np.nan)
+    :param n_out: INT of output points (>= 3)
+    :output: ndarrays of the selected x and y values
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if n_out >= len(y) or n_out < 3:
+        return x, y
+    edges = np.linspace(1, len(y) - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = len(y) - 1
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # average of the next bucket (the last point for the last bucket)
+        next_stop = edges[i + 2] if i + 2 < len(edges) else len(y)
+        x_next = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        y_next = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        x_a, y_a = x[selected[i]], y[selected[i]]
+        area = np.abs((x_a - x_next) * (y[start:stop] - y_a) - (x_a - x[start:stop]) * (y_next - y_a))
+        selected[i + 1] = start + int(np.argmax(area))
+    return x[selected], y[selected]
+
+
+class LODSeries:
+    def __init__(self, x, y, bin_size=16, factor=8, min_bins=512, levels=None):
+        """
+        Multi-resolution min/max pyramid of a long series (e.g., years of 1 Hz gauge data), where level k has
+        bins of bin_size * factor ** k samples
+        :param x: ndarray of x values (sorted, e.g., time in seconds; may be memory-mapped)
+        :param y: ndarray of y values (may be memory-mapped)
+        :param bin_size: INT of samples per bin of the finest level (default: 16)
+        :param factor: INT of bins merged per coarser level (default: 8)
+        :param min_bins: INT of bins below which no coarser level is built (default: 512)
+        :param levels: LIST of TUPLEs of (x_min, y_min, x_max, y_max) ndarrays (default: None builds the levels)
+        """
+        self.x = x
+        self.y = y
+        self.bin_size = bin_size
+        self.factor = factor
+        if levels is None:
+            levels = []
+            if len(y) > bin_size:
+                levels.append(bin_extrema(y, bin_size, x=x))
+                while len(levels[-1][0]) > max(min_bins, factor):
+                    levels.append(merge_extrema(*levels[-1], factor))
+        self.levels = levels
+
+    @classmethod
+    def from_csv(cls, csv_file, y_column, x_column=None, cache_dir=CACHE_DIR, bin_size=16, factor=8, min_bins=512):
+        """
+        Load a series with its pyramid from a memory-mapped disk cache or build and save the cache entry
+        :param csv_file: STR of a csv file name, including directory (e.g., data/FlowDepth009.csv)
+        :param y_column: STR of the y column name (e.g., "Sensor 1 (m)")
+        :param x_column: STR of the x column name (default: None uses the row index)
+        :param cache_dir: STR of the cache directory (default: CACHE_DIR)
+        :param bin_size: INT of samples per bin of the finest level (default: 16)
+        :param factor: INT of bins merged per coarser level (default: 8)
+        :param min_bins: INT of bins below which no coarser level is built (default: 512)
+        :output: LODSeries
+        """
+        source_key = hashlib.sha1(("%s|%s|%s" % (os.path.abspath(csv_file), x_column, y_column)).encode("utf-8"))
+        pyramid_key = hashlib.sha1(("%i|%i|%i" % (bin_size, factor, min_bins)).encode("utf-8"))
+        pyramid_dir = os.path.join(cache_dir, "lod-%s-%s-%i" % (source_key.hexdigest()[:16],
+                                                                pyramid_key.hexdigest()[:8],
+                                                                os.stat(csv_file).st_mtime_ns))
+        if os.path.isfile(os.path.join(pyramid_dir, "pyramid.json")):
+            return cls.load(pyramid_dir)
+        import pandas as pd
+        columns = [y_column] if x_column is None else [x_column, y_column]
+        df = pd.read_csv(csv_file, usecols=columns)
+        y = df[y_column].to_numpy(dtype=float)
+        x = np.arange(len(y), dtype=float) if x_column is None else df[x_column].to_numpy(dtype=float)
+        series = cls(x, y, bin_size=bin_size, factor=factor, min_bins=min_bins)
+        os.makedirs(cache_dir, exist_ok=True)
+        series.save(pyramid_dir)
+        evict_stale(pyramid_dir)
+        return series
+
+    def save(self, pyramid_dir):
+        """
+        Save the series and all levels as .npy files (replaced atomically)
+        :param pyramid_dir: STR of the target directory
+        """
+        tmp_dir = "%s.%i.tmp" % (pyramid_dir, os.getpid())
+        os.makedirs(tmp_dir, exist_ok=True)
+        np.save(os.path.join(tmp_dir, "x.npy"), np.asarray(self.x, dtype=float))
+        np.save(os.path.join(tmp_dir, "y.npy"), np.asarray(self.y, dtype=float))
+        for k, level in enumerate(self.levels):
+            np.save(os.path.join(tmp_dir, "level%02i.npy" % k), np.vstack(level))
+        with open(os.path.join(tmp_dir, "pyramid.json"), "w") as f:
+            json.dump({"bin_size": self.bin_size, "factor": self.factor, "n_levels": len(self.levels)}, f)
+        try:
+            os.replace(tmp_dir, pyramid_dir)
+        except OSError:
+            # another process wrote the same pyramid first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, pyramid_dir):
+        """
+        :param pyramid_dir: STR of a directory written by save()
+        :output: LODSeries with memory-mapped arrays
+        """
+        with open(os.path.join(pyramid_dir, "pyramid.json")) as f:
+            meta = json.load(f)
+        levels = [tuple(np.load(os.path.join(pyramid_dir, "level%02i.npy" % k), mmap_mode="r"))
+                  for k in range(meta["n_levels"])]
+        return cls(np.load(os.path.join(pyramid_dir, "x.npy"), mmap_mode="r"),
+                   np.load(os.path.join(pyramid_dir, "y.npy"), mmap_mode="r"),
+                   bin_size=meta["bin_size"], factor=meta["factor"], levels=levels)
+
+    def view(self, x_start=None, x_stop=None, n_pixels=1000, mode="minmax"):
+        """
+        Points to draw for an x range, where the cost depends on n_pixels rather than on the series length
+        :param x_start: FLOAT of the left view limit (default: None uses the first x value)
+        :param x_stop: FLOAT of the right view limit (default: None uses the last x value)
+        :param n_pixels: INT of horizontal pixels of the axes (default: 1000)
+        :param mode: STR of "minmax" (min/max per pixel) or "lttb" (default: "minmax")
+        :output: ndarrays of x and y values (at most 2 * n_pixels points)
+        """
+        i_start = 0 if x_start is None else max(int(np.searchsorted(self.x, x_start)) - 1, 0)
+        i_stop = len(self.x) if x_stop is None else min(int(np.searchsorted(self.x, x_stop, side="right")) + 1,
+                                                       len(self.x))
+        n_samples = i_stop - i_start
+        # coarsest level that still has at least n_pixels bins in the view
+        level = -1
+        for k in range(len(self.levels)):
+            if n_samples / (self.bin_size * self.factor ** k) >= n_pixels:
+                level = k
+        if level < 0:
+            x = np.asarray(self.x[i_start:i_stop], dtype=float)
+            y = np.asarray(self.y[i_start:i_stop], dtype=float)
+        else:
+            size = self.bin_size * self.factor ** level
+            b_start, b_stop = i_start // size, int(np.ceil(i_stop / size))
+            x, y = interleave_extrema(*(np.asarray(a[b_start:b_stop]) for a in self.levels[level]))
+        if mode == "lttb":
+            valid = ~np.isnan(y)
+            return lttb(x[valid], y[valid], 2 * n_pixels)
+        return minmax_downsample(x, y, n_pixels)
+
+
+def evict_stale(pyramid_dir):
+    """
+    Remove pyramids of the same source file and columns that were written for another mtime (pyramids of other
+    bin_size, factor, or min_bins settings for the current mtime are kept)
+    :param pyramid_dir: STR of the up-to-date pyramid directory (see LODSeries.from_csv)
+    """
+    source_prefix, _, mtime = pyramid_dir.rsplit("-", 2)
+    for stale_dir in glob.glob(source_prefix + "-*"):
+        if not stale_dir.endswith(".tmp") and stale_dir.rsplit("-", 1)[1] != mtime:
+            shutil.rmtree(stale_dir, ignore_errors=True)
+
+
+def plot_xy(x, y, plot_type="1D-line", label="Rnd. Weibull", save=None, lod=None, n_pixels=None):
+    """
+    Line or scatter plot of b07-pyplot, with optional level-of-detail decimation for long series; in lod mode,
+    zooming or panning re-selects the points from the pyramid
+    :param x: ndarray of x values (sorted for lod) or None if y is an LODSeries
+    :param y: ndarray of y values or LODSeries
+    :param plot_type: STR of "1D-line" or "scatter" (default: "1D-line")
+    :param label: STR of the legend label (default: "Rnd. Weibull")
+    :param save: STR of a file name to save the figure (default: None)
+    :param lod: STR of "minmax" or "lttb" (default: None plots all samples)
+    :param n_pixels: INT of points per view (default: None uses the axes width in pixels)
+    :output: matplotlib.axes.Axes or -1 if the plot_type or lod mode is invalid
+    """
+    if plot_type not in ("1D-line", "scatter") or (lod is not None and lod not in lod_modes):
+        print("ERROR: No valid input data provided.")
+        return -1
+    fig = plt.figure(figsize=(6.18, 3.82), dpi=100, facecolor='w', edgecolor='gray')  # figsize in inches
+    axes = fig.add_subplot(1, 1, 1, label=label)  # row, column, index, label
+    colormap = cm.plasma(np.linspace(0, 1, 5))
+
+    if lod is None:
+        x_plot, y_plot = x, y
+    else:
+        series = y if isinstance(y, LODSeries) else LODSeries(np.asarray(x, dtype=float), np.asarray(y))
+        n_pixels = n_pixels or int(np.ceil(axes.get_window_extent().width))
+        x_plot, y_plot = series.view(n_pixels=n_pixels, mode=lod)
+    if plot_type == "1D-line":
+        artist = axes.plot(x_plot, y_plot, linestyle="-", marker="o" if len(y_plot) <= 200 else "",
+                           color=colormap[0], label=label)[0]
+    else:
+        artist = axes.scatter(x_plot, y_plot, marker="x", color=colormap[0], label=label)
+
+    if lod is not None:
+        x_all = np.asarray(series.x[[0, -1]], dtype=float)
+        y_range = (np.nanmin(series.levels[-1][1]) if series.levels else np.nanmin(series.y),
+                   np.nanmax(series.levels[-1][3]) if series.levels else np.nanmax(series.y))
+        axes.set_xlim(tuple(x_all))
+        axes.set_ylim(y_range)
+
+        def refine(ax):
+            # re-select the points of the zoomed or panned view (strong reference in the callback registry)
+            x_view, y_view = series.view(*ax.get_xlim(), n_pixels=n_pixels, mode=lod)
+            if plot_type == "1D-line":
+                artist.set_data(x_view, y_view)
+            else:
+                artist.set_offsets(np.column_stack((x_view, y_view)))
+            ax.figure.canvas.draw_idle()
+
+        axes.callbacks.connect("xlim_changed", refine)
+    axes.set_xlabel("Linear x data")
+    axes.set_ylabel("Scale of " + str(label))
+    axes.legend(loc='upper right', facecolor='y', edgecolor='k', framealpha=0.5)
+    if save:
+        plt.savefig(save)
+    return axes
+
+
+if __name__ == "__main__":
+    # benchmark: all samples versus lod plots of a synthetic 1 Hz gauge record and FlowDepth009.csv
+    import tempfile
+    import time
+    import matplotlib
+    matplotlib.use("Agg")
+    tmp_dir = tempfile.mkdtemp()
+    n = 20000000  # about 231 days at 1 Hz
+    rng = np.random.default_rng(0)
+    t = np.arange(n, dtype=float)
+    h = 0.5 + 0.2 * np.sin(2 * np.pi * t / 86400.0) + np.cumsum(rng.normal(0, 1e-4, n))
+    h[rng.integers(0, n, 20)] += 1.0  # short flood peaks that plain decimation misses
+
+    t_start = time.perf_counter()
+    plot_xy(t, h, label="all samples", save=os.path.join(tmp_dir, "all.png"))
+    print("all %i samples: %.2f s" % (n, time.perf_counter() - t_start))
+    plt.close("all")
+
+    t_start = time.perf_counter()
+    series = LODSeries(t, h)
+    t_build = time.perf_counter() - t_start
+    series.save(os.path.join(tmp_dir, "pyramid"))
+    series = LODSeries.load(os.path.join(tmp_dir, "pyramid"))
+    for mode in lod_modes:
+        t_start = time.perf_counter()
+        axes = plot_xy(None, series, label=mode, save=os.path.join(tmp_dir, mode + ".png"), lod=mode)
+        t_plot = time.perf_counter() - t_start
+        t_start = time.perf_counter()
+        axes.set_xlim(1.0e6, 1.0e6 + 3600.0)
+        axes.figure.savefig(os.path.join(tmp_dir, mode + "_zoom.png"))
+        t_zoom = time.perf_counter() - t_start
+        print("%-6s pyramid %.2f s (once), plot %.2f s, zoom to 1 h %.2f s, peaks kept: %s" % (
+            mode, t_build, t_plot, t_zoom, np.isclose(np.max(series.view(mode=mode)[1]), h.max())))
+        plt.close("all")
+
+    gauge = LODSeries.from_csv(os.path.join(os.path.dirname(CACHE_DIR), "FlowDepth009.csv"), "Sensor 1 (m)",
+                               x_column="Time (s)", cache_dir=tmp_dir)
+    plot_xy(None, gauge, label="Sensor 1", save=os.path.join(tmp_dir, "FlowDepth009.png"), lod="minmax")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,233 @@
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# opt-in: set the environment variable HYPY_PROFILE to a JSON lines file name (or "-" for stderr) or call enable()
+PROFILE_ENV = "HYPY_PROFILE"
+
+# records kept in memory per process (the oldest records are dropped; all records are written to the output)
+MAX_RECORDS = 10000
+
+# profiler state: output target (None disables profiling), the latest records of this process, and the number of
+# active stages (only the outermost stage resets the process-wide peak RSS)
+state = {"output": os.environ.get(PROFILE_ENV) or None, "records": collections.deque(maxlen=MAX_RECORDS),
+         "active_stages": 0}
+lock = threading.Lock()
+
+
+def enable(output="-"):
+    """
+    :param output: STR of a JSON lines file name that records are appended to or "-" for stderr (default: "-")
+    """
+    state["output"] = output
+
+
+def disable():
+    state["output"] = None
+
+
+def is_enabled():
+    return state["output"] is not None
+
+
+def reset_peak_rss():
+    """
+    Reset the peak resident set size of this process (Linux >= 4.0) so that stages report their own peaks
+    :output: BOOL (True if the peak was reset)
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss():
+    """
+    :output: FLOAT of the peak resident set size in MB (since the last reset_peak_rss on Linux)
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kB on Linux
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def get_gdal_cache():
+    """
+    GDAL block cache usage (without importing GDAL if the profiled code did not import it)
+    :output: DICT of cache_used_mb and cache_max_mb or None
+    """
+    gdal = sys.modules.get("osgeo.gdal")
+    if gdal is None:
+        return None
+    return {"cache_used_mb": gdal.GetCacheUsed() / 1024 ** 2, "cache_max_mb": gdal.GetCacheMax() / 1024 ** 2}
+
+
+class Stage:
+    def __init__(self, name, n_items=None, unit="items", **tags):
+        """
+        Measurements of one profiled stage (set n_items inside the stage if it is known only afterwards)
+        :param name: STR of the stage name (e.g., "reproject_layer")
+        :param n_items: INT of processed features, cells, or rows (default: None)
+        :param unit: STR of the n_items unit (e.g., "features" or "cells", default: "items")
+        :param tags: optional keyword arguments stored with the record (e.g., size=10 ** 6)
+        """
+        self.name = name
+        self.n_items = n_items
+        self.unit = unit
+        self.tags = tags
+        self.record = None
+
+    def __enter__(self):
+        with lock:
+            self.nested = state["active_stages"] > 0
+            state["active_stages"] += 1
+        # nested stages must not reset the peak of the enclosing stage: they report the peak of the process
+        self.peak_reset = False if self.nested else reset_peak_rss()
+        self.gdal_cache = get_gdal_cache()
+        self.t_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_time = time.perf_counter() - self.t_start
+        with lock:
+            state["active_stages"] -= 1
+        gdal_cache = get_gdal_cache()
+        self.record = {"stage": self.name, "timestamp": time.time(), "wall_time_s": wall_time,
+                       "peak_rss_mb": get_peak_rss(), "peak_rss_scope": "stage" if self.peak_reset else "process",
+                       "unit": self.unit, "n_items": self.n_items,
+                       "items_per_s": self.n_items / wall_time if self.n_items and wall_time > 0 else None,
+                       "ok": exc_type is None}
+        if gdal_cache:
+            # GDAL does not expose block cache hit counts: report the cache use before and after the stage
+            self.record["gdal_cache_used_mb"] = gdal_cache["cache_used_mb"]
+            self.record["gdal_cache_max_mb"] = gdal_cache["cache_max_mb"]
+            self.record["gdal_cache_growth_mb"] = gdal_cache["cache_used_mb"] - (
+                self.gdal_cache["cache_used_mb"] if self.gdal_cache else 0.0)
+        self.record.update(self.tags)
+        emit(self.record)
+        return False
+
+
+def emit(record):
+    """
+    Keep a record and write it as one JSON line to the output (if profiling is enabled)
+    :param record: DICT of measurements
+    """
+    with lock:
+        state["records"].append(record)
+        output = state["output"]
+        if output is None:
+            return
+        line = json.dumps(record, default=str)
+        if output == "-":
+            print(line, file=sys.stderr)
+        else:
+            with open(output, "a") as f:
+                f.write(line + "\n")
+
+
+class NullStage:
+    """Stand-in for Stage while profiling is disabled"""
+    n_items = None
+    record = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def profile_stage(name, n_items=None, unit="items", force=False, **tags):
+    """
+    Context manager that records wall time, peak RSS, GDAL cache use, and throughput of a code block, e.g.:
+        with profile_stage("rasterize", unit="cells") as stage:
+            ...
+            stage.n_items = n_cells
+    :param name: STR of the stage name
+    :param n_items: INT of processed items (default: None)
+    :param unit: STR of the n_items unit (default: "items")
+    :param force: BOOL to measure even if profiling is disabled (the record is kept but not written)
+    :param tags: optional keyword arguments stored with the record
+    :output: Stage or NullStage (if profiling is disabled)
+    """
+    if not (force or is_enabled()):
+        return NullStage()
+    return Stage(name, n_items=n_items, unit=unit, **tags)
+
+
+def profiled(name=None, n_items=None, unit="items"):
+    """
+    Decorator that profiles every call of a function while profiling is enabled (no overhead otherwise)
+    :param name: STR of the stage name (default: None uses the qualified function name)
+    :param n_items: callable(result, *args, **kwargs) that returns the processed items or INT (default: None)
+    :param unit: STR of the n_items unit (default: "items")
+    """
+    def decorator(func):
+        stage_name = name or "%s.%s" % (func.__module__, func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            with Stage(stage_name, unit=unit) as stage:
+                result = func(*args, **kwargs)
+                stage.n_items = n_items(result, *args, **kwargs) if callable(n_items) else n_items
+            return result
+        return wrapper
+    return decorator
+
+
+def get_records(stage=None):
+    """
+    :param stage: STR of a stage name to filter (default: None returns all records)
+    :output: LIST of DICTs of the latest MAX_RECORDS records of this process
+    """
+    return [record for record in state["records"] if stage is None or record["stage"] == stage]
+
+
+def compare(records, baseline_file, tolerance=0.2):
+    """
+    Compare the wall times of records with the latest baseline records of the same stage and tags
+    :param records: LIST of DICTs of records
+    :param baseline_file: STR of a JSON lines file of earlier records
+    :param tolerance: FLOAT of the relative slowdown that counts as a regression (default: 0.2)
+    :output: LIST of (stage, baseline wall time, wall time) TUPLEs of regressions
+    """
+    def key(record):
+        return json.dumps({k: v for k, v in record.items() if k not in measured_keys}, sort_keys=True, default=str)
+
+    measured_keys = {"timestamp", "wall_time_s", "peak_rss_mb", "peak_rss_scope", "items_per_s", "ok",
+                     "gdal_cache_used_mb", "gdal_cache_max_mb", "gdal_cache_growth_mb", "n_items"}
+    baseline = {}
+    with open(baseline_file) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                baseline[key(record)] = record
+    regressions = []
+    for record in records:
+        reference = baseline.get(key(record))
+        if reference and record["wall_time_s"] > (1 + tolerance) * reference["wall_time_s"]:
+            regressions.append((record["stage"], reference["wall_time_s"], record["wall_time_s"]))
+    return regressions
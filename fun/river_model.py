@@ -0,0 +1,375 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+from array import array
+import numpy as np
+
+try:
+    # optional incremental JSON parser (conda install -c conda-forge ijson)
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:
+    ijson = None
+
+# default snapshot directory (shared with fun.table_cache)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", ".cache")
+
+# GEOMETRY entries with node lists and results that are stored in NumPy arrays instead of Python objects
+node_lists = {"RIVER.GEOMETRY.FLOWBOUNDARIES": "boundary", "RIVER.GEOMETRY.REGIONS": "region"}
+RESULTS_PREFIX = "RIVER.RESULTS"
+
+
+def to_csr(entries):
+    """
+    :param entries: LIST of array-like node ids per entry (e.g., per boundary)
+    :output: ndarray (INT64) of offsets (length n_entries + 1) and ndarray (INT64) of concatenated node ids
+    """
+    offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(nodes) for nodes in entries])
+    if offsets[-1] == 0:
+        return offsets, np.empty(0, dtype=np.int64)
+    return offsets, np.concatenate([np.asarray(nodes, dtype=np.int64) for nodes in entries])
+
+
+def invert_csr(offsets, nodes, n_nodes):
+    """
+    Build the node-to-entry index (e.g., the boundaries or regions of each node) of a CSR entry-to-node index
+    :param offsets: ndarray (INT64) of entry offsets
+    :param nodes: ndarray (INT64) of concatenated node ids
+    :param n_nodes: INT of the node id range (max. node id + 1)
+    :output: ndarray (INT64) of node offsets (length n_nodes + 1) and ndarray (INT64) of entry ids
+    """
+    entries = np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+    order = np.argsort(nodes, kind="stable")
+    node_offsets = np.zeros(n_nodes + 1, dtype=np.int64)
+    node_offsets[1:] = np.cumsum(np.bincount(nodes, minlength=n_nodes))
+    return node_offsets, entries[order]
+
+
+class RiverModel:
+    __slots__ = ("metadata", "boundary_names", "region_names", "arrays", "boundary_ids", "region_ids")
+
+    def __init__(self, metadata, arrays):
+        """
+        Indexed river model of river_struct.json / river_results.json files, where node lists and results are
+        NumPy arrays (in memory or memory-mapped from a snapshot) and the rest is a nested DICT
+        :param metadata: DICT of the JSON file without node lists and result values
+        :param arrays: DICT of {STR: ndarray} with boundary_offsets, boundary_nodes, node_boundary_offsets,
+                       node_boundaries, region_offsets, region_nodes, node_region_offsets, node_regions,
+                       and results/<name> entries
+        """
+        self.metadata = metadata
+        self.arrays = arrays
+        geometry = metadata.get("RIVER", {}).get("GEOMETRY", {})
+        self.boundary_names = [b.get("name") for b in geometry.get("FLOWBOUNDARIES", [])]
+        self.region_names = [r.get("name") for r in geometry.get("REGIONS", [])]
+        self.boundary_ids = {name: i for i, name in enumerate(self.boundary_names)}
+        self.region_ids = {name: i for i, name in enumerate(self.region_names)}
+
+    @classmethod
+    def from_node_lists(cls, metadata, boundary_nodes, region_nodes, results):
+        """
+        :param metadata: DICT of the JSON file without node lists and result values
+        :param boundary_nodes: LIST of array-like node ids per FLOWBOUNDARIES entry
+        :param region_nodes: LIST of array-like node ids per REGIONS entry (empty for regions without nodes)
+        :param results: DICT of {result name: ndarray}
+        :output: RiverModel
+        """
+        arrays = {}
+        b_offsets, b_nodes = to_csr(boundary_nodes)
+        r_offsets, r_nodes = to_csr(region_nodes)
+        n_nodes = int(max(b_nodes.max(initial=-1), r_nodes.max(initial=-1))) + 1
+        arrays["boundary_offsets"], arrays["boundary_nodes"] = b_offsets, b_nodes
+        arrays["region_offsets"], arrays["region_nodes"] = r_offsets, r_nodes
+        arrays["node_boundary_offsets"], arrays["node_boundaries"] = invert_csr(b_offsets, b_nodes, n_nodes)
+        arrays["node_region_offsets"], arrays["node_regions"] = invert_csr(r_offsets, r_nodes, n_nodes)
+        for name, values in results.items():
+            arrays["results/" + name] = values
+        return cls(metadata, arrays)
+
+    @property
+    def name(self):
+        return self.metadata.get("RIVER", {}).get("NAME")
+
+    @property
+    def results(self):
+        """
+        :output: DICT of {result name (e.g., water_depth): ndarray}
+        """
+        return {key.split("/", 1)[1]: values for key, values in self.arrays.items() if key.startswith("results/")}
+
+    def boundary_nodes(self, boundary):
+        """
+        :param boundary: STR of a FLOWBOUNDARIES name (e.g., "Inflow") or INT of its position
+        :output: ndarray (INT64) view of the node ids of the boundary
+        """
+        i = self.boundary_ids[boundary] if isinstance(boundary, str) else boundary
+        offsets = self.arrays["boundary_offsets"]
+        return self.arrays["boundary_nodes"][offsets[i]:offsets[i + 1]]
+
+    def region_nodes(self, region):
+        """
+        :param region: STR of a REGIONS name (e.g., "riverbed") or INT of its position
+        :output: ndarray (INT64) view of the node ids of the region (empty if the region has no node list)
+        """
+        i = self.region_ids[region] if isinstance(region, str) else region
+        offsets = self.arrays["region_offsets"]
+        return self.arrays["region_nodes"][offsets[i]:offsets[i + 1]]
+
+    def lookup(self, node, kind="boundary"):
+        """
+        :param node: INT of a node id
+        :param kind: STR of "boundary" or "region" (default: "boundary")
+        :output: LIST of the names of the boundaries or regions that contain the node
+        """
+        offsets = self.arrays["node_%s_offsets" % kind]
+        if not 0 <= node < len(offsets) - 1:
+            return []
+        entries = self.arrays["node_boundaries" if kind == "boundary" else "node_regions"]
+        names = self.boundary_names if kind == "boundary" else self.region_names
+        return [names[i] for i in entries[offsets[node]:offsets[node + 1]]]
+
+    def node_boundaries(self, node):
+        return self.lookup(node, kind="boundary")
+
+    def node_regions(self, node):
+        return self.lookup(node, kind="region")
+
+    def boundary_condition(self, boundary):
+        """
+        :param boundary: STR of a FLOWBOUNDARIES name
+        :output: DICT of the HYDRAULICS BOUNDARY entry with the same name or None
+        """
+        for condition in self.metadata.get("RIVER", {}).get("HYDRAULICS", {}).get("BOUNDARY", []):
+            if condition.get("name") == boundary:
+                return condition
+        return None
+
+
+def parse_stream(json_file):
+    """
+    Parse a river JSON file incrementally with ijson, where node lists and result values go directly into
+    typed arrays (never into Python lists of objects)
+    :param json_file: STR of a JSON file name, including directory
+    :output: RiverModel
+    """
+    builder = ObjectBuilder()
+    entries = {kind: [] for kind in node_lists.values()}
+    results = {}
+    shapes = {}
+    # append method of the node or result array that receives the numbers until the array at list_prefix ends
+    append = None
+    list_prefix = None
+    with open(json_file, "rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if append is not None:
+                if event == "number":
+                    append(value)
+                    continue
+                if prefix == list_prefix:
+                    # end of the node list or result grid (the builder keeps an empty list)
+                    append = None
+                elif event == "start_array":
+                    # row of a result grid: RIVER.RESULTS.<name>.item
+                    shapes[list_prefix] += 1
+                    continue
+                else:
+                    continue
+            elif event == "start_map" and prefix.endswith(".item") and prefix[:-len(".item")] in node_lists:
+                # one node array per boundary or region (empty if the entry has no nodes key); float storage accepts
+                # float-encoded node ids (e.g., 3.0) and to_csr casts to INT64 like parse_json
+                entries[node_lists[prefix[:-len(".item")]]].append(array("d"))
+            elif event == "start_array" and prefix.endswith(".item.nodes") and \
+                    prefix[:-len(".item.nodes")] in node_lists:
+                append = entries[node_lists[prefix[:-len(".item.nodes")]]][-1].append
+                list_prefix = prefix
+            elif event == "start_array" and prefix.startswith(RESULTS_PREFIX + ".") and prefix.count(".") == 2:
+                results[prefix] = array("d")
+                shapes[prefix] = 0
+                append = results[prefix].append
+                list_prefix = prefix
+            builder.event(event, value)
+
+    arrays = {}
+    for prefix, values in results.items():
+        values = np.frombuffer(values, dtype=np.float64)
+        rows = shapes[prefix]
+        arrays[prefix.split(".")[2]] = values.reshape(rows, -1) if rows and values.size % rows == 0 else values
+    return RiverModel.from_node_lists(builder.value, entries["boundary"], entries["region"], arrays)
+
+
+def parse_json(json_file):
+    """
+    Parse a river JSON file with json.load (fallback if ijson is not installed)
+    :param json_file: STR of a JSON file name, including directory
+    :output: RiverModel
+    """
+    with open(json_file) as f:
+        data = json.load(f)
+    geometry = data.get("RIVER", {}).get("GEOMETRY", {})
+    entries = {}
+    for prefix, kind in node_lists.items():
+        entries[kind] = []
+        for entry in geometry.get(prefix.split(".")[-1], []):
+            entries[kind].append(entry.get("nodes", []))
+            if "nodes" in entry:
+                entry["nodes"] = []
+    results = {}
+    for name, values in data.get("RIVER", {}).get("RESULTS", {}).items():
+        if isinstance(values, list):
+            results[name] = np.asarray(values, dtype=np.float64)
+            data["RIVER"]["RESULTS"][name] = []
+    return RiverModel.from_node_lists(data, entries["boundary"], entries["region"], results)
+
+
+def get_snapshot_dir(json_file, cache_dir=CACHE_DIR):
+    """
+    :param json_file: STR of a JSON file name, including directory
+    :param cache_dir: STR of the cache directory (default: CACHE_DIR)
+    :output: STR of the snapshot directory of the current file version (keyed by path and mtime)
+    """
+    source_key = hashlib.sha1(os.path.abspath(json_file).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, "river-%s-%i" % (source_key, os.stat(json_file).st_mtime_ns))
+
+
+def save_snapshot(model, snapshot_dir):
+    """
+    Save a model as one .npy file per array and a metadata.json file
+    :param model: RiverModel
+    :param snapshot_dir: STR of the target directory (replaced atomically)
+    """
+    tmp_dir = "%s.%i.tmp" % (snapshot_dir, os.getpid())
+    os.makedirs(tmp_dir, exist_ok=True)
+    names = {}
+    for i, (key, values) in enumerate(model.arrays.items()):
+        names[key] = "%03i.npy" % i
+        np.save(os.path.join(tmp_dir, names[key]), np.ascontiguousarray(values))
+    with open(os.path.join(tmp_dir, "metadata.json"), "w") as f:
+        json.dump({"metadata": model.metadata, "arrays": names}, f)
+    try:
+        os.replace(tmp_dir, snapshot_dir)
+    except OSError:
+        # another process wrote the same snapshot first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_snapshot(snapshot_dir):
+    """
+    :param snapshot_dir: STR of a snapshot directory (see save_snapshot)
+    :output: RiverModel with memory-mapped (read-only) arrays
+    """
+    with open(os.path.join(snapshot_dir, "metadata.json")) as f:
+        snapshot = json.load(f)
+    arrays = {key: np.load(os.path.join(snapshot_dir, name), mmap_mode="r")
+              for key, name in snapshot["arrays"].items()}
+    return RiverModel(snapshot["metadata"], arrays)
+
+
+def evict_stale(snapshot_dir):
+    """
+    Remove snapshots of the same source file that were written for another mtime
+    :param snapshot_dir: STR of the up-to-date snapshot directory
+    """
+    prefix = snapshot_dir.rsplit("-", 1)[0]
+    for stale_dir in glob.glob(prefix + "-*"):
+        if stale_dir != snapshot_dir and not stale_dir.endswith(".tmp"):
+            shutil.rmtree(stale_dir, ignore_errors=True)
+
+
+def load_river(json_file, use_snapshot=True, streaming=True, cache_dir=CACHE_DIR):
+    """
+    Load river_struct.json / river_results.json type files into an indexed RiverModel
+    :param json_file: STR of a JSON file name, including directory (e.g., data/river_results.json)
+    :param use_snapshot: BOOL to memory-map a binary snapshot of an earlier load or to write one (default: True)
+    :param streaming: BOOL to parse with ijson if installed (default: True); otherwise json.load is used
+    :param cache_dir: STR of the snapshot directory (default: CACHE_DIR)
+    :output: RiverModel
+    """
+    snapshot_dir = get_snapshot_dir(json_file, cache_dir) if use_snapshot else None
+    if snapshot_dir and os.path.isfile(os.path.join(snapshot_dir, "metadata.json")):
+        try:
+            return load_snapshot(snapshot_dir)
+        except (OSError, ValueError, KeyError):
+            print("WARNING: Could not read snapshot %s (re-parsing %s)." % (snapshot_dir, json_file))
+    if streaming and ijson is not None:
+        model = parse_stream(json_file)
+    else:
+        model = parse_json(json_file)
+    if snapshot_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        save_snapshot(model, snapshot_dir)
+        evict_stale(snapshot_dir)
+    return model
+
+
+def write_synthetic_river(json_file, n_boundaries=200, nodes_per_boundary=20000, n_regions=50,
+                          nodes_per_region=100000, grid_size=1000, seed=0):
+    """
+    Write a large river_results.json-like file for the benchmark
+    :output: None
+    """
+    rng = np.random.default_rng(seed)
+    n_nodes = n_regions * nodes_per_region
+    data = {"RIVER": {
+        "NAME": "Synthetic river",
+        "GEOMETRY": {
+            "REGIONS": [{"type": "wet" if i % 2 else "dry", "name": "region%i" % i,
+                         "nodes": rng.integers(0, n_nodes, nodes_per_region).tolist()} for i in range(n_regions)],
+            "FLOWBOUNDARIES": [{"name": "boundary%i" % i,
+                                "nodes": rng.integers(0, n_nodes, nodes_per_boundary).tolist()}
+                               for i in range(n_boundaries)]},
+        "HYDRAULICS": {"BOUNDARY": [{"name": "boundary%i" % i, "type": "zero_gradient"}
+                                    for i in range(n_boundaries)]},
+        "RESULTS": {"water_depth": rng.random((grid_size, grid_size)).round(6).tolist(),
+                    "flow_velocity": rng.random((grid_size, grid_size)).round(6).tolist()}}}
+    with open(json_file, "w") as f:
+        json.dump(data, f)
+
+
+if __name__ == "__main__":
+    # benchmark: json.load with nested searches versus streaming, snapshot reloads, and CSR lookups
+    import tempfile
+    import time
+    model = load_river(os.path.join(os.path.dirname(CACHE_DIR), "river_results.json"), use_snapshot=False)
+    print("%s: Inflow nodes %s, node 7 in %s, water_depth %s" % (
+        model.name, model.boundary_nodes("Inflow").tolist(), model.node_boundaries(7),
+        model.results["water_depth"].shape))
+
+    tmp_dir = tempfile.mkdtemp()
+    json_file = os.path.join(tmp_dir, "river_large.json")
+    write_synthetic_river(json_file)
+    print("synthetic river: %.0f MB" % (os.path.getsize(json_file) / 1e6))
+    nodes = np.random.default_rng(1).integers(0, 5000000, 1000)
+
+    t_start = time.perf_counter()
+    with open(json_file) as f:
+        data = json.load(f)
+    t_load = time.perf_counter() - t_start
+    t_start = time.perf_counter()
+    for node in nodes[:20]:
+        [b["name"] for b in data["RIVER"]["GEOMETRY"]["FLOWBOUNDARIES"] if node in b["nodes"]]
+    t_search = (time.perf_counter() - t_start) / 20
+    print("json.load %.2f s, nested search %.2f ms per node" % (t_load, 1000 * t_search))
+    data = None
+
+    for label, streaming in (("ijson", True), ("json.load + index", False)):
+        if streaming and ijson is None:
+            print("ijson is not installed (skipped)")
+            continue
+        t_start = time.perf_counter()
+        model = load_river(json_file, use_snapshot=False, streaming=streaming)
+        print("%-18s %.2f s" % (label, time.perf_counter() - t_start))
+
+    load_river(json_file, cache_dir=tmp_dir)
+    t_start = time.perf_counter()
+    model = load_river(json_file, cache_dir=tmp_dir)
+    t_snapshot = time.perf_counter() - t_start
+    t_start = time.perf_counter()
+    for node in nodes:
+        model.node_boundaries(node)
+        model.node_regions(node)
+    t_lookup = (time.perf_counter() - t_start) / len(nodes)
+    print("snapshot reload %.1f ms, CSR lookup %.1f us per node" % (1000 * t_snapshot, 1e6 * t_lookup))
+    shutil.rmtree(tmp_dir, ignore_errors=True)
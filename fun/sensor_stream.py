@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    def __init__(self, columns):
+        """
+        Running count, mean, variance (Chan/Welford merge), min, and max per column
+        :param columns: LIST of column names
+        """
+        self.columns = list(columns)
+        n_cols = len(self.columns)
+        self.count = np.zeros(n_cols)
+        self.mean = np.zeros(n_cols)
+        self.m2 = np.zeros(n_cols)
+        self.min = np.full(n_cols, np.inf)
+        self.max = np.full(n_cols, -np.inf)
+
+    def update(self, block):
+        """
+        :param block: 2d ndarray (FLOAT) with one column per entry in self.columns; np.nan is ignored
+        """
+        valid = ~np.isnan(block)
+        count = valid.sum(axis=0)
+        has_data = count > 0
+        if not has_data.any():
+            return
+        block_sum = np.where(valid, block, 0.0).sum(axis=0)
+        block_mean = np.divide(block_sum, count, out=np.zeros_like(block_sum), where=has_data)
+        block_m2 = (np.where(valid, block - block_mean, 0.0) ** 2).sum(axis=0)
+
+        # merge block moments into the running moments
+        total = self.count + count
+        delta = block_mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(has_data, self.mean + delta * count / total, self.mean)
+            self.m2 = np.where(has_data, self.m2 + block_m2 + delta ** 2 * self.count * count / total, self.m2)
+        self.count = total
+        self.min = np.fmin(self.min, np.nanmin(np.where(valid, block, np.inf), axis=0))
+        self.max = np.fmax(self.max, np.nanmax(np.where(valid, block, -np.inf), axis=0))
+
+    def std(self, ddof=1):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self.m2 / (self.count - ddof))
+
+    def to_frame(self):
+        """
+        :output: pandas.DataFrame with count, mean, std, min, and max per column
+        """
+        return pd.DataFrame({"count": self.count, "mean": self.mean, "std": self.std(),
+                             "min": self.min, "max": self.max}, index=self.columns)
+
+
+class QuantileSketch:
+    def __init__(self, max_centroids=200):
+        """
+        Mergeable quantile sketch of bounded size (t-digest-like centroids with finer resolution at the tails)
+        :param max_centroids: INT of the maximum number of centroids kept (default: 200)
+        """
+        self.max_centroids = max_centroids
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values):
+        """
+        :param values: 1d ndarray (FLOAT); np.nan is ignored
+        """
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        means = np.concatenate((self.means, values))
+        weights = np.concatenate((self.weights, np.ones(values.size)))
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        # assign centroids to bins of the arcsine scale function and merge centroids within bins
+        cum_weight = np.cumsum(weights)
+        q_mid = (cum_weight - weights / 2) / cum_weight[-1]
+        k = np.floor(self.max_centroids * (np.arcsin(2 * q_mid - 1) / np.pi + 0.5))
+        starts = np.flatnonzero(np.r_[True, np.diff(k) != 0])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        """
+        :param q: FLOAT or LIST of quantiles in [0, 1]
+        :output: FLOAT or ndarray of the approximated quantile values
+        """
+        if self.weights.size == 0:
+            return np.full(np.shape(q), np.nan)
+        cum_weight = np.cumsum(self.weights)
+        q_mid = (cum_weight - self.weights / 2) / cum_weight[-1]
+        return np.interp(q, q_mid, self.means)
+
+
+def get_csv_columns(csv_file):
+    """
+    :param csv_file: STR of a csv file name, including directory
+    :output: LIST of column names in the header of csv_file
+    """
+    return list(pd.read_csv(csv_file, nrows=0).columns)
+
+
+def stream_sensor_stats(csv_file, chunksize=100000, quantiles=(0.05, 0.5, 0.95), max_centroids=200):
+    """
+    Statistics of logger exports shaped like FlowDepth009.csv (Time (s), Sensor 1 (m), ...) in constant memory
+    :param csv_file: STR of a csv file name, including directory
+    :param chunksize: INT of rows per chunk (default: 100000)
+    :param quantiles: TUPLE of approximated quantiles to derive (default: (0.05, 0.5, 0.95))
+    :param max_centroids: INT of the quantile sketch size per sensor (default: 200)
+    :output: pandas.DataFrame with count, mean, std, min, max, and quantiles per sensor (rows)
+    """
+    columns = get_csv_columns(csv_file)
+    sensors = columns[1:]
+    stats = RunningStats(sensors)
+    sketches = [QuantileSketch(max_centroids) for s in sensors]
+
+    for chunk in pd.read_csv(csv_file, chunksize=chunksize, usecols=sensors,
+                             dtype={s: np.float64 for s in sensors}):
+        block = chunk[sensors].to_numpy()
+        stats.update(block)
+        for i, sketch in enumerate(sketches):
+            sketch.update(block[:, i])
+
+    result = stats.to_frame()
+    for q in quantiles:
+        result["q%g" % (q * 100)] = [sketch.quantile(q) for sketch in sketches]
+    return result
+
+
+def merge_group_moments(left, right):
+    """
+    Merge per-group moments with the Chan/Welford formulas of RunningStats.update
+    :param left: pandas.DataFrame with count, mean, m2 (sum of squared deviations), min, and max per group
+    :param right: pandas.DataFrame with the same columns (groups may differ from left)
+    :output: pandas.DataFrame with the merged moments of the union of the groups
+    """
+    index = left.index.union(right.index)
+    left = left.reindex(index)
+    right = right.reindex(index)
+    count_l = left["count"].fillna(0.0)
+    count_r = right["count"].fillna(0.0)
+    mean_l = left["mean"].fillna(0.0)
+    mean_r = right["mean"].fillna(0.0)
+    total = count_l + count_r
+    delta = mean_r - mean_l
+    has_data = count_r > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = mean_l.where(~has_data, mean_l + delta * count_r / total)
+        m2 = left["m2"].fillna(0.0) + right["m2"].fillna(0.0)
+        m2 = m2.where(~has_data, m2 + delta ** 2 * count_l * count_r / total)
+    return pd.DataFrame({"count": total, "mean": mean.where(total > 0), "m2": m2,
+                         "min": np.fmin(left["min"], right["min"]), "max": np.fmax(left["max"], right["max"])},
+                        index=index)
+
+
+def chunk_group_moments(chunk, group_columns, value_column):
+    """
+    :param chunk: pandas.DataFrame of one csv chunk
+    :param group_columns: LIST of columns to group by
+    :param value_column: STR of the column to aggregate
+    :output: pandas.DataFrame with count, mean, m2, min, and max per group (see merge_group_moments)
+    """
+    grouped = chunk.groupby(group_columns)[value_column]
+    # sum of squared deviations from the chunk mean of each group (no cancellation of large sums of squares)
+    chunk["squared_deviation"] = (chunk[value_column] - grouped.transform("mean")) ** 2
+    return pd.DataFrame({"count": grouped.count().astype(np.float64), "mean": grouped.mean(),
+                         "m2": chunk.groupby(group_columns)["squared_deviation"].sum(),
+                         "min": grouped.min(), "max": grouped.max()})
+
+
+def stream_group_stats(csv_file, group_columns=("Area", "Months"), value_column="Value", chunksize=100000):
+    """
+    Grouped statistics of files shaped like temperature_change.csv (Area, Months, Year, Value) in constant memory
+    :param csv_file: STR of a csv file name, including directory
+    :param group_columns: TUPLE of columns to group by (default: ("Area", "Months"))
+    :param value_column: STR of the column to aggregate (default: "Value")
+    :param chunksize: INT of rows per chunk (default: 100000)
+    :output: pandas.DataFrame with count, mean, std, min, and max per group
+    """
+    group_columns = list(group_columns)
+    dtypes = {c: str for c in group_columns}
+    dtypes[value_column] = np.float64
+    partials = None
+
+    for chunk in pd.read_csv(csv_file, chunksize=chunksize, usecols=group_columns + [value_column], dtype=dtypes):
+        part = chunk_group_moments(chunk, group_columns, value_column)
+        partials = part if partials is None else merge_group_moments(partials, part)
+    if partials is None:
+        # no chunks (e.g., a header-only file): empty frame with the same columns and index levels
+        empty = pd.DataFrame({c: pd.Series(dtype=dtype) for c, dtype in dtypes.items()})
+        partials = chunk_group_moments(empty, group_columns, value_column)
+
+    result = pd.DataFrame({"count": partials["count"].astype(np.int64), "mean": partials["mean"]},
+                          index=partials.index)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["std"] = np.sqrt(partials["m2"] / (partials["count"] - 1))
+    result["min"] = partials["min"]
+    result["max"] = partials["max"]
+    return result
+
+
+if __name__ == "__main__":
+    # benchmark: peak memory of stream_sensor_stats remains constant as the file size grows
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+
+    header = "Time (s),Sensor 1 (m),Sensor 2 (m),Sensor 3 (m),Sensor 4 (m),Sensor 5 (m)\n"
+    for n_rows in (10 ** 5, 10 ** 6, 4 * 10 ** 6):
+        csv_file = os.path.join(tempfile.gettempdir(), "sensor_stream_%i.csv" % n_rows)
+        with open(csv_file, "w") as f:
+            f.write(header)
+            for start in range(0, n_rows, 10 ** 5):
+                rows = min(10 ** 5, n_rows - start)
+                data = np.column_stack((np.arange(start, start + rows), np.random.rand(rows, 5) * 0.3))
+                np.savetxt(f, data, delimiter=",", fmt="%.9g")
+        tracemalloc.start()
+        t_start = time.perf_counter()
+        stream_sensor_stats(csv_file)
+        elapsed = time.perf_counter() - t_start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("%9i rows (%7.1f MB): %6.2f s, peak memory %6.1f MB" % (
+            n_rows, os.path.getsize(csv_file) / 1e6, elapsed, peak / 1e6))
+        os.remove(csv_file)
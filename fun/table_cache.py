@@ -0,0 +1,159 @@
+import glob
+import hashlib
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+# default cache directory (next to the data directory of the course)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", ".cache")
+
+# Feather schema metadata key of the index columns and names of cached tables
+INDEX_METADATA_KEY = b"table_cache.index"
+
+
+def get_cache_prefix(source_file, sheet_name, cache_dir=CACHE_DIR):
+    """
+    :param source_file: STR of a workbook or csv file name, including directory
+    :param sheet_name: STR of a workbook sheet name (use "csv" for csv files)
+    :param cache_dir: STR of the cache directory (default: CACHE_DIR)
+    :output: STR of the cache file name without the mtime suffix
+    """
+    source_key = hashlib.sha1(os.path.abspath(source_file).encode("utf-8")).hexdigest()[:16]
+    sheet_key = hashlib.sha1(str(sheet_name).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(cache_dir, "%s-%s-" % (source_key, sheet_key))
+
+
+def evict_stale(prefix, current_file):
+    """
+    Remove cache entries of the same source and sheet that were written for another source mtime
+    :param prefix: STR of a cache file prefix (see get_cache_prefix)
+    :param current_file: STR of the up-to-date cache file name
+    """
+    for cache_file in glob.glob(prefix + "*.feather"):
+        if cache_file != current_file:
+            try:
+                os.remove(cache_file)
+            except OSError:
+                print("WARNING: Could not remove stale cache file %s." % cache_file)
+
+
+def frame2table(df):
+    """
+    Convert a table to Arrow, where a non-default index becomes __index_level_<i>__ columns and the index names
+    are stored in the schema metadata (see table2frame)
+    :param df: pandas.DataFrame with STR column names
+    :output: pyarrow.Table
+    """
+    if df.index.name is None and df.index.equals(pd.RangeIndex(len(df))):
+        return pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    index_columns = ["__index_level_%i__" % i for i in range(df.index.nlevels)]
+    flat = df.rename_axis(index_columns).reset_index()
+    table = pa.Table.from_pandas(flat, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[INDEX_METADATA_KEY] = json.dumps({"columns": index_columns, "names": list(df.index.names)},
+                                              default=str).encode("utf-8")
+    return table.replace_schema_metadata(metadata)
+
+
+def table2frame(table):
+    """
+    :param table: pyarrow.Table (see frame2table)
+    :output: pandas.DataFrame with the index of the cached table
+    """
+    df = table.to_pandas()
+    index_metadata = (table.schema.metadata or {}).get(INDEX_METADATA_KEY)
+    if index_metadata is None:
+        return df
+    index_metadata = json.loads(index_metadata.decode("utf-8"))
+    df = df.set_index(index_metadata["columns"])
+    df.index.names = index_metadata["names"]
+    return df
+
+
+def load_cached(source_file, sheet_name, reader, as_arrow=False, cache_dir=CACHE_DIR):
+    """
+    Load a table from an uncompressed Feather (Arrow IPC) cache or create the cache entry with reader
+    :param source_file: STR of a workbook or csv file name, including directory
+    :param sheet_name: STR of a workbook sheet name (use "csv" for csv files)
+    :param reader: callable that returns a pandas.DataFrame of source_file (called on cache misses only)
+    :param as_arrow: BOOL to return a memory-mapped pyarrow.Table instead of a pandas.DataFrame (default: False)
+    :param cache_dir: STR of the cache directory (default: CACHE_DIR)
+    :output: pandas.DataFrame (with the index of reader, also on cache hits) or pyarrow.Table (with
+             __index_level_<i>__ columns if reader returns a non-default index); tables that cannot be converted to
+             Arrow are returned as pandas.DataFrame also if as_arrow=True
+    """
+    prefix = get_cache_prefix(source_file, sheet_name, cache_dir)
+    cache_file = prefix + "%i.feather" % os.stat(source_file).st_mtime_ns
+
+    if not os.path.isfile(cache_file):
+        df = reader()
+        os.makedirs(cache_dir, exist_ok=True)
+        # column names must be strings in Feather files
+        df.columns = [str(c) for c in df.columns]
+        # write to a temporary file first to never leave a partial cache entry behind
+        tmp_file = cache_file + ".%i.tmp" % os.getpid()
+        try:
+            feather.write_feather(frame2table(df), tmp_file, compression="uncompressed")
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            # the table cannot be converted to Arrow (e.g., mixed object columns): return it uncached as pandas
+            print("WARNING: Cannot cache %s (%s)." % (str(source_file), str(e)))
+            if os.path.isfile(tmp_file):
+                os.remove(tmp_file)
+            return df
+        os.replace(tmp_file, cache_file)
+        evict_stale(prefix, cache_file)
+        if not as_arrow:
+            return df
+
+    # uncompressed Arrow files are memory-mapped without copying the column buffers
+    table = feather.read_table(cache_file, memory_map=True)
+    if as_arrow:
+        return table
+    return table2frame(table)
+
+
+def read_excel_cached(file_name, sheet_name=0, as_arrow=False, cache_dir=CACHE_DIR, **kwargs):
+    """
+    Cached version of pandas.read_excel for single sheets (the cache is keyed by path, mtime, and sheet name)
+    :param file_name: STR of a workbook file name, including directory
+    :param sheet_name: STR or INT of the sheet to read (default: 0)
+    :param as_arrow: BOOL to return a memory-mapped pyarrow.Table instead of a pandas.DataFrame (default: False)
+    :param cache_dir: STR of the cache directory (default: CACHE_DIR)
+    :param kwargs: optional keyword arguments passed to pandas.read_excel on cache misses (also part of the key)
+    :output: pandas.DataFrame or pyarrow.Table
+    """
+    sheet_key = "%s|%s" % (str(sheet_name), str(sorted(kwargs.items())))
+    return load_cached(file_name, sheet_key, lambda: pd.read_excel(file_name, sheet_name=sheet_name, **kwargs),
+                       as_arrow=as_arrow, cache_dir=cache_dir)
+
+
+def read_csv_cached(file_name, as_arrow=False, cache_dir=CACHE_DIR, **kwargs):
+    """
+    Cached version of pandas.read_csv (the cache is keyed by path and mtime)
+    :param file_name: STR of a csv file name, including directory
+    :param as_arrow: BOOL to return a memory-mapped pyarrow.Table instead of a pandas.DataFrame (default: False)
+    :param cache_dir: STR of the cache directory (default: CACHE_DIR)
+    :param kwargs: optional keyword arguments passed to pandas.read_csv on cache misses (also part of the key)
+    :output: pandas.DataFrame or pyarrow.Table
+    """
+    csv_key = "csv|%s" % str(sorted(kwargs.items()))
+    return load_cached(file_name, csv_key, lambda: pd.read_csv(file_name, **kwargs),
+                       as_arrow=as_arrow, cache_dir=cache_dir)
+
+
+if __name__ == "__main__":
+    # benchmark: workbook parsing versus cached reads
+    import time
+    workbook = os.path.join(os.path.dirname(CACHE_DIR), "example_flow_gauge.xlsx")
+    for sheet in pd.ExcelFile(workbook).sheet_names:
+        t_start = time.perf_counter()
+        pd.read_excel(workbook, sheet_name=sheet)
+        t_excel = time.perf_counter() - t_start
+        read_excel_cached(workbook, sheet_name=sheet)
+        t_start = time.perf_counter()
+        read_excel_cached(workbook, sheet_name=sheet)
+        t_cached = time.perf_counter() - t_start
+        print("%-20s read_excel %8.2f ms, cached %6.2f ms" % (sheet, t_excel * 1000, t_cached * 1000))
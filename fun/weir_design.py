@@ -0,0 +1,378 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+G = 9.81  # m/s2
+
+# fixed design inputs of rechenbeispiel-staustufendurchbildung (any of them can be swept, see sweep)
+design_defaults = {"n": 5,             # number of weir fields
+                   "b_F": 10.0,        # m field width
+                   "BHQ1": 220.0,      # m3/s design flood 1
+                   "BHQ2": 280.0,      # m3/s design flood 2 (control case)
+                   "h_ue_zul": 1.0,    # m admissible overflow height at BHQ1
+                   "f": 1.0,           # m freeboard
+                   "mu": 0.5,          # Poleni discharge coefficient
+                   "c": 1.0,           # reduction coefficient (imperfect overflow)
+                   "xi_pf": 0.10,      # pier contraction coefficient
+                   "pier_ratio": 0.225,  # pier width per field width
+                   "w_wehr": 5.0,      # m weir height above tailwater bed
+                   "k_st": 32.0,       # m^(1/3)/s Strickler coefficient of the tailwater reach
+                   "I_E": 4e-4,        # tailwater bed slope
+                   "b_u": 150.0}       # m tailwater width (rectangular profile)
+
+# objectives to minimize for the Pareto set: structure width, stilling basin depth, stilling basin length
+pareto_objectives = ("b_gesamt", "e_opt", "l_T")
+
+
+def c_pol(mu, g=G):
+    """
+    :param mu: FLOAT or ndarray of the Poleni discharge coefficient
+    :output: combined Poleni coefficient without b and h_ue
+    """
+    return (2 / 3) * mu * np.sqrt(2 * g)
+
+
+def b_eff_von_Q(Q, h_ue, mu, c_abd=1.0):
+    """
+    Required effective weir width for a discharge (all arguments broadcast)
+    """
+    return Q / (c_abd * c_pol(mu) * h_ue ** 1.5)
+
+
+def h_ue_von_Q(Q, b_eff, mu, c_abd=1.0):
+    """
+    Overflow height for a discharge and an effective width (all arguments broadcast)
+    """
+    return (Q / (c_abd * c_pol(mu) * b_eff)) ** (2 / 3)
+
+
+def b_eff_n_felder(n_aktiv, h_ue, b_F, xi_pf):
+    """
+    Effective width of n_aktiv adjacent fields with pier contraction (all arguments broadcast)
+    """
+    return n_aktiv * (b_F - 2 * xi_pf * h_ue)
+
+
+def h_ue_n_felder(Q, n_aktiv, b_F, xi_pf, mu, c_abd=1.0, h_start=1.0, tol=1e-6, max_iter=50):
+    """
+    Fixed-point iteration of the overflow height with n_aktiv fields for all cases at once
+    :param Q: FLOAT or ndarray of discharges
+    :param n_aktiv: INT or ndarray of active fields
+    :param b_F: FLOAT or ndarray of field widths
+    :param xi_pf: FLOAT or ndarray of pier contraction coefficients
+    :param mu: FLOAT or ndarray of discharge coefficients
+    :param c_abd: FLOAT or ndarray of reduction coefficients (default: 1.0)
+    :param h_start: FLOAT or ndarray of start values (default: 1.0)
+    :param tol: FLOAT of the convergence tolerance (default: 1e-6)
+    :param max_iter: INT of the maximum number of iterations (default: 50)
+    :output: ndarray of overflow heights and ndarray of effective widths
+    """
+    shape = np.broadcast(Q, n_aktiv, b_F, xi_pf, mu, c_abd, h_start).shape
+    h_ue = np.broadcast_to(np.asarray(h_start, dtype=float), shape).copy()
+    for _ in range(max_iter):
+        b_eff = b_eff_n_felder(n_aktiv, h_ue, b_F, xi_pf)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            h_ue_new = h_ue_von_Q(Q, b_eff, mu, c_abd)
+        converged = np.abs(h_ue_new - h_ue) < tol
+        h_ue = h_ue_new
+        if np.all(converged | np.isnan(h_ue)):
+            break
+    return h_ue, b_eff_n_felder(n_aktiv, h_ue, b_F, xi_pf)
+
+
+def bracketed_root(func, lower, upper, xtol=1e-12, max_iter=100):
+    """
+    Find roots of func for all elements at once in brackets [lower, upper] (Illinois regula falsi, replaces
+    per-case scipy.optimize.brentq)
+    :param func: callable(ndarray) returning an ndarray of the same shape (evaluated element-wise)
+    :param lower: FLOAT or ndarray of lower bracket limits
+    :param upper: FLOAT or ndarray of upper bracket limits
+    :param xtol: FLOAT of the relative tolerance (default: 1e-12)
+    :param max_iter: INT of the maximum number of iterations (default: 100)
+    :output: ndarray of roots (np.nan where func has no sign change in the bracket)
+    """
+    a, b = np.broadcast_arrays(np.asarray(lower, dtype=float), np.asarray(upper, dtype=float))
+    a = a.copy()
+    b = b.copy()
+    fa = func(a)
+    fb = func(b)
+    no_root = np.sign(fa) == np.sign(fb)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            done = no_root | (fb == 0) | (np.abs(b - a) <= xtol * (1 + np.abs(b)))
+            if np.all(done):
+                break
+            x = np.where(done, b, b - fb * (b - a) / (fb - fa))
+            fx = func(x)
+            # keep the bracket: the old b becomes a if the sign changes, otherwise halve fa (Illinois)
+            sign_change = np.sign(fx) != np.sign(fb)
+            a = np.where(done, a, np.where(sign_change, b, a))
+            fa = np.where(done, fa, np.where(sign_change, fb, fa / 2))
+            b = np.where(done, b, x)
+            fb = np.where(done, fb, fx)
+    return np.where(no_root, np.nan, b)
+
+
+def Q_manning(h, b, k, I):
+    """
+    Manning-Strickler discharge of a rectangular profile (all arguments broadcast)
+    """
+    A = b * h
+    R = (b * h) / (b + 2 * h)
+    return k * A * R ** (2 / 3) * np.sqrt(I)
+
+
+def h_u_manning(Q, b_u, k_st, I_E, h_min=0.01, h_max=20.0):
+    """
+    :output: ndarray of tailwater depths with Q_manning(h_u) = Q
+    """
+    return bracketed_root(lambda h: Q_manning(h, b_u, k_st, I_E) - Q, h_min, h_max)
+
+
+def k_faktor(Fr1):
+    """
+    Stilling basin length factor as a function of the Froude number (Peterka 1984 / USBR)
+    :param Fr1: FLOAT or ndarray of Froude numbers
+    :output: ndarray of k factors
+    """
+    Fr1 = np.asarray(Fr1, dtype=float)
+    return np.select([Fr1 < 2.4, Fr1 < 4.0, Fr1 < 5.0, Fr1 < 6.0, Fr1 <= 11.0],
+                     [4.8, 4.8 + (Fr1 - 2.4) / (4.0 - 2.4) * (5.8 - 4.8), 5.8 + (Fr1 - 4.0) * (6.0 - 5.8), 6.0, 6.13],
+                     default=6.0)
+
+
+def tosbecken_check(e, q, h_u, h_ue_zul, w_wehr, g=G):
+    """
+    Steps A-G of the stilling basin workflow for basin depths e (all arguments broadcast)
+    :output: DICT of ndarrays with Fr1, eps, h1, h2, ok_Fr, and ok_eps
+    """
+    H_ges = h_ue_zul + w_wehr + e
+    h_krit = (q ** 2 / g) ** (1 / 3)
+    # supercritical (small) root of the Bernoulli equation below the critical depth
+    h1 = bracketed_root(lambda h: h + q ** 2 / (2 * g * h ** 2) - H_ges, 1e-4, h_krit)
+    Fr1 = (q / h1) / np.sqrt(g * h1)
+    h2 = (h1 / 2) * (np.sqrt(1 + 8 * Fr1 ** 2) - 1)
+    eps = (h_u + e) / h2
+    with np.errstate(invalid="ignore"):
+        return {"Fr1": Fr1, "eps": eps, "h1": h1, "h2": h2,
+                "ok_Fr": (4.5 <= Fr1) & (Fr1 < 9.0), "ok_eps": (1.05 <= eps) & (eps <= 1.15)}
+
+
+def optimize_eintiefung(q, h_u, h_ue_zul, w_wehr, e_start=2.0, e_min=0.0, e_max=3.0, n_iter=14):
+    """
+    Bisection of the stilling basin depth e for all cases at once (same strategy as the notebook)
+    :output: ndarray of optimized depths and DICT of tosbecken_check results at these depths
+    """
+    shape = np.broadcast(q, h_u, h_ue_zul, w_wehr).shape
+    e_test = np.full(shape, e_start, dtype=float)
+    e_lo = np.full(shape, e_min, dtype=float)
+    e_hi = np.full(shape, e_max, dtype=float)
+    done = np.zeros(shape, dtype=bool)
+    for _ in range(n_iter):
+        check = tosbecken_check(e_test, q, h_u, h_ue_zul, w_wehr)
+        done |= check["ok_Fr"] & check["ok_eps"]
+        if np.all(done):
+            break
+        # Fr1 < 4.5 or too much backwater (eps > 1.15): decrease e, otherwise increase e
+        with np.errstate(invalid="ignore"):
+            decrease = np.where(check["ok_Fr"], check["eps"] > 1.15, check["Fr1"] < 4.5)
+        e_hi = np.where(~done & decrease, e_test, e_hi)
+        e_lo = np.where(~done & ~decrease, e_test, e_lo)
+        e_test = np.where(done, e_test, 0.5 * (e_lo + e_hi))
+    return e_test, tosbecken_check(e_test, q, h_u, h_ue_zul, w_wehr)
+
+
+def evaluate_designs(p):
+    """
+    Evaluate weir and stilling basin design cases with the formulas of rechenbeispiel-staustufendurchbildung:
+    the weir has n fields of which n_eff = n - 1 are designed to be active ((n-1) rule), so that the structure
+    width counts n_eff fields and n_eff - 1 piers, and the stilling basin is designed for the unit discharge of
+    the (n_eff - 1) field case (n_tos = n_eff in the notebook); a design is feasible if it passes the (n-1) check,
+    the freeboard criterion f >= |h_ue_zul - h_ue_n1|, and the Froude number and backwater checks of the basin
+    (ok_n and ok_bhq2 are reported as in the notebook but are no feasibility criteria)
+    :param p: DICT of ndarrays (same shape) or FLOATs with the keys of design_defaults
+    :output: DICT of ndarrays with design parameters, hydraulic results, checks, and "feasible"
+    """
+    n = p["n"]
+    n_eff = n - 1
+    h_ue_n, b_eff_n = h_ue_n_felder(p["BHQ1"], n, p["b_F"], p["xi_pf"], p["mu"], p["c"], p["h_ue_zul"])
+    h_ue_n1, b_eff_n1 = h_ue_n_felder(p["BHQ1"], n_eff, p["b_F"], p["xi_pf"], p["mu"], p["c"], p["h_ue_zul"])
+    h_ue_bhq2, _ = h_ue_n_felder(p["BHQ2"], n, p["b_F"], p["xi_pf"], p["mu"], p["c"], p["h_ue_zul"])
+
+    # unit discharge of the stilling basin in the (n_eff - 1) case
+    b_eff_tos = b_eff_n_felder(n_eff - 1, p["h_ue_zul"], p["b_F"], p["xi_pf"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        q = p["BHQ1"] / b_eff_tos
+    h_u = h_u_manning(p["BHQ1"], p["b_u"], p["k_st"], p["I_E"])
+    e_opt, basin = optimize_eintiefung(q, h_u, p["h_ue_zul"], p["w_wehr"])
+    k = k_faktor(basin["Fr1"])
+    l_T = k * basin["h2"]
+
+    results = dict(p)
+    with np.errstate(invalid="ignore"):
+        results.update({
+            "b_gesamt": n_eff * p["b_F"] + (n_eff - 1) * p["b_F"] * p["pier_ratio"],
+            "h_ue_n": h_ue_n, "h_ue_n1": h_ue_n1, "h_ue_bhq2": h_ue_bhq2,
+            "freibord": p["h_ue_zul"] - h_ue_n1,
+            "ok_n": h_ue_n <= p["h_ue_zul"], "ok_n1": h_ue_n1 <= p["h_ue_zul"],
+            "ok_bhq2": h_ue_bhq2 <= p["h_ue_zul"], "ok_f": p["f"] >= np.abs(p["h_ue_zul"] - h_ue_n1),
+            "q": q, "h_u": h_u, "e_opt": e_opt, "Fr1": basin["Fr1"], "eps": basin["eps"], "h1": basin["h1"],
+            "h2": basin["h2"], "ok_Fr": basin["ok_Fr"], "ok_eps": basin["ok_eps"],
+            "k": k, "l_T": l_T, "l_K": 3.5 * l_T})
+    results["feasible"] = (results["ok_n1"] & results["ok_f"] & results["ok_Fr"] & results["ok_eps"]
+                           & (b_eff_n1 > 0) & (b_eff_tos > 0))
+    return results
+
+
+def get_design_cases(axes, start, stop):
+    """
+    :param axes: DICT of {design parameter: ndarray of values} spanning a full factorial grid
+    :param start: INT of the first case (flat grid index)
+    :param stop: INT of the case after the last case
+    :output: DICT of ndarrays with the parameters of cases start ... stop - 1 and the flat "case" index
+    """
+    names = list(axes.keys())
+    index = np.unravel_index(np.arange(start, stop), tuple(len(axes[name]) for name in names))
+    cases = {name: axes[name][i] for name, i in zip(names, index)}
+    cases["case"] = np.arange(start, stop)
+    return cases
+
+
+def evaluate_chunk(axes, start, stop, feasible_only=True):
+    """
+    :param axes: DICT of {design parameter: ndarray of values}
+    :param start: INT of the first case
+    :param stop: INT of the case after the last case
+    :param feasible_only: BOOL to return feasible cases only (default: True)
+    :output: DICT of ndarrays (see evaluate_designs)
+    """
+    results = evaluate_designs(get_design_cases(axes, start, stop))
+    if not feasible_only:
+        return results
+    keep = results["feasible"]
+    return {name: np.broadcast_to(values, keep.shape)[keep] for name, values in results.items()}
+
+
+def pareto_mask(objectives):
+    """
+    :param objectives: ndarray of shape (n, k) of objectives to minimize
+    :output: ndarray (BOOL) that is True for non-dominated rows
+    """
+    mask = np.zeros(objectives.shape[0], dtype=bool)
+    # the lexicographically smallest remaining row cannot be dominated by any remaining row
+    remaining = np.lexsort(objectives.T[::-1])
+    while remaining.size:
+        best = remaining[0]
+        mask[best] = True
+        candidates = objectives[remaining[1:]]
+        dominated = np.all(candidates >= objectives[best], axis=1) & np.any(candidates > objectives[best], axis=1)
+        remaining = remaining[1:][~dominated]
+    return mask
+
+
+def sweep(space=None, chunk_size=200000, n_workers=None, feasible_only=True):
+    """
+    Screen a full factorial design space (e.g., field count x field width x discharge x mu x xi_pf) in chunks
+    :param space: DICT of {design parameter (see design_defaults): LIST or ndarray of values}, where missing
+                  parameters use design_defaults (default: None)
+    :param chunk_size: INT of cases per chunk (default: 200000)
+    :param n_workers: INT of worker processes (default: None uses the number of CPUs; 1 runs in this process)
+    :param feasible_only: BOOL to return feasible cases only (default: True)
+    :output: pandas.DataFrame of cases with a "pareto" column for the non-dominated feasible designs
+    """
+    axes = {name: np.atleast_1d(np.asarray(value, dtype=float)) for name, value in design_defaults.items()}
+    for name, values in (space or {}).items():
+        if name not in design_defaults:
+            raise ValueError("Unknown design parameter %s." % str(name))
+        axes[name] = np.atleast_1d(np.asarray(values, dtype=float))
+    n_cases = int(np.prod([len(values) for values in axes.values()]))
+    starts = list(range(0, n_cases, chunk_size))
+    stops = [min(start + chunk_size, n_cases) for start in starts]
+    args = ([axes] * len(starts), starts, stops, [feasible_only] * len(starts))
+    if n_workers == 1:
+        chunks = list(map(evaluate_chunk, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            chunks = list(executor.map(evaluate_chunk, *args))
+
+    df = pd.DataFrame({name: np.concatenate([np.broadcast_to(chunk[name], chunk["case"].shape)
+                                             for chunk in chunks]) for name in chunks[0]})
+    df["n"] = df["n"].astype(int)
+    df["pareto"] = False
+    feasible = df["feasible"].to_numpy()
+    if feasible.any():
+        df.loc[feasible, "pareto"] = pareto_mask(df.loc[feasible, list(pareto_objectives)].to_numpy())
+    return df.set_index("case")
+
+
+def scalar_design(n=5, b_F=10.0, BHQ1=220.0, mu=0.5, xi_pf=0.10, h_ue_zul=1.0, c=1.0, w_wehr=5.0, k_st=32.0,
+                  I_E=4e-4, b_u=150.0):
+    """
+    One design case with math and scipy.optimize.brentq as in the notebook (reference for the benchmark)
+    :output: TUPLE of (h_ue with n - 1 fields, e_opt, l_T)
+    """
+    import math
+    from scipy.optimize import brentq
+    c_p = (2 / 3) * mu * math.sqrt(2 * G)
+    h_ue = h_ue_zul
+    for _ in range(50):
+        h_new = (BHQ1 / (c * c_p * (n - 1) * (b_F - 2 * xi_pf * h_ue))) ** (2 / 3)
+        if abs(h_new - h_ue) < 1e-6:
+            break
+        h_ue = h_new
+    q = BHQ1 / ((n - 2) * (b_F - 2 * xi_pf * h_ue_zul))
+    h_u = brentq(lambda h: b_u * h * k_st * ((b_u * h) / (b_u + 2 * h)) ** (2 / 3) * math.sqrt(I_E) - BHQ1,
+                 0.01, 20.0)
+
+    def check(e):
+        H_ges = h_ue_zul + w_wehr + e
+        h_krit = (q ** 2 / G) ** (1 / 3)
+        try:
+            h1 = brentq(lambda h: h + q ** 2 / (2 * G * h ** 2) - H_ges, 1e-4, h_krit)
+        except ValueError:
+            return float("nan"), float("nan"), float("nan"), False, False
+        Fr1 = (q / h1) / math.sqrt(G * h1)
+        h2 = (h1 / 2) * (math.sqrt(1 + 8 * Fr1 ** 2) - 1)
+        eps = (h_u + e) / h2
+        return Fr1, eps, h2, 4.5 <= Fr1 < 9.0, 1.05 <= eps <= 1.15
+
+    e_test, e_lo, e_hi = 2.0, 0.0, 3.0
+    for _ in range(14):
+        Fr1, eps, h2, ok_Fr, ok_eps = check(e_test)
+        if ok_Fr and ok_eps:
+            break
+        if (not ok_Fr and Fr1 < 4.5) or (ok_Fr and eps > 1.15):
+            e_hi = e_test
+        else:
+            e_lo = e_test
+        e_test = 0.5 * (e_lo + e_hi)
+    Fr1, eps, h2, ok_Fr, ok_eps = check(e_test)
+    return h_ue, e_test, float(k_faktor(Fr1)) * h2
+
+
+if __name__ == "__main__":
+    # benchmark: per-case scalar evaluation (brentq) versus the vectorized, chunked sweep
+    import time
+    space = {"n": np.arange(3, 11), "b_F": np.arange(6.0, 18.25, 0.25), "BHQ1": np.linspace(180.0, 260.0, 5),
+             "mu": np.linspace(0.45, 0.75, 16), "xi_pf": np.linspace(0.02, 0.15, 14),
+             "w_wehr": np.linspace(3.0, 7.0, 9)}
+    n_cases = int(np.prod([len(values) for values in space.values()]))
+
+    n_scalar = 2000
+    cases = get_design_cases({name: np.atleast_1d(np.asarray(space.get(name, value), dtype=float))
+                              for name, value in design_defaults.items()}, 0, n_scalar)
+    t_start = time.perf_counter()
+    for i in range(n_scalar):
+        scalar_design(n=int(cases["n"][i]), b_F=cases["b_F"][i], BHQ1=cases["BHQ1"][i], mu=cases["mu"][i],
+                      xi_pf=cases["xi_pf"][i], w_wehr=cases["w_wehr"][i])
+    t_scalar = (time.perf_counter() - t_start) / n_scalar
+
+    t_start = time.perf_counter()
+    designs = sweep(space)
+    t_sweep = time.perf_counter() - t_start
+    print("%i cases: scalar (brentq) %.1f s (extrapolated), vectorized sweep %.1f s (%.0fx)" % (
+        n_cases, t_scalar * n_cases, t_sweep, t_scalar * n_cases / t_sweep))
+    print("%i feasible designs, %i on the Pareto front (%s):" % (len(designs), designs["pareto"].sum(),
+                                                                 ", ".join(pareto_objectives)))
+    print(designs.loc[designs["pareto"], ["n", "b_F", "BHQ1", "mu", "xi_pf", "w_wehr"] +
+                      list(pareto_objectives)].head(20))
@@ -0,0 +1,130 @@
+import importlib.util
+import json
+import os
+import sys
+
+# driver registry files (one per GDAL version)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# driver metadata items stored in the registry
+capability_items = ("DCAP_RASTER", "DCAP_VECTOR", "DCAP_CREATE", "DCAP_CREATECOPY", "DMD_EXTENSIONS")
+
+
+def get_gdal_version():
+    """
+    Get the GDAL version from the package metadata next to the osgeo package (without importing GDAL)
+    :output: STR of the GDAL version
+    """
+    spec = importlib.util.find_spec("osgeo")
+    if spec and spec.origin:
+        site_dir = os.path.dirname(os.path.dirname(spec.origin))
+        for name in os.listdir(site_dir):
+            if name.lower().startswith("gdal-") and name.endswith((".dist-info", ".egg-info")):
+                return name.split("-")[1]
+    from osgeo import gdal
+    return gdal.__version__
+
+
+def get_registry_file(version, cache_dir=CACHE_DIR):
+    """
+    :param version: STR of the GDAL version
+    :param cache_dir: STR of the cache directory (default: CACHE_DIR)
+    :output: STR of the registry file name, including directory
+    """
+    return os.path.join(cache_dir, "drivers-gdal-%s.json" % version)
+
+
+def build_driver_registry():
+    """
+    Walk all registered GDAL and OGR drivers
+    :output: DICT with "gdal" (DICT of {short name: DICT of long name and capabilities}) and "ogr" (LIST of
+             vector driver names)
+    """
+    from osgeo import gdal, ogr
+    gdal_drivers = {}
+    for i in range(gdal.GetDriverCount()):
+        driver = gdal.GetDriver(i)
+        capabilities = {item: driver.GetMetadataItem(item) for item in capability_items}
+        capabilities["long_name"] = driver.LongName
+        gdal_drivers[str(driver.ShortName)] = capabilities
+    ogr_drivers = sorted(set(ogr.GetDriver(i).GetName() for i in range(ogr.GetDriverCount())))
+    return {"version": gdal.__version__, "gdal": gdal_drivers, "ogr": ogr_drivers}
+
+
+def get_driver_registry(refresh=False, cache_dir=CACHE_DIR):
+    """
+    Load the driver registry of the installed GDAL version from the cache or build and save it
+    :param refresh: BOOL to rebuild the registry (default: False)
+    :param cache_dir: STR of the cache directory (default: CACHE_DIR)
+    :output: DICT (see build_driver_registry)
+    """
+    registry_file = get_registry_file(get_gdal_version(), cache_dir)
+    if not refresh and os.path.isfile(registry_file):
+        try:
+            with open(registry_file) as f:
+                return json.load(f)
+        except ValueError:
+            pass
+    registry = build_driver_registry()
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first because many processes may start at once
+    tmp_file = "%s.%i.tmp" % (registry_file, os.getpid())
+    with open(tmp_file, "w") as f:
+        json.dump(registry, f)
+    os.replace(tmp_file, registry_file)
+    return registry
+
+
+def list_gdal_drivers(capability=None, refresh=False):
+    """
+    :param capability: STR of a capability item that drivers must have (e.g., "DCAP_CREATE", default: None)
+    :param refresh: BOOL to rebuild the registry (default: False)
+    :output: LIST of GDAL driver short names sorted alphabetically
+    """
+    drivers = get_driver_registry(refresh=refresh)["gdal"]
+    return sorted(name for name, capabilities in drivers.items()
+                  if capability is None or capabilities.get(capability) == "YES")
+
+
+def list_ogr_drivers(refresh=False):
+    """
+    :param refresh: BOOL to rebuild the registry (default: False)
+    :output: LIST of OGR driver names sorted alphabetically
+    """
+    return get_driver_registry(refresh=refresh)["ogr"]
+
+
+def benchmark(n_runs=10):
+    """
+    Print the mean wall time and the import time (python -X importtime) of short-lived geodata command line runs
+    :param n_runs: INT of runs per command (default: 10)
+    """
+    import subprocess
+    import time
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    commands = {"get_gdal_drivers.py": [], "get_ogr_drivers.py": [], "raster_band_info.py (argument error)": ["1"]}
+    get_driver_registry()
+    for label, args in commands.items():
+        script = os.path.join(script_dir, label.split(" ")[0])
+        wall_times = []
+        import_time = 0
+        for i in range(n_runs):
+            t_start = time.perf_counter()
+            process = subprocess.run([sys.executable, "-X", "importtime", script] + args, capture_output=True,
+                                     text=True)
+            wall_times.append(time.perf_counter() - t_start)
+            # the last importtime line is the outermost import with the highest cumulative time
+            cumulative = [int(line.split("|")[1]) for line in process.stderr.splitlines()
+                          if line.startswith("import time:") and line.split("|")[1].strip().isdigit()]
+            import_time += max(cumulative, default=0) / 1000
+        print("%-40s wall: %7.1f ms  largest import: %7.1f ms" % (label, 1000 * sum(wall_times) / n_runs,
+                                                                   import_time / n_runs))
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        registry = get_driver_registry(refresh="--refresh" in sys.argv)
+        print("GDAL %s: %i GDAL and %i OGR drivers cached in %s" % (
+            registry["version"], len(registry["gdal"]), len(registry["ogr"]), CACHE_DIR))
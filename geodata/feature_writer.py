@@ -0,0 +1,132 @@
+import json
+import os
+from osgeo import ogr, osr
+
+ogr.UseExceptions()
+
+# OGR drivers by file ending
+vector_drivers = {".shp": "ESRI Shapefile", ".gpkg": "GPKG", ".fgb": "FlatGeobuf", ".geojson": "GeoJSON",
+                  ".geojsonl": "GeoJSONSeq", ".geojsons": "GeoJSONSeq"}
+
+# geometry types by name
+geometry_types = {"point": ogr.wkbPoint, "line": ogr.wkbLineString, "polygon": ogr.wkbPolygon,
+                  "multipoint": ogr.wkbMultiPoint, "multiline": ogr.wkbMultiLineString,
+                  "multipolygon": ogr.wkbMultiPolygon}
+
+
+def iter_json_records(json_file, read_size=1 << 16):
+    """
+    Stream the objects of a top-level JSON array (e.g., json/hq100-dreisam.json) without loading the whole file
+    :param json_file: STR of a JSON file name, including directory
+    :param read_size: INT of characters read per step (default: 65536)
+    :output: generator of the array items (typically DICTs)
+    """
+    decoder = json.JSONDecoder()
+    with open(json_file) as f:
+        # skip leading whitespace, which may be longer than one read
+        chunk = f.read(read_size)
+        buffer = chunk.lstrip()
+        while chunk and not buffer:
+            chunk = f.read(read_size)
+            buffer = chunk.lstrip()
+        if not buffer.startswith("["):
+            raise ValueError("%s does not contain a JSON array." % str(json_file))
+        pos = 1
+        eof = False
+        while True:
+            # skip separators between array items
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # an item that is not followed by a separator may be truncated (e.g., -0. of the number -0.5)
+                complete = eof or (end < len(buffer) and buffer[end] in " \t\r\n,]")
+            except json.JSONDecodeError:
+                complete = False
+            if not complete:
+                if eof:
+                    raise ValueError("Incomplete JSON array in %s." % str(json_file))
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            pos = end
+            yield item
+
+
+def to_geometry(geometry):
+    """
+    :param geometry: osgeo.ogr.Geometry, STR of WKT, or BYTES of WKB
+    :output: osgeo.ogr.Geometry
+    """
+    if isinstance(geometry, str):
+        return ogr.CreateGeometryFromWkt(geometry)
+    if isinstance(geometry, (bytes, bytearray)):
+        return ogr.CreateGeometryFromWkb(bytes(geometry))
+    return geometry
+
+
+def write_features(out_file_name, records, layer_type="polygon", fields=None, epsg=None, layer_name="basemap",
+                   batch_size=10000, srs=None):
+    """
+    Write (geometry, attributes) records in batches of one transaction each to a vector file
+    :param out_file_name: STR of the target file name, including directory (.shp, .gpkg, .fgb, .geojson, or
+                          .geojsonl)
+    :param records: iterable of (geometry, DICT of {field name: value}) TUPLEs, where geometry is an
+                    osgeo.ogr.Geometry, a WKT string, or WKB bytes
+    :param layer_type: STR of "point", "line", "polygon", "multipoint", "multiline", or "multipolygon", or INT of
+                       an ogr geometry type (e.g., ogr.wkbPolygon25D, default: "polygon")
+    :param fields: DICT of {field name: ogr field type (e.g., ogr.OFTReal)} (default: None)
+    :param epsg: INT of the EPSG code of the geometries (default: None)
+    :param layer_name: STR of the layer name (default: "basemap")
+    :param batch_size: INT of features per transaction (default: 10000)
+    :param srs: osgeo.osr.SpatialReference of the geometries, e.g., of a source layer without EPSG code
+                (default: None uses epsg)
+    :output: INT of written features (None if layer_type is unknown)
+    """
+    if isinstance(layer_type, str):
+        if layer_type.lower() not in geometry_types:
+            print("ERROR: Unknown layer_type %s (use one of %s or an ogr geometry type)."
+                  % (layer_type, ", ".join(geometry_types)))
+            return None
+        layer_type = geometry_types[layer_type.lower()]
+    driver = ogr.GetDriverByName(vector_drivers.get(os.path.splitext(out_file_name)[1].lower(), "ESRI Shapefile"))
+    if os.path.exists(out_file_name):
+        driver.DeleteDataSource(out_file_name)
+    out_ds = driver.CreateDataSource(out_file_name)
+
+    if srs is None and epsg:
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(int(epsg))
+    lyr = out_ds.CreateLayer(layer_name, srs, layer_type)
+    for field_name, field_type in (fields or {}).items():
+        lyr.CreateField(ogr.FieldDefn(field_name, field_type))
+    lyr_def = lyr.GetLayerDefn()
+
+    # drivers without transaction support (e.g., ESRI Shapefile) write without transactions
+    use_transaction = out_ds.TestCapability(ogr.ODsCTransactions)
+    n_features = 0
+    if use_transaction:
+        out_ds.StartTransaction()
+    for geometry, attributes in records:
+        feature = ogr.Feature(lyr_def)
+        for field_name, value in attributes.items():
+            if value is not None:
+                feature.SetField(field_name, value)
+        geometry = to_geometry(geometry)
+        if geometry is not None:
+            feature.SetGeometry(geometry)
+        lyr.CreateFeature(feature)
+        n_features += 1
+        if use_transaction and n_features % batch_size == 0:
+            out_ds.CommitTransaction()
+            out_ds.StartTransaction()
+    if use_transaction:
+        out_ds.CommitTransaction()
+
+    lyr = None
+    out_ds = None
+    return n_features
@@ -0,0 +1,144 @@
+import re
+import numpy as np
+
+# innermost parentheses of (MULTI)POLYGON WKT contain the coordinates of one ring
+ring_pattern = re.compile(r"\(([^()]+)\)")
+
+
+def wkt2arrays(wkt_list):
+    """
+    Parse (MULTI)POLYGON WKT strings into packed coordinate arrays with ragged ring offsets
+    :param wkt_list: LIST of (MULTI)POLYGON WKT strings
+    :output: DICT with
+             "coords": ndarray of shape (n_points, 2) with the x-y coordinates of all rings,
+             "ring_offsets": ndarray (INT) of n_rings + 1 start indices of rings in coords,
+             "ring_feature": ndarray (INT) of the feature (index in wkt_list) of every ring,
+             "ring_is_hole": ndarray (BOOL) that is True for interior rings,
+             "n_features": INT of features
+    """
+    ring_texts = []
+    ring_feature = []
+    ring_is_hole = []
+    for feature_id, wkt in enumerate(wkt_list):
+        for match in ring_pattern.finditer(wkt):
+            ring_texts.append(match.group(1))
+            ring_feature.append(feature_id)
+            # exterior rings directly follow the opening parenthesis of a polygon, holes follow a comma
+            ring_is_hole.append(wkt[:match.start()].rstrip()[-1] != "(")
+
+    ring_counts = np.array([text.count(",") + 1 for text in ring_texts], dtype=np.int64)
+    # coordinate dimension (2 for x-y, 3 for x-y-z or x-y-m, 4 for x-y-z-m) from the first point of every ring
+    ring_dims = np.array([len(text.split(",", 1)[0].split()) for text in ring_texts], dtype=np.int64)
+    values = np.array(" ".join(ring_texts).replace(",", " ").split(), dtype=float)
+    point_dims = np.repeat(ring_dims, ring_counts)
+    point_starts = np.cumsum(point_dims) - point_dims
+    coords = np.column_stack((values[point_starts], values[point_starts + 1]))
+    return {"coords": coords,
+            "ring_offsets": np.concatenate(([0], np.cumsum(ring_counts))),
+            "ring_feature": np.array(ring_feature, dtype=np.int64),
+            "ring_is_hole": np.array(ring_is_hole, dtype=bool),
+            "n_features": len(wkt_list)}
+
+
+def polygon_metrics(coords, ring_offsets, ring_feature, ring_is_hole, n_features):
+    """
+    Compute planar area (shoelace), perimeter, centroid, and bounding box of all polygons at once
+    :param coords: ndarray of shape (n_points, 2) with the x-y coordinates of all rings
+    :param ring_offsets: ndarray (INT) of n_rings + 1 start indices of rings in coords
+    :param ring_feature: ndarray (INT) of the feature index of every ring (rings sorted by feature)
+    :param ring_is_hole: ndarray (BOOL) that is True for interior rings
+    :param n_features: INT of features
+    :output: DICT of ndarrays (one value per feature) with keys "area", "perimeter", "centroid_x",
+             "centroid_y", "x_min", "y_min", "x_max", "y_max"
+    """
+    starts = ring_offsets[:-1]
+    ends = ring_offsets[1:] - 1
+    # shift every ring to its first point to avoid cancellation with large (projected) coordinates
+    ring_ref = coords[starts]
+    local = coords - np.repeat(ring_ref, np.diff(ring_offsets), axis=0)
+    x = local[:, 0]
+    y = local[:, 1]
+
+    # segment terms between consecutive points, where segments across ring borders are dropped
+    cross = np.zeros(x.size)
+    length = np.zeros(x.size)
+    sum_x = np.zeros(x.size)
+    sum_y = np.zeros(x.size)
+    cross[:-1] = x[:-1] * y[1:] - x[1:] * y[:-1]
+    length[:-1] = np.hypot(x[1:] - x[:-1], y[1:] - y[:-1])
+    sum_x[:-1] = x[:-1] + x[1:]
+    sum_y[:-1] = y[:-1] + y[1:]
+    # replace the terms of the last point of every ring with the closing segment (zero for closed rings)
+    cross[ends] = x[ends] * y[starts] - x[starts] * y[ends]
+    length[ends] = np.hypot(x[starts] - x[ends], y[starts] - y[ends])
+    sum_x[ends] = x[ends] + x[starts]
+    sum_y[ends] = y[ends] + y[starts]
+
+    ring_area = np.add.reduceat(cross, starts) / 2
+    ring_moment_x = np.add.reduceat(sum_x * cross, starts) / 6 + ring_ref[:, 0] * ring_area
+    ring_moment_y = np.add.reduceat(sum_y * cross, starts) / 6 + ring_ref[:, 1] * ring_area
+    ring_perimeter = np.add.reduceat(length, starts)
+
+    # exterior rings add and holes subtract area (independent of the ring orientation)
+    sign = np.where(ring_is_hole, -1.0, 1.0) * np.sign(ring_area)
+    area = np.bincount(ring_feature, weights=sign * ring_area, minlength=n_features)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        centroid_x = np.bincount(ring_feature, weights=sign * ring_moment_x, minlength=n_features) / area
+        centroid_y = np.bincount(ring_feature, weights=sign * ring_moment_y, minlength=n_features) / area
+
+    # bounding boxes of features with rings (coordinates are sorted by feature)
+    bbox = np.full((4, n_features), np.nan)
+    has_rings = np.bincount(ring_feature, minlength=n_features) > 0
+    first_rings = np.searchsorted(ring_feature, np.flatnonzero(has_rings))
+    feature_starts = ring_offsets[first_rings]
+    bbox[0, has_rings] = np.minimum.reduceat(coords[:, 0], feature_starts)
+    bbox[1, has_rings] = np.minimum.reduceat(coords[:, 1], feature_starts)
+    bbox[2, has_rings] = np.maximum.reduceat(coords[:, 0], feature_starts)
+    bbox[3, has_rings] = np.maximum.reduceat(coords[:, 1], feature_starts)
+
+    return {"area": area,
+            "perimeter": np.bincount(ring_feature, weights=ring_perimeter, minlength=n_features),
+            "centroid_x": centroid_x, "centroid_y": centroid_y,
+            "x_min": bbox[0], "y_min": bbox[1], "x_max": bbox[2], "y_max": bbox[3]}
+
+
+def wkt_metrics(wkt_list):
+    """
+    :param wkt_list: LIST of (MULTI)POLYGON WKT strings
+    :output: DICT of ndarrays (see polygon_metrics)
+    """
+    return polygon_metrics(**wkt2arrays(wkt_list))
+
+
+if __name__ == "__main__":
+    # benchmark: vectorized metrics versus per-feature OGR calls on the Dreisam HQ100 polygons
+    import json
+    import os
+    import time
+    from osgeo import ogr
+
+    with open(os.path.dirname(os.path.abspath(__file__)) + "/json/hq100-dreisam.json") as f:
+        wkt_list = [record["wkt_geom"] for record in json.load(f)]
+
+    t_start = time.perf_counter()
+    ogr_area = []
+    for wkt in wkt_list:
+        polygon = ogr.CreateGeometryFromWkt(wkt)
+        ogr_area.append(polygon.GetArea())
+        polygon.Boundary().Length()
+        polygon.Centroid()
+        polygon.GetEnvelope()
+    t_ogr = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    arrays = wkt2arrays(wkt_list)
+    t_parse = time.perf_counter() - t_start
+    t_start = time.perf_counter()
+    metrics = polygon_metrics(**arrays)
+    t_metrics = time.perf_counter() - t_start
+
+    print("max. area difference to OGR: %.3e" % np.max(np.abs(metrics["area"] - np.array(ogr_area))))
+    print("OGR per feature (parse + metrics): %8.2f ms" % (t_ogr * 1000))
+    print("vectorized parse + metrics:        %8.2f ms (%.1fx)" % ((t_parse + t_metrics) * 1000,
+                                                               t_ogr / (t_parse + t_metrics)))
+    print("vectorized metrics only:           %8.2f ms (%.1fx)" % (t_metrics * 1000, t_ogr / t_metrics))
@@ -1,13 +1,9 @@
-import gdal
+import sys
+from driver_cache import list_gdal_drivers
 
 
-# instantiate driver count object (iterable numeric)
-driver_list = []
-for i in range(gdal.GetDriverCount()):
-    driver_list.append(str(gdal.GetDriver(i).ShortName))
-
-# sort driver list alphabetically
-driver_list.sort()
+# read the driver list from the cache (built once per GDAL version)
+driver_list = list_gdal_drivers(refresh="--refresh" in sys.argv)
 
 # print driver list (comma separated list)
 print(", ".join(driver_list))
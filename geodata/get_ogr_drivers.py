@@ -1,18 +1,9 @@
-from gdal import ogr
+import sys
+from driver_cache import list_ogr_drivers
 
 
-# instantiate driver count object (iterable numeric)
-driver_count = ogr.GetDriverCount()
-driver_list = [] 
-
-for i in range(driver_count):
-    driver = ogr.GetDriver(i)
-    driver_name = driver.GetName()
-    if not driver_name in driver_list:
-        driver_list.append(driver_name)
-
-# sort driver list alphabetically
-driver_list.sort()
+# read the driver list from the cache (built once per GDAL version)
+driver_list = list_ogr_drivers(refresh="--refresh" in sys.argv)
 
 # print driver list (comma separated list)
 print(", ".join(driver_list))
\ No newline at end of file
@@ -0,0 +1,37 @@
+import importlib
+
+
+class LazyModule:
+    def __init__(self, name, on_import=None):
+        """
+        Module placeholder that imports the module on first attribute access (e.g., gdal.Open), which keeps the
+        startup of command line scripts fast when they exit early (e.g., on argument errors)
+        :param name: STR of the module name (e.g., "osgeo.gdal")
+        :param on_import: callable(module) to run once after the import (default: None)
+        """
+        self.__dict__["_name"] = name
+        self.__dict__["_on_import"] = on_import
+        self.__dict__["_module"] = None
+
+    def load(self):
+        """
+        :output: the imported module
+        """
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._on_import:
+                self._on_import(module)
+            self.__dict__["_module"] = module
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+
+def lazy_import(name, on_import=None):
+    """
+    :param name: STR of the module name (e.g., "numpy")
+    :param on_import: callable(module) to run once after the import (default: None)
+    :output: LazyModule
+    """
+    return LazyModule(name, on_import=on_import)
@@ -1,14 +1,16 @@
 import sys, os
 try:
     sys.path.append("C:\\GitHub\\hy-geo-utils\\")
-    from geo_utils import raster2array, create_raster, get_srs, coords2offset
+    from geo_utils import raster2array, get_srs, coords2offset
 except:
     print("ERROR: No geo_utils.")
 
-import gdal
-from gdal import osr
-from skimage.graph import route_through_array
+from osgeo import gdal, ogr, osr
+from skimage.graph import route_through_array, MCP_Geometric
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from raster_output import create_raster
+from profiling_hooks import profiled
 
 gdal.UseExceptions()
 
@@ -39,7 +41,323 @@ def create_path_array(raster_array, geo_transform, start_coord, stop_coord):
     return path_array
 
 
-def identify_path(in_file_name, out_file_name, start_coord, stop_coord):
+def get_block_windows(band, block_size=None):
+    """
+    Yield the pixel windows of a raster band in its native (or a custom) block size
+    :param band: osgeo.gdal.Band
+    :param block_size: TUPLE of (x_size, y_size) in pixels (default: None uses band.GetBlockSize())
+    :output: generator of (x_offset, y_offset, x_size, y_size) TUPLEs
+    """
+    block_x, block_y = block_size or band.GetBlockSize()
+    for y_off in range(0, band.YSize, block_y):
+        for x_off in range(0, band.XSize, block_x):
+            yield x_off, y_off, min(block_x, band.XSize - x_off), min(block_y, band.YSize - y_off)
+
+
+def read_window(band, window):
+    """
+    Read a pixel window of a raster band, where no-data values are replaced with np.nan
+    :param band: osgeo.gdal.Band
+    :param window: TUPLE of (x_offset, y_offset, x_size, y_size)
+    :output: ndarray (float) of the window
+    """
+    block = band.ReadAsArray(*window).astype(float)
+    no_data = band.GetNoDataValue()
+    if no_data is not None:
+        block[block == no_data] = np.nan
+    return block
+
+
+def get_nan_penalty(band, block_size=None):
+    """
+    Derive the cost of no-data pixels (max raised by an order of magnitude) in one streaming pass over the band
+    :param band: osgeo.gdal.Band
+    :param block_size: TUPLE of (x_size, y_size) in pixels (default: None uses band.GetBlockSize())
+    :output: FLOAT of the no-data pixel cost or None if the band has no valid pixels
+    """
+    band_max = None
+    for window in get_block_windows(band, block_size):
+        block = read_window(band, window)
+        if not np.isnan(block).all():
+            block_max = np.nanmax(block)
+            band_max = block_max if band_max is None else max(band_max, block_max)
+    if band_max is None:
+        return None
+    return band_max * 10
+
+
+def get_corridor_window(band, start_offset, stop_offset, buffer_pixels):
+    """
+    Get the pixel window that encloses the start and stop points plus a buffer
+    :param band: osgeo.gdal.Band
+    :param start_offset: TUPLE of (x, y) pixel offsets of the start point
+    :param stop_offset: TUPLE of (x, y) pixel offsets of the stop point
+    :param buffer_pixels: INT of pixels added around the bounding box of both points
+    :output: TUPLE of (x_offset, y_offset, x_size, y_size) or None if a point is outside the raster
+    """
+    for offset_x, offset_y in (start_offset, stop_offset):
+        if not (0 <= offset_x < band.XSize and 0 <= offset_y < band.YSize):
+            print("ERROR: Point at pixel (%i, %i) is outside of the raster." % (offset_x, offset_y))
+            return None
+    x_min = max(min(start_offset[0], stop_offset[0]) - buffer_pixels, 0)
+    y_min = max(min(start_offset[1], stop_offset[1]) - buffer_pixels, 0)
+    x_max = min(max(start_offset[0], stop_offset[0]) + buffer_pixels + 1, band.XSize)
+    y_max = min(max(start_offset[1], stop_offset[1]) + buffer_pixels + 1, band.YSize)
+    return x_min, y_min, x_max - x_min, y_max - y_min
+
+
+def write_path_to_band(out_band, index_path):
+    """
+    Burn a least cost path into a tiled Byte band, where only tiles touched by the path are written
+    :param out_band: osgeo.gdal.Band of a sparse, tiled Byte raster (unwritten tiles read as zeros)
+    :param index_path: ndarray of shape (2, n) with (row, column) indices of path pixels in the full raster
+    """
+    block_x, block_y = out_band.GetBlockSize()
+    tile_ids = np.unique(np.stack((index_path[0] // block_y, index_path[1] // block_x), axis=1), axis=0)
+    for tile_row, tile_col in tile_ids:
+        y_off, x_off = tile_row * block_y, tile_col * block_x
+        tile = np.zeros((min(block_y, out_band.YSize - y_off), min(block_x, out_band.XSize - x_off)), dtype=np.uint8)
+        in_tile = (index_path[0] // block_y == tile_row) & (index_path[1] // block_x == tile_col)
+        tile[index_path[0][in_tile] - y_off, index_path[1][in_tile] - x_off] = 1
+        out_band.WriteArray(tile, int(x_off), int(y_off))
+    out_band.FlushCache()
+
+
+def create_path_raster(out_file_name, src_raster, band_count=1):
+    """
+    Create a sparse, tiled Byte GeoTIFF with the size, GeoTransform and projection of a source raster
+    :param out_file_name: STR of target file name, including directory; must end on ".tif"
+    :param src_raster: osgeo.gdal.Dataset of the cost surface
+    :param band_count: INT of bands to create (default: 1)
+    :output: osgeo.gdal.Dataset
+    """
+    driver = gdal.GetDriverByName("GTiff")
+    out_raster = driver.Create(out_file_name, src_raster.RasterXSize, src_raster.RasterYSize, band_count,
+                               gdal.GDT_Byte, options=["TILED=YES", "SPARSE_OK=TRUE", "COMPRESS=DEFLATE"])
+    out_raster.SetGeoTransform(src_raster.GetGeoTransform())
+    out_raster.SetProjection(src_raster.GetProjection())
+    return out_raster
+
+
+def identify_path_tiled(in_file_name, out_file_name, start_coord, stop_coord, buffer_pixels=500, block_size=None):
+    """
+    Identify a least cost path on cost rasters larger than memory: the no-data cost is derived block by block
+    and routing is limited to a buffered corridor around the start and stop points, so that peak memory
+    depends on the corridor size rather than on the raster size
+    :param in_file_name: STR of the cost surface raster file name, including directory
+    :param out_file_name: STR of target file name, including directory; must end on ".tif"
+    :param start_coord: TUPLE of (x, y) start point coordinates
+    :param stop_coord: TUPLE of (x, y) stop point coordinates
+    :param buffer_pixels: INT of pixels added around the start and stop points to define the corridor (default: 500)
+    :param block_size: TUPLE of (x_size, y_size) for reading blocks (default: None uses the native block size)
+    :output: FLOAT of the path cost (writes out_file_name) or None if the path could not be identified
+    """
+    try:
+        src_raster = gdal.Open(in_file_name)
+    except RuntimeError as e:
+        print("ERROR: Cannot open raster.")
+        print(e)
+        return None
+    band = src_raster.GetRasterBand(1)
+    geo_transform = src_raster.GetGeoTransform()
+
+    start_offset = coords2offset(geo_transform, start_coord[0], start_coord[1])
+    stop_offset = coords2offset(geo_transform, stop_coord[0], stop_coord[1])
+    window = get_corridor_window(band, start_offset, stop_offset, buffer_pixels)
+    if not window:
+        return None
+
+    print("deriving no-data cost")
+    nan_penalty = get_nan_penalty(band, block_size)
+    if nan_penalty is None:
+        print("ERROR: The cost raster has no valid pixels.")
+        return None
+
+    print("reading corridor of %i x %i pixels" % (window[2], window[3]))
+    corridor_array = read_window(band, window)
+    corridor_array[np.isnan(corridor_array)] = nan_penalty
+
+    try:
+        index_path, cost = route_through_array(corridor_array,
+                                               (start_offset[1] - window[1], start_offset[0] - window[0]),
+                                               (stop_offset[1] - window[1], stop_offset[0] - window[0]),
+                                               geometric=True, fully_connected=True)
+    except TypeError:
+        print("ERROR: route_through_array encountered a problem.")
+        return None
+    corridor_array = None
+
+    # shift corridor indices to full raster indices
+    index_path = np.array(index_path).T + np.array([[window[1]], [window[0]]])
+    out_raster = create_path_raster(out_file_name, src_raster)
+    write_path_to_band(out_raster.GetRasterBand(1), index_path)
+    out_raster = None
+    return cost
+
+
+# cost array shared by the worker processes of identify_paths (assigned by set_worker_cost_array)
+worker_cost_array = None
+
+
+def set_worker_cost_array(cost_array):
+    global worker_cost_array
+    worker_cost_array = cost_array
+
+
+def create_cost_array(raster_array):
+    """
+    Prepare a cost surface for routing (only once for any number of paths)
+    :param raster_array: ndarray of the cost surface, where no-data pixels are np.nan
+    :output: ndarray where np.nan is replaced with max raised by an order of magnitude
+    """
+    cost_array = np.array(raster_array, dtype=float)
+    cost_array[np.isnan(cost_array)] = np.nanmax(cost_array) * 10
+    return cost_array
+
+
+@profiled(n_items=lambda result, start_index, stop_indices, *args, **kwargs: len(stop_indices), unit="paths")
+def route_from_source(start_index, stop_indices, cost_array=None):
+    """
+    Find the least cost paths from one source to many targets with a single Dijkstra run
+    :param start_index: TUPLE of (row, column) array indices of the source
+    :param stop_indices: LIST of (row, column) array indices of the targets
+    :param cost_array: ndarray of the cost surface (default: None uses the cost array of the worker process)
+    :output: LIST of (ndarray of shape (2, n) with path indices, FLOAT of cost) TUPLEs in the order of stop_indices
+    """
+    if cost_array is None:
+        cost_array = worker_cost_array
+    mcp = MCP_Geometric(cost_array, fully_connected=True)
+    costs, traceback = mcp.find_costs([start_index], ends=stop_indices)
+    return [(np.array(mcp.traceback(stop_index)).T, float(costs[stop_index])) for stop_index in stop_indices]
+
+
+def collect_routes(sources, starts, results, n_pairs):
+    """
+    Sort the routes of all sources into the order of the coordinate pairs
+    :param sources: DICT of {start index: LIST of (pair_id, stop index) TUPLEs}
+    :param starts: LIST of start indices in the order of results
+    :param results: iterable of route_from_source results (one per start)
+    :param n_pairs: INT of coordinate pairs
+    :output: LIST of ndarrays of shape (2, n) with path indices and LIST of FLOAT path costs
+    """
+    index_paths = [None] * n_pairs
+    costs = [None] * n_pairs
+    for start, source_results in zip(starts, results):
+        for (pair_id, stop), (index_path, cost) in zip(sources[start], source_results):
+            index_paths[pair_id] = index_path
+            costs[pair_id] = cost
+    return index_paths, costs
+
+
+def get_coord_pairs(route_spec):
+    """
+    Convert a routing specification to a list of start-stop coordinate pairs
+    :param route_spec: LIST of (start_coord, stop_coord) TUPLEs or DICT of {start_coord: [stop_coord, ...]}
+    :output: LIST of (start_coord, stop_coord) TUPLEs
+    """
+    if isinstance(route_spec, dict):
+        return [(start, stop) for start, stops in route_spec.items() for stop in stops]
+    return list(route_spec)
+
+
+def write_path_lines(out_file_name, src_raster, index_paths, costs):
+    """
+    Write least cost paths as lines (through pixel centers) to a shapefile
+    :param out_file_name: STR of target shapefile name, including directory; must end on ".shp"
+    :param src_raster: osgeo.gdal.Dataset of the cost surface (provides GeoTransform and projection)
+    :param index_paths: LIST of ndarrays of shape (2, n) with (row, column) path indices
+    :param costs: LIST of FLOAT path costs
+    """
+    geo_transform = src_raster.GetGeoTransform()
+    srs = osr.SpatialReference()
+    srs.ImportFromWkt(src_raster.GetProjection())
+
+    shp_driver = ogr.GetDriverByName("ESRI Shapefile")
+    if os.path.exists(out_file_name):
+        shp_driver.DeleteDataSource(out_file_name)
+    out_shp = shp_driver.CreateDataSource(out_file_name)
+    lyr = out_shp.CreateLayer("least_cost_paths", srs, ogr.wkbLineString)
+    lyr.CreateField(ogr.FieldDefn("pair_id", ogr.OFTInteger))
+    lyr.CreateField(ogr.FieldDefn("cost", ogr.OFTReal))
+
+    for pair_id, (index_path, cost) in enumerate(zip(index_paths, costs)):
+        # pixel offsets to pixel center coordinates
+        coords_x = geo_transform[0] + geo_transform[1] * (index_path[1] + 0.5)
+        coords_y = geo_transform[3] + geo_transform[5] * (index_path[0] + 0.5)
+        line = ogr.Geometry(ogr.wkbLineString)
+        for x, y in zip(coords_x, coords_y):
+            line.AddPoint_2D(float(x), float(y))
+        feature = ogr.Feature(lyr.GetLayerDefn())
+        feature.SetField("pair_id", pair_id)
+        feature.SetField("cost", float(cost))
+        feature.SetGeometry(line)
+        lyr.CreateFeature(feature)
+
+    lyr = None
+    out_shp = None
+
+
+def write_path_bands(out_file_name, src_raster, index_paths):
+    """
+    Write least cost paths to a multi-band Byte GeoTIFF with one band per path
+    :param out_file_name: STR of target file name, including directory; must end on ".tif"
+    :param src_raster: osgeo.gdal.Dataset of the cost surface (provides size, GeoTransform and projection)
+    :param index_paths: LIST of ndarrays of shape (2, n) with (row, column) path indices
+    """
+    out_raster = create_path_raster(out_file_name, src_raster, band_count=len(index_paths))
+    for band_number, index_path in enumerate(index_paths, start=1):
+        write_path_to_band(out_raster.GetRasterBand(band_number), index_path)
+    out_raster = None
+
+
+@profiled(n_items=lambda costs, *args, **kwargs: len(costs) if costs else 0, unit="paths")
+def identify_paths(in_file_name, out_file_name, route_spec, n_workers=None):
+    """
+    Identify many least cost paths on one cost surface: the cost array is prepared once, and all targets
+    of a source are served by a single MCP_Geometric traversal; sources are distributed over a process pool
+    :param in_file_name: STR of the cost surface raster file name, including directory
+    :param out_file_name: STR of target file name; ".shp" writes a line shapefile, otherwise a multi-band GeoTIFF
+    :param route_spec: LIST of (start_coord, stop_coord) TUPLEs or DICT of {start_coord: [stop_coord, ...]}
+    :param n_workers: INT of worker processes (default: None uses the number of CPUs; 1 runs in this process)
+    :output: LIST of FLOAT path costs in the order of the coordinate pairs (writes out_file_name)
+    """
+    print("reading raster")
+    try:
+        src_raster, raster_array, geo_transform = raster2array(in_file_name)
+    except TypeError:
+        print("ERROR: raster to array conversion failed (check earlier error messages).")
+        return None
+    cost_array = create_cost_array(raster_array)
+    raster_array = None
+
+    # transform coordinates to array (row, column) indices and group targets by source
+    coord_pairs = get_coord_pairs(route_spec)
+    sources = {}
+    for pair_id, (start_coord, stop_coord) in enumerate(coord_pairs):
+        start_x, start_y = coords2offset(geo_transform, start_coord[0], start_coord[1])
+        stop_x, stop_y = coords2offset(geo_transform, stop_coord[0], stop_coord[1])
+        sources.setdefault((start_y, start_x), []).append((pair_id, (stop_y, stop_x)))
+
+    print("routing %i paths from %i sources" % (len(coord_pairs), len(sources)))
+    starts = list(sources.keys())
+    stops = [[stop for pair_id, stop in sources[start]] for start in starts]
+    if n_workers == 1:
+        index_paths, costs = collect_routes(sources, starts, map(route_from_source, starts, stops,
+                                                                 [cost_array] * len(starts)), len(coord_pairs))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=set_worker_cost_array,
+                                 initargs=(cost_array,)) as executor:
+            index_paths, costs = collect_routes(sources, starts, executor.map(route_from_source, starts, stops),
+                                                len(coord_pairs))
+
+    if out_file_name.endswith(".shp"):
+        write_path_lines(out_file_name, src_raster, index_paths, costs)
+    else:
+        write_path_bands(out_file_name, src_raster, index_paths)
+    return costs
+
+
+def identify_path(in_file_name, out_file_name, start_coord, stop_coord, profile="gtiff"):
     print("reading raster")
     try:
         src_raster, raster_array, geo_transform = raster2array(in_file_name)  # creates array from cost surface raster
@@ -54,7 +372,7 @@ def identify_path(in_file_name, out_file_name, start_coord, stop_coord):
 
     src_srs = get_srs(src_raster)
     create_raster(out_file_name, path_array, epsg=int(src_srs.GetAuthorityCode(None)),
-                  rdtype=gdal.GDT_Byte, geo_info=geo_transform)
+                  rdtype=gdal.GDT_Byte, geo_info=geo_transform, profile=profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,12 @@
+# optional profiling of the geodata stages: fun.profiling is used if the repository root is on the path (e.g., in
+# the benchmarks and tests entry points), otherwise profiled is a no-op decorator
+try:
+    from fun.profiling import profiled
+except ImportError:
+    def profiled(name=None, n_items=None, unit="items"):
+        """
+        No-op stand-in for fun.profiling.profiled
+        """
+        def decorator(func):
+            return func
+        return decorator
@@ -0,0 +1,270 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from osgeo import gdal
+
+gdal.UseExceptions()
+
+
+def con(condition, true_value, false_value=np.nan):
+    """
+    Conditional evaluation like arcpy.sa.Con (cells where condition is False become no-data by default)
+    """
+    return np.where(condition, true_value, false_value)
+
+
+# functions available in raster expressions (no Python builtins)
+expression_functions = {"sqrt": np.sqrt, "abs": np.abs, "exp": np.exp, "log": np.log, "log10": np.log10,
+                        "sin": np.sin, "cos": np.cos, "tan": np.tan, "arctan": np.arctan, "arctan2": np.arctan2,
+                        "minimum": np.minimum, "maximum": np.maximum, "where": np.where, "con": con,
+                        "isnan": np.isnan, "pi": np.pi}
+
+
+def get_block_windows(x_size, y_size, block_size):
+    """
+    :param x_size: INT of raster columns
+    :param y_size: INT of raster rows
+    :param block_size: TUPLE of (x_size, y_size) of blocks in pixels
+    :output: LIST of (x_offset, y_offset, x_size, y_size) TUPLEs covering the raster
+    """
+    block_x, block_y = block_size
+    return [(x_off, y_off, min(block_x, x_size - x_off), min(block_y, y_size - y_off))
+            for y_off in range(0, y_size, block_y) for x_off in range(0, x_size, block_x)]
+
+
+def check_alignment(file_names):
+    """
+    :param file_names: LIST of raster file names, including directory
+    :output: osgeo.gdal.Dataset of the first raster (reference) or None if the rasters are not aligned
+    """
+    if not file_names:
+        print("ERROR: No rasters to align.")
+        return None
+    reference = gdal.Open(file_names[0])
+    for file_name in file_names[1:]:
+        src = gdal.Open(file_name)
+        if (src.RasterXSize, src.RasterYSize) != (reference.RasterXSize, reference.RasterYSize) or \
+                not np.allclose(src.GetGeoTransform(), reference.GetGeoTransform()):
+            print("ERROR: %s is not aligned with %s." % (str(file_name), str(file_names[0])))
+            return None
+    return reference
+
+
+def create_output(file_name, reference, block_size, nan_value=-9999.0, rdtype=gdal.GDT_Float32):
+    """
+    Create a tiled, compressed GeoTIFF with the size, GeoTransform and projection of a reference raster
+    :param file_name: STR of target file name, including directory; must end on ".tif"
+    :param reference: osgeo.gdal.Dataset
+    :param block_size: TUPLE of (x_size, y_size) of tiles (multiples of 16)
+    :param nan_value: FLOAT of the no-data value (default: -9999.0)
+    :param rdtype: gdal.GDALDataType raster data type (default: gdal.GDT_Float32)
+    :output: osgeo.gdal.Dataset
+    """
+    options = ["TILED=YES", "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER",
+               "BLOCKXSIZE=%i" % block_size[0], "BLOCKYSIZE=%i" % block_size[1]]
+    out = gdal.GetDriverByName("GTiff").Create(file_name, reference.RasterXSize, reference.RasterYSize, 1,
+                                               rdtype, options=options)
+    out.SetGeoTransform(reference.GetGeoTransform())
+    out.SetProjection(reference.GetProjection())
+    out.GetRasterBand(1).SetNoDataValue(nan_value)
+    return out
+
+
+class BlockReader:
+    def __init__(self, max_open=8):
+        """
+        Read raster blocks into reused buffers with one set of datasets and buffers per thread
+        (GDAL datasets must not be shared between threads), where each thread keeps at most max_open datasets
+        open (least recently used are closed) and one buffer per slot and block shape
+        :param max_open: INT of open datasets per thread (default: 8)
+        """
+        self.max_open = max_open
+        self.local = threading.local()
+
+    def get_band(self, file_name):
+        """
+        :param file_name: STR of a raster file name, including directory
+        :output: osgeo.gdal.Band (the first band of an open dataset of this thread)
+        """
+        if not hasattr(self.local, "bands"):
+            self.local.bands = OrderedDict()
+            self.local.buffers = {}
+        bands = self.local.bands
+        if file_name in bands:
+            bands.move_to_end(file_name)
+        else:
+            while len(bands) >= self.max_open:
+                # dereferencing the dataset closes the file
+                bands.popitem(last=False)
+            src = gdal.Open(file_name)
+            bands[file_name] = (src, src.GetRasterBand(1))
+        return bands[file_name][1]
+
+    def read(self, file_name, window, slot=0):
+        """
+        :param file_name: STR of a raster file name, including directory
+        :param window: TUPLE of (x_offset, y_offset, x_size, y_size)
+        :param slot: INT of the buffer slot: blocks that are used at the same time need different slots, because
+                     the next read of the same slot and block shape overwrites the buffer (default: 0)
+        :output: ndarray (FLOAT) view of a reused buffer with the block, where no-data pixels are np.nan
+        """
+        band = self.get_band(file_name)
+        key = (slot, window[2], window[3])
+        if key not in self.local.buffers:
+            self.local.buffers[key] = np.empty((window[3], window[2]), dtype=np.float64)
+        block = band.ReadAsArray(*window, buf_obj=self.local.buffers[key])
+        no_data = band.GetNoDataValue()
+        if no_data is not None:
+            block[block == no_data] = np.nan
+        return block
+
+
+def process_blocks(windows, task, outputs, n_threads=4):
+    """
+    Run task on every block in a thread pool and write the results in order, where the number of blocks in flight
+    (and their output buffers) is limited to twice the number of threads
+    :param windows: LIST of (x_offset, y_offset, x_size, y_size) TUPLEs
+    :param task: callable(window, LIST of output ndarrays) that fills the output ndarrays
+    :param outputs: LIST of osgeo.gdal.Dataset to write task results to (one per output buffer)
+    :param n_threads: INT of threads (default: 4)
+    """
+    max_in_flight = 2 * n_threads
+    block_shape = (max(w[3] for w in windows), max(w[2] for w in windows))
+    free_buffers = [[np.empty(block_shape, dtype=np.float64) for out in outputs] for i in range(max_in_flight)]
+    in_flight = deque()
+
+    def write_oldest():
+        future, window, buffers = in_flight.popleft()
+        future.result()
+        for out, buffer in zip(outputs, buffers):
+            out.GetRasterBand(1).WriteArray(buffer[:window[3], :window[2]], window[0], window[1])
+        free_buffers.append(buffers)
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        for window in windows:
+            if not free_buffers:
+                write_oldest()
+            buffers = free_buffers.pop()
+            views = [buffer[:window[3], :window[2]] for buffer in buffers]
+            in_flight.append((executor.submit(task, window, views), window, buffers))
+        while in_flight:
+            write_oldest()
+
+
+def evaluate(expression, rasters, out_file_name, constants=None, nan_value=-9999.0, rdtype=gdal.GDT_Float32,
+             block_size=(512, 512), n_threads=4):
+    """
+    Evaluate a raster expression block by block over aligned rasters, for example, the Froude number
+    evaluate("u / sqrt(g * h)", {"h": "h001000.tif", "u": "u001000.tif"}, "froude.tif", constants={"g": 9.81})
+    or a slackwater mask evaluate("con((h <= 1.4) & (u <= 0.15), 1)", ...)
+    :param expression: STR of a numpy expression with raster names, constants, and expression_functions
+    :param rasters: DICT of {name in expression: STR of raster file name}
+    :param out_file_name: STR of target file name, including directory; must end on ".tif"
+    :param constants: DICT of {name in expression: FLOAT} (default: None)
+    :param nan_value: FLOAT of the output no-data value (default: -9999.0)
+    :param rdtype: gdal.GDALDataType output raster data type (default: gdal.GDT_Float32)
+    :param block_size: TUPLE of (x_size, y_size) of processing blocks and output tiles (default: (512, 512))
+    :param n_threads: INT of threads (default: 4)
+    :output: None (writes out_file_name) or -1 if the expression or the rasters are not valid
+    """
+    code = compile(expression, "<raster expression>", "eval")
+    constants = constants or {}
+    unknown = [name for name in code.co_names if name not in rasters and name not in constants
+               and name not in expression_functions]
+    if unknown:
+        print("ERROR: Undefined names in expression: %s." % ", ".join(unknown))
+        return -1
+    names = [name for name in rasters if name in code.co_names]
+    if not names:
+        print("ERROR: The expression %s uses none of the rasters %s." % (expression, ", ".join(rasters)))
+        return -1
+    reference = check_alignment([rasters[name] for name in names])
+    if not reference:
+        return -1
+
+    out = create_output(out_file_name, reference, block_size, nan_value=nan_value, rdtype=rdtype)
+    windows = get_block_windows(reference.RasterXSize, reference.RasterYSize, block_size)
+    # every block reads all rasters of the expression: keep them open
+    reader = BlockReader(max_open=len(names))
+
+    def task(window, out_blocks):
+        namespace = dict(expression_functions)
+        namespace.update(constants)
+        invalid = np.zeros((window[3], window[2]), dtype=bool)
+        for slot, name in enumerate(names):
+            namespace[name] = reader.read(rasters[name], window, slot=slot)
+            invalid |= np.isnan(namespace[name])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out_blocks[0][...] = eval(code, {"__builtins__": {}}, namespace)
+        # propagate no-data of any input and invalid results (e.g., division by zero)
+        out_blocks[0][invalid | ~np.isfinite(out_blocks[0])] = nan_value
+
+    process_blocks(windows, task, [out], n_threads=n_threads)
+    out.FlushCache()
+    out = None
+
+
+def cell_statistics(file_names, out_file_names, block_size=(512, 512), nan_value=-9999.0, n_threads=4,
+                    max_open=None):
+    """
+    Cell-wise statistics over many aligned rasters (e.g., time steps) like arcpy.sa.CellStatistics with
+    ignore_nodata, where every block of every raster is read once into one reused buffer per thread (constant
+    memory for any number of rasters)
+    :param file_names: LIST of raster file names, including directory
+    :param out_file_names: DICT of {"mean", "std", "min", "max", or "count": STR of target file name}
+    :param block_size: TUPLE of (x_size, y_size) of processing blocks and output tiles (default: (512, 512))
+    :param nan_value: FLOAT of the output no-data value (default: -9999.0)
+    :param n_threads: INT of threads (default: 4)
+    :param max_open: INT of open rasters per thread (default: None keeps all rasters open; fewer open rasters
+                     limit the file handles, but every block then reopens len(file_names) - max_open rasters)
+    :output: None (writes out_file_names) or -1 if the rasters are not aligned
+    """
+    reference = check_alignment(file_names)
+    if not reference:
+        return -1
+    stat_names = list(out_file_names.keys())
+    outputs = [create_output(out_file_names[stat], reference, block_size, nan_value=nan_value)
+               for stat in stat_names]
+    windows = get_block_windows(reference.RasterXSize, reference.RasterYSize, block_size)
+    reader = BlockReader(max_open=max_open or len(file_names))
+
+    def task(window, out_blocks):
+        shape = (window[3], window[2])
+        count = np.zeros(shape)
+        mean = np.zeros(shape)
+        m2 = np.zeros(shape)
+        minimum = np.full(shape, np.inf)
+        maximum = np.full(shape, -np.inf)
+        for file_name in file_names:
+            block = reader.read(file_name, window)
+            valid = ~np.isnan(block)
+            # Welford update of cells with data
+            count += valid
+            delta = np.where(valid, block - mean, 0.0)
+            mean += np.divide(delta, count, out=np.zeros(shape), where=valid)
+            m2 += delta * np.where(valid, block - mean, 0.0)
+            np.fmin(minimum, block, out=minimum)
+            np.fmax(maximum, block, out=maximum)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            results = {"count": count, "mean": mean, "std": np.sqrt(m2 / count), "min": minimum, "max": maximum}
+        for stat, out_block in zip(stat_names, out_blocks):
+            out_block[...] = results[stat]
+            out_block[count == 0] = nan_value
+
+    process_blocks(windows, task, outputs, n_threads=n_threads)
+    for out in outputs:
+        out.FlushCache()
+    outputs = None
+
+
+if __name__ == "__main__":
+    raster_dir = os.path.dirname(os.path.abspath(__file__)) + "/rasters/"
+    hydraulics = {"h": raster_dir + "h001000.tif", "u": raster_dir + "u001000.tif"}
+    # Froude number with unit conversion from feet to meter
+    evaluate("con(h > 0, (u * 0.3048) / sqrt(g * h * 0.3048))", hydraulics, raster_dir + "Fr1000cfs_blocks.tif",
+             constants={"g": 9.81})
+    # slackwater (1) where flow depth <= 1.4 and velocity <= 0.15, no-data elsewhere
+    evaluate("con((h <= 1.4) & (u <= 0.15), 1)", hydraulics, raster_dir + "slackwater_blocks.tif",
+             nan_value=0, rdtype=gdal.GDT_Byte)
@@ -1,12 +1,22 @@
-from flusstools.geotools.raster_mgmt import *
-# make sure to use exceptions
-gdal.UseExceptions()
+import sys
+import threading
+from lazy_import import lazy_import
+from profiling_hooks import profiled
+
+# import GDAL, numpy, and the flusstools raster helpers on first use (fast exit on argument errors)
+gdal = lazy_import("osgeo.gdal", on_import=lambda module: module.UseExceptions())  # make sure to use exceptions
+np = lazy_import("numpy")
+futures = lazy_import("concurrent.futures")
+raster_mgmt = lazy_import("flusstools.geotools.raster_mgmt")
+
+# bins of the fine histograms that compute_band_statistics rebins when the histogram range is not known upfront
+FINE_BINS = 1 << 16
 
 
 def how2use():
     # provide usage instructions for the script
     print("""
-    $ raster_band_info.py [ band number ] input-raster
+    $ raster_band_info.py [ band number ] input-raster [ --stats [ number of histogram bins ] ] [ --force ]
     """)
     # exit program if wrong input arguments provided
     sys.exit(1)
@@ -36,8 +46,262 @@ def get_color_bands(raster_band):
     return color_bands
 
 
+def get_block_windows(band):
+    """
+    :param band: osgeo.gdal.Band
+    :output: LIST of (x_offset, y_offset, x_size, y_size) TUPLEs in the native block size of the band
+    """
+    block_x, block_y = band.GetBlockSize()
+    return [(x_off, y_off, min(block_x, band.XSize - x_off), min(block_y, band.YSize - y_off))
+            for y_off in range(0, band.YSize, block_y) for x_off in range(0, band.XSize, block_x)]
+
+
+def dyadic_histogram(values, n_fine=FINE_BINS):
+    """
+    Histogram with a bin width of 2 ** k and bin edges at integer multiples of the width, so that histograms of
+    different value ranges merge without loss (see merge_dyadic)
+    :param values: ndarray (FLOAT) without np.nan
+    :param n_fine: INT of the maximum number of bins (default: FINE_BINS)
+    :output: DICT of k (INT exponent of the bin width), offset (INT index of the first bin), and counts (ndarray)
+    """
+    v_min = float(values.min())
+    v_max = float(values.max())
+    # smallest width that covers the value range with n_fine bins (bin indices stay below 2 ** 53)
+    magnitude = max(abs(v_min), abs(v_max), np.finfo(float).tiny)
+    k = int(np.floor(np.log2(magnitude))) - 40
+    if v_max > v_min:
+        k = max(k, int(np.ceil(np.log2((v_max - v_min) / (n_fine - 1)))))
+    while np.floor(v_max / 2.0 ** k) - np.floor(v_min / 2.0 ** k) >= n_fine:
+        k += 1
+    index = np.floor(values / 2.0 ** k).astype(np.int64)
+    offset = int(index.min())
+    return {"k": k, "offset": offset, "counts": np.bincount(index - offset).astype(np.int64)}
+
+
+def coarsen_dyadic(hist, k):
+    """
+    :param hist: DICT of a dyadic histogram (see dyadic_histogram)
+    :param k: INT exponent of the new bin width (>= hist["k"])
+    :output: DICT of the dyadic histogram with bin width 2 ** k
+    """
+    index = (hist["offset"] + np.arange(hist["counts"].size, dtype=np.int64)) >> (k - hist["k"])
+    offset = int(index[0])
+    return {"k": k, "offset": offset, "counts": np.bincount(index - offset, weights=hist["counts"]).astype(np.int64)}
+
+
+def merge_dyadic(total, hist, n_fine=FINE_BINS):
+    """
+    Merge a dyadic histogram into another one (in place), where the bin width grows if the merged range needs
+    more than n_fine bins
+    :param total: DICT of a dyadic histogram (see dyadic_histogram) or an empty DICT
+    :param hist: DICT of a dyadic histogram
+    :param n_fine: INT of the maximum number of bins (default: FINE_BINS)
+    """
+    if not total:
+        total.update(hist)
+        return
+    k = max(total["k"], hist["k"])
+    while True:
+        a = coarsen_dyadic(total, k)
+        b = coarsen_dyadic(hist, k)
+        offset = min(a["offset"], b["offset"])
+        size = max(a["offset"] + a["counts"].size, b["offset"] + b["counts"].size) - offset
+        if size <= n_fine:
+            break
+        k += 1
+    counts = np.zeros(size, dtype=np.int64)
+    counts[a["offset"] - offset:a["offset"] - offset + a["counts"].size] += a["counts"]
+    counts[b["offset"] - offset:b["offset"] - offset + b["counts"].size] += b["counts"]
+    total.update({"k": k, "offset": offset, "counts": counts})
+
+
+def rebin_dyadic(hist, hist_range, n_bins):
+    """
+    Rebin a dyadic histogram to n_bins equal bins, where the cumulative counts are interpolated linearly within
+    fine bins that contain a bin edge (exact if these fine bins are empty)
+    :param hist: DICT of a dyadic histogram (see dyadic_histogram)
+    :param hist_range: TUPLE of (min, max) histogram range that contains all values
+    :param n_bins: INT of histogram bins
+    :output: ndarray (INT64) of counts like numpy.histogram
+    """
+    lower, upper = hist_range
+    if upper <= lower:
+        # same convention as numpy.histogram for a constant band
+        lower, upper = lower - 0.5, upper + 0.5
+    fine_edges = (hist["offset"] + np.arange(hist["counts"].size + 1)) * 2.0 ** hist["k"]
+    cumulative = np.concatenate(([0], np.cumsum(hist["counts"])))
+    edge_counts = np.round(np.interp(np.linspace(lower, upper, n_bins + 1), fine_edges, cumulative))
+    edge_counts[0] = 0
+    edge_counts[-1] = cumulative[-1]
+    return np.diff(edge_counts).astype(np.int64)
+
+
+def read_block_stats(file_name, band_number, window, hist_range, n_bins, thread_data, fine_hists=None):
+    """
+    Read one block (every thread uses its own dataset because GDAL datasets are not thread-safe)
+    :param file_name: STR of a raster file name, including directory
+    :param band_number: INT of the band number
+    :param window: TUPLE of (x_offset, y_offset, x_size, y_size)
+    :param hist_range: TUPLE of (min, max) histogram range or None (no histogram of the block)
+    :param n_bins: INT of histogram bins
+    :param thread_data: threading.local to hold the dataset (and the fine histogram) of the thread
+    :param fine_hists: LIST that collects one dyadic histogram per thread, which the blocks are merged into if
+                       hist_range is None (default: None)
+    :output: DICT of count, mean, m2 (sum of squared deviations), min, max, nodata, and hist of the block
+    """
+    if not hasattr(thread_data, "datasets"):
+        thread_data.datasets = {}
+    if file_name not in thread_data.datasets:
+        thread_data.datasets[file_name] = gdal.Open(file_name)
+    band = thread_data.datasets[file_name].GetRasterBand(band_number)
+    block = band.ReadAsArray(*window).astype(np.float64).ravel()
+    invalid = np.isnan(block)
+    if band.GetNoDataValue() is not None:
+        invalid |= block == band.GetNoDataValue()
+    values = block[~invalid]
+    stats = {"count": values.size, "nodata": int(invalid.sum()), "mean": 0.0, "m2": 0.0,
+             "min": np.inf, "max": -np.inf, "hist": None}
+    if values.size:
+        stats["mean"] = values.mean()
+        stats["m2"] = ((values - stats["mean"]) ** 2).sum()
+        stats["min"] = values.min()
+        stats["max"] = values.max()
+    if hist_range is not None:
+        stats["hist"] = np.histogram(values, bins=n_bins, range=hist_range)[0]
+    elif fine_hists is not None and values.size:
+        if not hasattr(thread_data, "fine_hist"):
+            thread_data.fine_hist = {}
+            fine_hists.append(thread_data.fine_hist)
+        merge_dyadic(thread_data.fine_hist, dyadic_histogram(values))
+    return stats
+
+
+def merge_stats(total, block):
+    """
+    Merge the statistics of a block into running statistics (parallel Welford / Chan et al. update)
+    :param total: DICT of running statistics (see read_block_stats)
+    :param block: DICT of block statistics (see read_block_stats)
+    :output: DICT of merged statistics
+    """
+    count = total["count"] + block["count"]
+    if block["count"]:
+        delta = block["mean"] - total["mean"]
+        total["mean"] += delta * block["count"] / count
+        total["m2"] += block["m2"] + delta ** 2 * total["count"] * block["count"] / count
+    total["count"] = count
+    total["nodata"] += block["nodata"]
+    total["min"] = min(total["min"], block["min"])
+    total["max"] = max(total["max"], block["max"])
+    if block["hist"] is not None:
+        total["hist"] = block["hist"] if total["hist"] is None else total["hist"] + block["hist"]
+    return total
+
+
+@profiled(n_items=lambda stats, *args, **kwargs: stats["count"] + stats["nodata"], unit="cells")
+def compute_band_statistics(file_name, band_number, n_bins=256, hist_range=None, n_threads=4,
+                            exact_histogram=False):
+    """
+    Compute exact statistics and a histogram of a raster band in one pass by streaming its native blocks through
+    a thread pool (GDAL releases the GIL while reading)
+    :param file_name: STR of a raster file name, including directory
+    :param band_number: INT of the band number
+    :param n_bins: INT of histogram bins (default: 256)
+    :param hist_range: TUPLE of (min, max) histogram range (default: None uses the band minimum and maximum, where
+                       the histogram is rebinned from fine histograms with FINE_BINS bins per thread, so that
+                       only values in the fine bins at the histogram bin edges may be counted in a neighbor bin)
+    :param n_threads: INT of reading threads (default: 4)
+    :param exact_histogram: BOOL to compute the histogram of hist_range=None in a second pass over all blocks
+                            instead of rebinning (default: False)
+    :output: DICT of count, nodata, min, max, mean, std, hist, and hist_range
+    """
+    src = gdal.Open(file_name)
+    windows = get_block_windows(src.GetRasterBand(band_number))
+    src = None
+    thread_data = threading.local()
+    fine_hists = []
+
+    def run_pass(pass_range, collect_fine):
+        total = {"count": 0, "nodata": 0, "mean": 0.0, "m2": 0.0, "min": np.inf, "max": -np.inf, "hist": None}
+        with futures.ThreadPoolExecutor(max_workers=n_threads) as executor:
+            for block in executor.map(lambda w: read_block_stats(file_name, band_number, w, pass_range, n_bins,
+                                                                 thread_data, fine_hists if collect_fine else None),
+                                      windows):
+                total = merge_stats(total, block)
+        return total
+
+    stats = run_pass(hist_range, collect_fine=hist_range is None and not exact_histogram)
+    if hist_range is None and stats["count"]:
+        hist_range = (stats["min"], stats["max"])
+        if exact_histogram:
+            stats["hist"] = run_pass(hist_range, collect_fine=False)["hist"]
+        else:
+            fine_hist = {}
+            for thread_hist in fine_hists:
+                merge_dyadic(fine_hist, thread_hist)
+            stats["hist"] = rebin_dyadic(fine_hist, hist_range, n_bins)
+    stats["std"] = np.sqrt(stats["m2"] / stats["count"]) if stats["count"] else np.nan
+    stats["hist_range"] = hist_range
+    return stats
+
+
+def write_statistics(file_name, band_number, stats):
+    """
+    Store statistics and histogram of a band (as PAM .aux.xml file for read-only datasets)
+    :param file_name: STR of a raster file name, including directory
+    :param band_number: INT of the band number
+    :param stats: DICT of statistics (see compute_band_statistics), which are not stored if the band has no valid
+                  pixels (count = 0)
+    """
+    if not stats["count"]:
+        # min = inf and max = -inf would be stored as valid statistics otherwise
+        print("WARNING: Band %i of %s has no valid pixels (no statistics stored)." % (band_number, file_name))
+        return
+    src = gdal.Open(file_name)
+    band = src.GetRasterBand(band_number)
+    band.SetStatistics(float(stats["min"]), float(stats["max"]), float(stats["mean"]), float(stats["std"]))
+    band.SetMetadataItem("STATISTICS_NODATA_COUNT", str(stats["nodata"]))
+    if stats["hist"] is not None:
+        band.SetDefaultHistogram(float(stats["hist_range"][0]), float(stats["hist_range"][1]),
+                                 [int(c) for c in stats["hist"]])
+    band = None
+    src = None
+
+
+def get_stored_statistics(band):
+    """
+    :param band: osgeo.gdal.Band
+    :output: LIST of [min, max, mean, std] stored with the raster (or None if no statistics are stored)
+    """
+    try:
+        stats = band.GetStatistics(False, False)
+    except RuntimeError:
+        return None
+    if stats is None or stats[3] < 0:
+        return None
+    return stats
+
+
+def print_statistics(input_file, n_bins=256, force=False):
+    """
+    Print statistics of all bands, where missing statistics are computed block-wise and stored for later runs
+    :param input_file: STR of a raster file name, including directory
+    :param n_bins: INT of histogram bins (default: 256)
+    :param force: BOOL to recompute stored statistics (default: False)
+    """
+    src = gdal.Open(input_file)
+    for band_number in range(1, src.RasterCount + 1):
+        stored = None if force else get_stored_statistics(src.GetRasterBand(band_number))
+        if stored is None:
+            stats = compute_band_statistics(input_file, band_number, n_bins=n_bins)
+            write_statistics(input_file, band_number, stats)
+            stored = [stats["min"], stats["max"], stats["mean"], stats["std"]]
+            print("Band %i (computed): nodata pixels = %i" % (band_number, stats["nodata"]))
+        print("Band %i: min = %s, max = %s, mean = %s, std = %s" % tuple([band_number] + [str(v) for v in stored]))
+    src = None
+
+
 def main(band_number, input_file):
-    src, band = open_raster(input_file)
+    src, band = raster_mgmt.open_raster(input_file)
     print("Band minimum: ", band.GetMinimum())
     print("Band maximum: ", band.GetMaximum())
     print("No-data value: ", band.GetNoDataValue())
@@ -56,7 +320,12 @@ if __name__ == '__main__':
         ERROR: Provide two arguments:
         1) the band number (int) and 2) input raster directory (str)
         """)
-        print("Received: (1)" + str(sys.argv[1]) + " (2) " + str(sys.argv[2]))
+        print("Received: " + " ".join("(%i) %s" % (i, arg) for i, arg in enumerate(sys.argv[1:], 1)))
         how2use()
 
-    main(int(sys.argv[1]), str(sys.argv[2]))
+    if "--stats" in sys.argv:
+        stats_args = sys.argv[sys.argv.index("--stats") + 1:]
+        bins = int(stats_args[0]) if stats_args and stats_args[0].isdigit() else 256
+        print_statistics(str(sys.argv[2]), n_bins=bins, force="--force" in sys.argv)
+    else:
+        main(int(sys.argv[1]), str(sys.argv[2]))
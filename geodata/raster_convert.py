@@ -0,0 +1,470 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from osgeo import gdal, ogr, osr
+from feature_writer import write_features
+from raster_algebra import get_block_windows
+
+gdal.UseExceptions()
+ogr.UseExceptions()
+
+# WKB of a 2d multi-line string (header) with 2-point line strings (segments)
+multi_line_wkb_dtype = np.dtype([("byte_order", "u1"), ("wkb_type", "<u4"), ("n_lines", "<u4")])
+segment_wkb_dtype = np.dtype([("byte_order", "u1"), ("wkb_type", "<u4"), ("n_points", "<u4"),
+                              ("x1", "<f8"), ("y1", "<f8"), ("x2", "<f8"), ("y2", "<f8")])
+
+# pixel neighbours (row, column) of 8-connected lines that are not counted twice
+line_neighbours = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+# polygonized tiles are Int32: pixel values are clipped to INT32_MIN + 1 ... INT32_MAX, and INT32_MIN marks
+# no-data pixels if the no-data value of the band is not an Int32 (e.g., the GDAL Float32 default -3.4e38)
+INT32_MIN, INT32_MAX = int(np.iinfo(np.int32).min), int(np.iinfo(np.int32).max)
+
+
+def offset2coords(geo_transform, offset_x, offset_y):
+    """
+    Returns x-y coordinates of pixel centers
+    :param geo_transform: osgeo.gdal.Dataset.GetGeoTransform() object
+    :param offset_x: INT or ndarray (INT) of pixel column offsets
+    :param offset_y: INT or ndarray (INT) of pixel row offsets
+    :return: coord_x, coord_y (both FLOAT or ndarray)
+    """
+    offset_x = np.asarray(offset_x) + 0.5
+    offset_y = np.asarray(offset_y) + 0.5
+    coord_x = geo_transform[0] + geo_transform[1] * offset_x + geo_transform[2] * offset_y
+    coord_y = geo_transform[3] + geo_transform[4] * offset_x + geo_transform[5] * offset_y
+    return coord_x, coord_y
+
+
+def get_epsg(wkt):
+    """
+    :param wkt: STR of a spatial reference WKT (e.g., osgeo.gdal.Dataset.GetProjection())
+    :output: INT of the EPSG code or None if it cannot be identified
+    """
+    if not wkt:
+        return None
+    srs = osr.SpatialReference()
+    srs.ImportFromWkt(wkt)
+    try:
+        srs.AutoIdentifyEPSG()
+    except RuntimeError:
+        return None
+    code = srs.GetAuthorityCode(None)
+    return int(code) if code else None
+
+
+def get_tile_geo_transform(geo_transform, window):
+    """
+    :param geo_transform: osgeo.gdal.Dataset.GetGeoTransform() object
+    :param window: TUPLE of (x_offset, y_offset, x_size, y_size)
+    :output: TUPLE of the GeoTransform of the window
+    """
+    origin_x, origin_y = offset2coords(geo_transform, window[0] - 0.5, window[1] - 0.5)
+    return (float(origin_x), geo_transform[1], geo_transform[2], float(origin_y), geo_transform[4], geo_transform[5])
+
+
+def line_segments_strip(file_name, band_number, pixel_value, y_offset, n_rows):
+    """
+    Find the segments between 8-connected pixels with pixel_value starting in a strip of rows
+    :param file_name: STR of a raster file name, including directory
+    :param band_number: INT of the raster band number
+    :param pixel_value: INT/FLOAT of a pixel value
+    :param y_offset: INT of the first row of the strip
+    :param n_rows: INT of rows in the strip
+    :output: ndarray of shape (n, 4) with x1, y1, x2, y2 coordinates of segments
+    """
+    raster = gdal.Open(file_name)
+    band = raster.GetRasterBand(band_number)
+    # read one more row to connect pixels with the next strip
+    n_read = min(n_rows + 1, raster.RasterYSize - y_offset)
+    mask = band.ReadAsArray(0, y_offset, raster.RasterXSize, n_read) == pixel_value
+    rows, cols = np.nonzero(mask[:n_rows])
+    segments = []
+    for d_row, d_col in line_neighbours:
+        rows2 = rows + d_row
+        cols2 = cols + d_col
+        valid = (rows2 < n_read) & (cols2 >= 0) & (cols2 < raster.RasterXSize)
+        valid[valid] = mask[rows2[valid], cols2[valid]]
+        x1, y1 = offset2coords(raster.GetGeoTransform(), cols[valid], rows[valid] + y_offset)
+        x2, y2 = offset2coords(raster.GetGeoTransform(), cols2[valid], rows2[valid] + y_offset)
+        segments.append(np.column_stack((x1, y1, x2, y2)))
+    return np.concatenate(segments)
+
+
+def segments2wkb(segments):
+    """
+    :param segments: ndarray of shape (n, 4) with x1, y1, x2, y2 coordinates of segments
+    :output: BYTES of a multi-line string WKB with one line string per segment
+    """
+    header = np.zeros(1, dtype=multi_line_wkb_dtype)
+    header["byte_order"] = 1
+    header["wkb_type"] = ogr.wkbMultiLineString
+    header["n_lines"] = segments.shape[0]
+    lines = np.empty(segments.shape[0], dtype=segment_wkb_dtype)
+    lines["byte_order"] = 1
+    lines["wkb_type"] = ogr.wkbLineString
+    lines["n_points"] = 2
+    for i, name in enumerate(("x1", "y1", "x2", "y2")):
+        lines[name] = segments[:, i]
+    return header.tobytes() + lines.tobytes()
+
+
+def raster2line(raster_file_name, out_shp_fn, pixel_value, band_number=1, strip_rows=1024, n_workers=1):
+    """
+    Convert a raster to a line shapefile, where pixel_value determines line start and end points
+    :param raster_file_name: STR of input raster file name, including directory; must end on ".tif"
+    :param out_shp_fn: STR of target shapefile name, including directory; must end on ".shp"
+    :param pixel_value: INT/FLOAT of a pixel value
+    :param band_number: INT of the raster band number to open (default: 1)
+    :param strip_rows: INT of raster rows processed at a time (default: 1024)
+    :param n_workers: INT of worker processes (default: 1 runs in this process; None uses the number of CPUs)
+    :return: None (writes new shapefile).
+    """
+    raster = gdal.Open(raster_file_name)
+    y_offsets = list(range(0, raster.RasterYSize, strip_rows))
+    n_rows = [min(strip_rows, raster.RasterYSize - y_offset) for y_offset in y_offsets]
+    args = ([raster_file_name] * len(y_offsets), [band_number] * len(y_offsets), [pixel_value] * len(y_offsets),
+            y_offsets, n_rows)
+    if n_workers == 1:
+        segments = list(map(line_segments_strip, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            segments = list(executor.map(line_segments_strip, *args))
+    segments = np.concatenate(segments)
+    if segments.shape[0] == 0:
+        print("ERROR: The defined pixel_value (%s) does not occur in the raster band." % str(pixel_value))
+        return None
+
+    write_features(out_shp_fn, [(segments2wkb(segments), {})], layer_type="multiline",
+                   epsg=get_epsg(raster.GetProjection()), layer_name="raster_pts")
+    print("Success: Wrote %s" % str(out_shp_fn))
+
+
+def to_int32_tile(array, no_data):
+    """
+    Convert the pixel values of a tile to integers without overflows
+    :param array: ndarray of pixel values
+    :param no_data: INT/FLOAT of the band no-data value or None
+    :output: ndarray (INT32) of pixel values and INT of the no-data value in the ndarray
+    """
+    invalid = np.isnan(array) if np.issubdtype(array.dtype, np.floating) else np.zeros(array.shape, dtype=bool)
+    if no_data is None:
+        tile_no_data = -9999
+    else:
+        invalid |= array == no_data
+        tile_no_data = int(no_data) if INT32_MIN < no_data <= INT32_MAX else INT32_MIN
+    # clip in FLOAT64 or INT64 (FLOAT32 cannot represent INT32_MAX)
+    tile = np.where(invalid, 0, array).astype(np.float64 if np.issubdtype(array.dtype, np.floating) else np.int64)
+    tile = np.clip(tile, INT32_MIN + 1, INT32_MAX).astype(np.int32)
+    tile[invalid] = tile_no_data
+    return tile, tile_no_data
+
+
+def polygonize_tile(file_name, band_number, window, skip_no_data=False):
+    """
+    Polygonize one window of a raster band, where pixel values are converted to integers (see to_int32_tile)
+    :param file_name: STR of a raster file name, including directory
+    :param band_number: INT of the raster band number
+    :param window: TUPLE of (x_offset, y_offset, x_size, y_size)
+    :param skip_no_data: BOOL to not create polygons of no-data pixels (default: False)
+    :output: LIST of (BYTES of polygon WKB, INT of pixel value) TUPLEs
+    """
+    raster = gdal.Open(file_name)
+    band = raster.GetRasterBand(band_number)
+    array = band.ReadAsArray(*window)
+    no_data = band.GetNoDataValue()
+    array, tile_no_data = to_int32_tile(array, no_data)
+
+    tile = gdal.GetDriverByName("MEM").Create("", window[2], window[3], 1, gdal.GDT_Int32)
+    tile.SetGeoTransform(get_tile_geo_transform(raster.GetGeoTransform(), window))
+    tile_band = tile.GetRasterBand(1)
+    tile_band.WriteArray(array)
+    mask_band = None
+    if skip_no_data and no_data is not None:
+        tile_band.SetNoDataValue(tile_no_data)
+        mask_band = tile_band.GetMaskBand()
+
+    polygons = ogr.GetDriverByName("Memory").CreateDataSource("")
+    lyr = polygons.CreateLayer("tile", None, ogr.wkbPolygon)
+    lyr.CreateField(ogr.FieldDefn("values", ogr.OFTInteger))
+    gdal.Polygonize(tile_band, mask_band, lyr, 0, [], callback=None)
+    return [(bytes(feature.GetGeometryRef().ExportToWkb()), feature.GetField(0)) for feature in lyr]
+
+
+def get_seams(geo_transform, windows):
+    """
+    :param geo_transform: osgeo.gdal.Dataset.GetGeoTransform() object (north-up)
+    :param windows: LIST of (x_offset, y_offset, x_size, y_size) TUPLEs
+    :output: ndarray of x-coordinates and ndarray of y-coordinates of tile borders inside the raster
+    """
+    x_offsets = np.unique([window[0] for window in windows])[1:]
+    y_offsets = np.unique([window[1] for window in windows])[1:]
+    return geo_transform[0] + geo_transform[1] * x_offsets, geo_transform[3] + geo_transform[5] * y_offsets
+
+
+def touches_seam(envelope, seams_x, seams_y, tolerance):
+    """
+    :param envelope: TUPLE of (x_min, x_max, y_min, y_max) of a polygon
+    :param seams_x: ndarray of x-coordinates of vertical tile borders
+    :param seams_y: ndarray of y-coordinates of horizontal tile borders
+    :param tolerance: FLOAT of the coordinate tolerance (e.g., a tenth of a pixel)
+    :output: BOOL
+    """
+    return bool(np.any(np.abs(seams_x - envelope[0]) < tolerance) or np.any(np.abs(seams_x - envelope[1]) < tolerance)
+                or np.any(np.abs(seams_y - envelope[2]) < tolerance)
+                or np.any(np.abs(seams_y - envelope[3]) < tolerance))
+
+
+def get_tile_rows(windows):
+    """
+    :param windows: LIST of (x_offset, y_offset, x_size, y_size) TUPLEs in row-major order (see get_block_windows)
+    :output: LIST of LISTs of the windows of one tile row (from top to bottom)
+    """
+    tile_rows = []
+    for window in windows:
+        if not tile_rows or tile_rows[-1][0][1] != window[1]:
+            tile_rows.append([])
+        tile_rows[-1].append(window)
+    return tile_rows
+
+
+def get_polygons(geometry):
+    """
+    :param geometry: osgeo.ogr.Geometry of a polygon or multi-polygon
+    :output: LIST of osgeo.ogr.Geometry polygons
+    """
+    if ogr.GT_Flatten(geometry.GetGeometryType()) == ogr.wkbPolygon:
+        return [geometry]
+    return [geometry.GetGeometryRef(i).Clone() for i in range(geometry.GetGeometryCount())]
+
+
+def stitch_polygons(row_results, seams_x, seams_y, tolerance):
+    """
+    Pass through polygons inside tiles and merge polygons of the same value across tile borders, one tile row at a
+    time: merged polygons are passed on once they do not touch the bottom border of the tile row, so that only
+    polygons that continue in the next tile row are kept
+    :param row_results: iterable of LISTs (one per tile row from top to bottom) of LISTs (one per tile) of
+                        (BYTES of polygon WKB, INT of pixel value) TUPLEs
+    :param seams_x: ndarray of x-coordinates of vertical tile borders
+    :param seams_y: ndarray of y-coordinates of horizontal tile borders (from top to bottom, see get_seams)
+    :param tolerance: FLOAT of the coordinate tolerance
+    :output: generator of (polygon WKB or osgeo.ogr.Geometry, INT of pixel value) TUPLEs
+    """
+    open_polygons = {}
+    for row, tile_results in enumerate(row_results):
+        seam_polygons = open_polygons
+        open_polygons = {}
+        for polygons in tile_results:
+            for wkb, value in polygons:
+                polygon = ogr.CreateGeometryFromWkb(wkb)
+                if touches_seam(polygon.GetEnvelope(), seams_x, seams_y, tolerance):
+                    seam_polygons.setdefault(value, ogr.Geometry(ogr.wkbMultiPolygon)).AddGeometry(polygon)
+                else:
+                    yield wkb, value
+        # the bottom border of the last tile row is not a seam
+        bottom_seam = seams_y[row:row + 1]
+        for value, multi_polygon in seam_polygons.items():
+            for polygon in get_polygons(multi_polygon.UnaryUnion()):
+                if np.any(np.abs(bottom_seam - polygon.GetEnvelope()[2]) < tolerance):
+                    open_polygons.setdefault(value, ogr.Geometry(ogr.wkbMultiPolygon)).AddGeometry(polygon)
+                else:
+                    yield polygon, value
+
+
+def raster2polygon(file_name, out_shp_fn, band_number=1, field_name="values", tile_size=2048, n_workers=1,
+                   skip_no_data=False):
+    """
+    Convert a raster to polygon, where tiles are polygonized (optionally in parallel) and polygons are merged
+    across tile borders
+    :param file_name: STR of target file name, including directory; must end on ".tif"
+    :param out_shp_fn: STR of a shapefile name (with directory e.g., "C:/temp/poly.shp")
+    :param band_number: INT of the raster band number to open (default: 1)
+    :param field_name: STR of the field where raster pixel values will be stored (default: "values")
+    :param tile_size: INT of tile width and height in pixels (default: 2048)
+    :param n_workers: INT of worker processes (default: 1 runs in this process; None uses the number of CPUs)
+    :param skip_no_data: BOOL to not create polygons of no-data pixels (default: False)
+    :return: INT of written polygons (or None if file_name cannot be opened)
+    """
+    try:
+        raster = gdal.Open(file_name)
+    except RuntimeError as e:
+        print("ERROR: Cannot open raster.")
+        print(e)
+        return None
+    geo_transform = raster.GetGeoTransform()
+    windows = get_block_windows(raster.RasterXSize, raster.RasterYSize, (tile_size, tile_size))
+    seams_x, seams_y = get_seams(geo_transform, windows)
+    tolerance = abs(geo_transform[1]) / 10
+
+    def polygonize_rows(map_function):
+        # polygonize one tile row at a time (in parallel within the row) to hold the results of one row only
+        for row_windows in get_tile_rows(windows):
+            n = len(row_windows)
+            yield list(map_function(polygonize_tile, [file_name] * n, [band_number] * n, row_windows,
+                                    [skip_no_data] * n))
+
+    if n_workers == 1:
+        n_polygons = write_features(out_shp_fn, stitch_polygons(polygonize_rows(map), seams_x, seams_y, tolerance),
+                                    layer_type="polygon", fields={field_name: ogr.OFTInteger},
+                                    epsg=get_epsg(raster.GetProjection()), layer_name="raster_data")
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            n_polygons = write_features(out_shp_fn, stitch_polygons(polygonize_rows(executor.map), seams_x, seams_y,
+                                                                    tolerance),
+                                        layer_type="polygon", fields={field_name: ogr.OFTInteger},
+                                        epsg=get_epsg(raster.GetProjection()), layer_name="raster_data")
+    print("Success: Wrote %s" % str(out_shp_fn))
+    return n_polygons
+
+
+def rasterize_tile(in_shp_file_name, window, geo_transform, no_data_value, rdtype, field_name=None):
+    """
+    Rasterize the features of a shapefile that intersect one window of the target raster
+    :param in_shp_file_name: STR of a shapefile name
+    :param window: TUPLE of (x_offset, y_offset, x_size, y_size)
+    :param geo_transform: TUPLE of the target raster GeoTransform
+    :param no_data_value: Numeric (INT/FLOAT) for no-data pixels
+    :param rdtype: gdal.GDALDataType raster data type
+    :param field_name: STR of the field with values to burn (default: None burns 1)
+    :output: ndarray of the window
+    """
+    source_ds = ogr.Open(in_shp_file_name)
+    source_lyr = source_ds.GetLayer()
+    tile_geo_transform = get_tile_geo_transform(geo_transform, window)
+    source_lyr.SetSpatialFilterRect(tile_geo_transform[0], tile_geo_transform[3] + geo_transform[5] * window[3],
+                                    tile_geo_transform[0] + geo_transform[1] * window[2], tile_geo_transform[3])
+    tile = gdal.GetDriverByName("MEM").Create("", window[2], window[3], 1, rdtype)
+    tile.SetGeoTransform(tile_geo_transform)
+    tile.GetRasterBand(1).Fill(no_data_value)
+    options = ["ALL_TOUCHED=TRUE"]
+    if field_name:
+        options.append("ATTRIBUTE=" + str(field_name))
+    gdal.RasterizeLayer(tile, [1], source_lyr, None, None, burn_values=[1], options=options)
+    return tile.GetRasterBand(1).ReadAsArray()
+
+
+def rasterize(in_shp_file_name, out_raster_file_name, pixel_size=10, no_data_value=-9999,
+              rdtype=gdal.GDT_Float32, tile_size=2048, n_workers=1, **kwargs):
+    """
+    Converts any shapefile to a tiled and compressed raster, where tiles are rasterized (optionally in parallel)
+    :param in_shp_file_name: STR of a shapefile name (with directory e.g., "C:/temp/poly.shp")
+    :param out_raster_file_name: STR of target file name, including directory; must end on ".tif"
+    :param pixel_size: INT of pixel size (default: 10)
+    :param no_data_value: Numeric (INT/FLOAT) for no-data pixels (default: -9999)
+    :param rdtype: gdal.GDALDataType raster data type - default=gdal.GDT_Float32 (32 bit floating point)
+    :param tile_size: INT of tile width and height in pixels (multiple of 16, default: 2048)
+    :param n_workers: INT of worker processes (default: 1 runs in this process; None uses the number of CPUs)
+    :kwarg field_name: name of the shapefile's field with values to burn to the raster (default: burn 1)
+    :return: None (writes out_raster_file_name)
+    """
+    try:
+        source_ds = ogr.Open(in_shp_file_name)
+    except RuntimeError as e:
+        print("Error: Could not open %s." % str(in_shp_file_name))
+        print(e)
+        return None
+    source_lyr = source_ds.GetLayer()
+    x_min, x_max, y_min, y_max = source_lyr.GetExtent()
+    x_res = int(np.ceil((x_max - x_min) / pixel_size))
+    y_res = int(np.ceil((y_max - y_min) / pixel_size))
+    geo_transform = (x_min, pixel_size, 0, y_max, 0, -pixel_size)
+
+    target_ds = gdal.GetDriverByName("GTiff").Create(out_raster_file_name, x_res, y_res, 1, eType=rdtype,
+                                                     options=["TILED=YES", "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER",
+                                                              "BLOCKXSIZE=256", "BLOCKYSIZE=256"])
+    target_ds.SetGeoTransform(geo_transform)
+    srs = source_lyr.GetSpatialRef()
+    if srs:
+        target_ds.SetProjection(srs.ExportToWkt())
+    band = target_ds.GetRasterBand(1)
+    band.SetNoDataValue(no_data_value)
+    source_ds = None
+
+    windows = get_block_windows(x_res, y_res, (tile_size, tile_size))
+    args = ([in_shp_file_name] * len(windows), windows, [geo_transform] * len(windows),
+            [no_data_value] * len(windows), [rdtype] * len(windows), [kwargs.get("field_name")] * len(windows))
+    if n_workers == 1:
+        for window, array in zip(windows, map(rasterize_tile, *args)):
+            band.WriteArray(array, window[0], window[1])
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for window, array in zip(windows, executor.map(rasterize_tile, *args)):
+                band.WriteArray(array, window[0], window[1])
+
+    # release raster band
+    band.FlushCache()
+    target_ds = None
+
+
+def create_synthetic_mask(file_name, n_pixels=20000, block_size=2048):
+    """
+    Write a synthetic n_pixels x n_pixels Byte mask (1 = inundated) of irregular patches, block by block
+    :param file_name: STR of target file name, including directory; must end on ".tif"
+    :param n_pixels: INT of raster columns and rows (default: 20000)
+    :param block_size: INT of rows and columns written at a time (default: 2048)
+    """
+    raster = gdal.GetDriverByName("GTiff").Create(file_name, n_pixels, n_pixels, 1, gdal.GDT_Byte,
+                                                  options=["TILED=YES", "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER"])
+    raster.SetGeoTransform((400000.0, 1.0, 0, 5300000.0, 0, -1.0))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(25832)
+    raster.SetProjection(srs.ExportToWkt())
+    band = raster.GetRasterBand(1)
+    band.SetNoDataValue(0)
+    for x_off, y_off, x_size, y_size in get_block_windows(n_pixels, n_pixels, (block_size, block_size)):
+        y, x = np.mgrid[y_off:y_off + y_size, x_off:x_off + x_size]
+        patches = np.sin(x / 370.0) + np.cos(y / 290.0) + 0.5 * np.sin((x + y) / 97.0)
+        band.WriteArray((patches > 0.9).astype(np.uint8), x_off, y_off)
+    band.FlushCache()
+    raster = None
+
+
+def benchmark(n_pixels=20000, tile_size=2048, n_workers=None):
+    """
+    Print the run times of whole-raster and tiled (serial and parallel) conversions of
+    rasters/least-cost.tif and a synthetic n_pixels x n_pixels mask
+    :param n_pixels: INT of synthetic mask columns and rows (default: 20000)
+    :param tile_size: INT of tile width and height in pixels (default: 2048)
+    :param n_workers: INT of worker processes for parallel runs (default: None uses the number of CPUs)
+    """
+    import tempfile
+    import time
+    tmp_dir = tempfile.mkdtemp()
+
+    def timed(label, function, *args, **kwargs):
+        t_start = time.perf_counter()
+        result = function(*args, **kwargs)
+        print("%-45s %10.2f s" % (label, time.perf_counter() - t_start))
+        return result
+
+    least_cost = os.path.dirname(os.path.abspath(__file__)) + "/rasters/least-cost.tif"
+    timed("least-cost raster2line", raster2line, least_cost, os.path.join(tmp_dir, "lc_line.shp"), 1)
+    timed("least-cost raster2polygon (whole raster)", raster2polygon, least_cost,
+          os.path.join(tmp_dir, "lc_whole.shp"), tile_size=max(gdal.Open(least_cost).RasterXSize,
+                                                               gdal.Open(least_cost).RasterYSize))
+    timed("least-cost raster2polygon (tiles=256)", raster2polygon, least_cost,
+          os.path.join(tmp_dir, "lc_tiles.shp"), tile_size=256)
+
+    mask = os.path.join(tmp_dir, "mask.tif")
+    timed("synthetic mask %ix%i (create)" % (n_pixels, n_pixels), create_synthetic_mask, mask, n_pixels)
+    timed("synthetic raster2polygon (whole raster)", raster2polygon, mask, os.path.join(tmp_dir, "m_whole.shp"),
+          tile_size=n_pixels, skip_no_data=True)
+    timed("synthetic raster2polygon (tiles, serial)", raster2polygon, mask, os.path.join(tmp_dir, "m_serial.shp"),
+          tile_size=tile_size, skip_no_data=True)
+    timed("synthetic raster2polygon (tiles, parallel)", raster2polygon, mask, os.path.join(tmp_dir, "m_tiles.shp"),
+          tile_size=tile_size, n_workers=n_workers, skip_no_data=True)
+    timed("synthetic rasterize (serial)", rasterize, os.path.join(tmp_dir, "m_tiles.shp"),
+          os.path.join(tmp_dir, "m_serial.tif"), pixel_size=1, rdtype=gdal.GDT_Byte, no_data_value=0,
+          tile_size=tile_size)
+    timed("synthetic rasterize (parallel)", rasterize, os.path.join(tmp_dir, "m_tiles.shp"),
+          os.path.join(tmp_dir, "m_parallel.tif"), pixel_size=1, rdtype=gdal.GDT_Byte, no_data_value=0,
+          tile_size=tile_size, n_workers=n_workers)
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        raster_dir = os.path.dirname(os.path.abspath(__file__)) + "/rasters/"
+        raster2line(raster_dir + "least-cost.tif", os.path.dirname(raster_dir[:-1]) + "/shapefiles/least-cost.shp", 1)
@@ -0,0 +1,205 @@
+import os
+import sys
+import numpy as np
+from osgeo import gdal, osr
+
+gdal.UseExceptions()
+
+# output profiles: "gtiff" = plain (untiled) GeoTIFF, "cog" = Cloud-Optimized GeoTIFF with internal overviews
+output_profiles = ("gtiff", "cog")
+
+
+def get_compression(compress="ZSTD"):
+    """
+    :param compress: STR of the preferred compression (default: "ZSTD")
+    :output: STR of compress if the GDAL build supports it, otherwise "DEFLATE"
+    """
+    options = gdal.GetDriverByName("GTiff").GetMetadataItem("DMD_CREATIONOPTIONLIST") or ""
+    return compress if compress in options else "DEFLATE"
+
+
+def get_predictor(rdtype):
+    """
+    :param rdtype: gdal.GDALDataType raster data type
+    :output: INT of the TIFF predictor (3 = floating point for real float types, 2 = horizontal differencing for
+             integer types) or None for complex types (no predictor)
+    """
+    if gdal.DataTypeIsComplex(rdtype):
+        return None
+    return 3 if gdal.GetDataTypeName(rdtype).startswith("Float") else 2
+
+
+def get_cog_options(rdtype, compress="ZSTD", block_size=512, resampling="AVERAGE"):
+    """
+    :param rdtype: gdal.GDALDataType raster data type
+    :param compress: STR of the compression (default: "ZSTD", falls back to "DEFLATE")
+    :param block_size: INT of tile width and height in pixels (default: 512)
+    :param resampling: STR of the overview resampling method (default: "AVERAGE")
+    :output: LIST of COG driver creation options
+    """
+    options = ["COMPRESS=%s" % get_compression(compress), "BLOCKSIZE=%i" % block_size, "OVERVIEWS=AUTO",
+               "RESAMPLING=%s" % resampling, "BIGTIFF=IF_SAFER", "NUM_THREADS=ALL_CPUS"]
+    predictor = get_predictor(rdtype)
+    if predictor:
+        options.append("PREDICTOR=%i" % predictor)
+    return options
+
+
+def write_cog(file_name, dataset, compress="ZSTD", block_size=512, resampling="AVERAGE"):
+    """
+    Copy a (in-memory) dataset to a Cloud-Optimized GeoTIFF with tiles and internal overviews
+    :param file_name: STR of target file name, including directory; must end on ".tif"
+    :param dataset: osgeo.gdal.Dataset to copy
+    :param compress: STR of the compression (default: "ZSTD", falls back to "DEFLATE")
+    :param block_size: INT of tile width and height in pixels (default: 512)
+    :param resampling: STR of the overview resampling method (default: "AVERAGE")
+    :output: osgeo.gdal.Dataset (COG)
+    """
+    rdtype = dataset.GetRasterBand(1).DataType
+    options = get_cog_options(rdtype, compress=compress, block_size=block_size, resampling=resampling)
+    cog_driver = gdal.GetDriverByName("COG")
+    if cog_driver:
+        return cog_driver.CreateCopy(file_name, dataset, options=options)
+
+    # GDAL < 3.1: build overviews in memory and copy them into a tiled GeoTIFF ahead of the full resolution data
+    levels = []
+    size = max(dataset.RasterXSize, dataset.RasterYSize)
+    while size / 2 ** (len(levels) + 1) >= block_size / 2:
+        levels.append(2 ** (len(levels) + 1))
+    dataset.BuildOverviews(resampling, levels)
+    options = [option for option in options if not option.startswith(("BLOCKSIZE", "OVERVIEWS", "RESAMPLING"))]
+    options += ["TILED=YES", "COPY_SRC_OVERVIEWS=YES", "BLOCKXSIZE=%i" % block_size, "BLOCKYSIZE=%i" % block_size]
+    return gdal.GetDriverByName("GTiff").CreateCopy(file_name, dataset, options=options)
+
+
+def create_raster(file_name, raster_array, origin=None, epsg=4326, pixel_width=10, pixel_height=10,
+                  nan_value=-9999.0, rdtype=gdal.GDT_Float32, geo_info=False, profile="gtiff"):
+    """
+    Convert a numpy.array to a GeoTIFF raster with the following parameters
+    :param file_name: STR of target file name, including directory; must end on ".tif"
+    :param raster_array: np.array of values to rasterize
+    :param origin: TUPLE of (x, y) origin coordinates
+    :param epsg: INT of EPSG:XXXX projection to use - default=4326
+    :param pixel_height: INT of pixel height (multiple of unit defined with the EPSG number) - default=10m
+    :param pixel_width: INT of pixel width (multiple of unit defined with the EPSG number) - default=10m
+    :param nan_value: INT/FLOAT no-data value to be used in the raster (replaces non-numeric and np.nan in array)
+                        default=-9999.0
+    :param rdtype: gdal.GDALDataType raster data type - default=gdal.GDT_Float32 (32 bit floating point)
+    :param geo_info: TUPLE defining a gdal.DataSet.GetGeoTransform object (supersedes origin, pixel_width, pixel_height)
+                        default=False
+    :param profile: STR of the output profile ("gtiff" for a plain GeoTIFF or "cog" for a tiled, compressed
+                        Cloud-Optimized GeoTIFF with overviews) - default="gtiff"
+    """
+    if profile not in output_profiles:
+        print("ERROR: Unknown output profile %s (use one of %s)." % (str(profile), ", ".join(output_profiles)))
+        return None
+    # COGs can only be copied from a complete dataset: write to memory first
+    driver = gdal.GetDriverByName("GTiff" if profile == "gtiff" else "MEM")
+    cols = raster_array.shape[1]
+    rows = raster_array.shape[0]
+    new_raster = driver.Create(file_name if profile == "gtiff" else "", cols, rows, 1, eType=rdtype)
+
+    # apply geo-origin and pixel dimensions
+    if not geo_info:
+        new_raster.SetGeoTransform((origin[0], pixel_width, 0, origin[1], 0, pixel_height))
+    else:
+        new_raster.SetGeoTransform(geo_info)
+
+    # replace np.nan values
+    if np.issubdtype(raster_array.dtype, np.floating):
+        raster_array[np.isnan(raster_array)] = nan_value
+
+    band = new_raster.GetRasterBand(1)
+    band.SetNoDataValue(nan_value)
+    band.WriteArray(raster_array)
+    band.SetScale(1.0)
+
+    # create projection and assign to raster
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(epsg)
+    new_raster.SetProjection(srs.ExportToWkt())
+
+    if profile == "cog":
+        new_raster = write_cog(file_name, new_raster)
+    new_raster.FlushCache()
+
+
+def reproject_raster(source_dataset, source_srs, target_srs, out_file_name=None, profile="gtiff"):
+    """
+    Reproject a raster dataset (preferably use through reproject function)
+    :param source_dataset: osgeo.gdal.Dataset (instantiate with gdal.Open(TIF-FILE))
+    :param source_srs: osgeo.osr.SpatialReference (instantiate with get_srs(source_dataset))
+    :param target_srs: osgeo.osr.SpatialReference (instantiate with get_srs(DATASET-WITH-TARGET-PROJECTION))
+    :param out_file_name: STR of target file name, including directory; must end on ".tif" (default: None
+                        returns the in-memory dataset only)
+    :param profile: STR of the output profile of out_file_name ("gtiff" or "cog") - default="gtiff"
+    :output: osgeo.gdal.Dataset (in-memory or written to out_file_name)
+    """
+    src_geo_transform = source_dataset.GetGeoTransform()
+    pixel_width = src_geo_transform[1]
+    x_size = source_dataset.RasterXSize
+    y_size = source_dataset.RasterYSize
+
+    # ensure that TransformPoint (later) uses (x, y) instead of (y, x) with gdal version >= 3.0
+    source_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    target_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    coord_trans = osr.CoordinateTransformation(source_srs, target_srs)
+
+    # get boundaries of reprojected (new) dataset
+    (org_x, org_y, org_z) = coord_trans.TransformPoint(src_geo_transform[0], src_geo_transform[3])
+    (max_x, min_y, new_z) = coord_trans.TransformPoint(src_geo_transform[0] + src_geo_transform[1] * x_size,
+                                                       src_geo_transform[3] + src_geo_transform[5] * y_size)
+
+    tar_dataset = gdal.GetDriverByName("MEM").Create("", int((max_x - org_x) / pixel_width),
+                                                     int((org_y - min_y) / pixel_width), 1, gdal.GDT_Float32)
+    tar_dataset.SetGeoTransform((org_x, pixel_width, src_geo_transform[2],
+                                 org_y, src_geo_transform[4], -pixel_width))
+    tar_dataset.SetProjection(target_srs.ExportToWkt())
+
+    gdal.ReprojectImage(source_dataset, tar_dataset, source_srs.ExportToWkt(), target_srs.ExportToWkt(),
+                        gdal.GRA_Bilinear)
+    if not out_file_name:
+        return tar_dataset
+    if profile == "cog":
+        return write_cog(out_file_name, tar_dataset)
+    return gdal.GetDriverByName("GTiff").CreateCopy(out_file_name, tar_dataset)
+
+
+def benchmark(n_pixels=8192, window_size=256, n_reads=200):
+    """
+    Print file size and window-read latency (full resolution and 1/16 overview) of the plain GeoTIFF and the
+    COG profile for a synthetic n_pixels x n_pixels Float32 raster
+    :param n_pixels: INT of raster columns and rows (default: 8192)
+    :param window_size: INT of the width and height of read windows in pixels (default: 256)
+    :param n_reads: INT of random windows read per profile (default: 200)
+    """
+    import tempfile
+    import time
+    tmp_dir = tempfile.mkdtemp()
+    y, x = np.ogrid[0:n_pixels, 0:n_pixels]
+    array = (250.0 + 20.0 * np.sin(x / 500.0) + 15.0 * np.cos(y / 700.0)).astype(np.float32)
+    array += np.random.rand(n_pixels, n_pixels).astype(np.float32)
+    offsets = np.random.randint(0, n_pixels - window_size, size=(n_reads, 2))
+    for profile in output_profiles:
+        file_name = os.path.join(tmp_dir, "bench_%s.tif" % profile)
+        t_start = time.perf_counter()
+        create_raster(file_name, array.copy(), origin=(400000.0, 5300000.0), epsg=25832,
+                      pixel_width=1, pixel_height=-1, profile=profile)
+        t_write = time.perf_counter() - t_start
+
+        # open the file for every read to measure cold reads (no block cache)
+        t_start = time.perf_counter()
+        for x_off, y_off in offsets:
+            gdal.Open(file_name).GetRasterBand(1).ReadAsArray(int(x_off), int(y_off), window_size, window_size)
+        t_window = (time.perf_counter() - t_start) / n_reads
+        t_start = time.perf_counter()
+        for x_off, y_off in offsets[:10]:
+            gdal.Open(file_name).GetRasterBand(1).ReadAsArray(0, 0, n_pixels, n_pixels, n_pixels // 16,
+                                                              n_pixels // 16)
+        t_overview = (time.perf_counter() - t_start) / 10
+        print("%-6s size: %8.1f MB  write: %6.2f s  window read: %7.2f ms  1/16 overview read: %8.2f ms" % (
+            profile, os.path.getsize(file_name) / 1e6, t_write, t_window * 1000, t_overview * 1000))
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:]])
@@ -1,62 +1,242 @@
-from shp_mgmt import *
-
-shp_driver = ogr.GetDriverByName("ESRI Shapefile")
-
-# open input shapefile and layer
-in_shp = shp_driver.Open(r"" + os.path.abspath('') + "/shapefiles/countries.shp")
-in_shp_lyr = in_shp.GetLayer()
-
-# get input SpatialReference
-in_sr = osr.SpatialReference(str(in_shp_lyr.GetSpatialRef()))
-# auto-detect epsg
-in_sr.AutoIdentifyEPSG()
-# assign input SpatialReference
-in_sr.ImportFromEPSG(int(in_sr.GetAuthorityCode(None)))
-
-# create SpatialReference for new shapefile
-out_sr = osr.SpatialReference()
-out_sr.ImportFromEPSG(3857)
-
-# create a CoordinateTransformation object
-coord_trans = osr.CoordinateTransformation(in_sr, out_sr)
-
-# create output shapefile and get layer
-out_shp = create_shp(r"" + os.path.abspath('') + "/shapefiles/country_web.shp", layer_name="basemap", layer_type="line")
-out_shp_lyr = out_shp.GetLayer()
-
-# look up layer (features) definitions in input shapefile
-in_lyr_def = in_shp_lyr.GetLayerDefn()
-# copy field names of input layer attribute table to output layer
-for i in range(0, in_lyr_def.GetFieldCount()):
-    out_shp_lyr.CreateField(in_lyr_def.GetFieldDefn(i))
-
-# instantiate feature definitions object for output layer (currently empty)
-out_shp_lyr_def = out_shp_lyr.GetLayerDefn()
-
-# iteratively append all input features in new projection
-in_feature = in_shp_lyr.GetNextFeature()
-while in_feature:
-    # get the input geometry
-    geometry = in_feature.GetGeometryRef()
-    # re-project (transform) geometry to new system
-    geometry.Transform(coord_trans)
-    # create new output feature
-    out_feature = ogr.Feature(out_shp_lyr_def)
-    # assign in-geometry to output feature and copy field values
-    out_feature.SetGeometry(geometry)
-    for i in range(0, out_shp_lyr_def.GetFieldCount()):
-        out_feature.SetField(out_shp_lyr_def.GetFieldDefn(i).GetNameRef(), in_feature.GetField(i))
-    # add the feature to the shapefile
-    out_shp_lyr.CreateFeature(out_feature)
-    # prepare next iteration
-    in_feature = in_shp_lyr.GetNextFeature()
-
-# release shapefiles and layers
-in_shp = None
-in_shp_lyr = None
-out_shp = None
-out_shp_lyr = None
-
-# create .prj file for  output shapefile for web application references
-with open(r"" + os.path.abspath('') + "/shapefiles/country_web.prj", "w+") as prj:
-    prj.write(get_wkt(3857))
\ No newline at end of file
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from osgeo import ogr, osr
+from profiling_hooks import profiled
+
+ogr.UseExceptions()
+
+# osr.CoordinateTransformation objects per (source WKT, target EPSG) - one cache per process
+coord_trans_cache = {}
+
+# OGR drivers by file ending
+vector_drivers = {".shp": "ESRI Shapefile", ".gpkg": "GPKG", ".fgb": "FlatGeobuf", ".geojson": "GeoJSON"}
+
+# little-endian 2d point WKB (byte order, geometry type, x, y)
+point_wkb_dtype = np.dtype([("byte_order", "u1"), ("wkb_type", "<u4"), ("x", "<f8"), ("y", "<f8")])
+
+
+def get_coord_trans(src_srs, epsg):
+    """
+    Get a cached CoordinateTransformation from a source SpatialReference to an EPSG code
+    :param src_srs: osgeo.osr.SpatialReference of the source data
+    :param epsg: INT of the target EPSG code
+    :output: osgeo.osr.CoordinateTransformation
+    """
+    key = (src_srs.ExportToWkt(), int(epsg))
+    if key not in coord_trans_cache:
+        src_srs = src_srs.Clone()
+        tar_srs = osr.SpatialReference()
+        tar_srs.ImportFromEPSG(int(epsg))
+        # ensure (x, y) instead of (y, x) axis order with gdal version >= 3.0
+        src_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        tar_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        coord_trans_cache[key] = osr.CoordinateTransformation(src_srs, tar_srs)
+    return coord_trans_cache[key]
+
+
+def transform_points(coord_trans, coords):
+    """
+    Transform many coordinates with one call
+    :param coord_trans: osgeo.osr.CoordinateTransformation
+    :param coords: ndarray of shape (n, 2) with x-y coordinates
+    :output: ndarray of shape (n, 2) with transformed x-y coordinates
+    """
+    if coords.shape[0] == 0:
+        return coords
+    return np.array(coord_trans.TransformPoints(coords.tolist()))[:, :2]
+
+
+def points2wkb(coords):
+    """
+    :param coords: ndarray of shape (n, 2) with x-y coordinates
+    :output: LIST of point geometries as WKB (bytes)
+    """
+    wkb = np.empty(coords.shape[0], dtype=point_wkb_dtype)
+    wkb["byte_order"] = 1
+    wkb["wkb_type"] = ogr.wkbPoint
+    wkb["x"] = coords[:, 0]
+    wkb["y"] = coords[:, 1]
+    raw = wkb.tobytes()
+    size = point_wkb_dtype.itemsize
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def transform_feature_range(src_file, epsg, start, stop):
+    """
+    Reproject the features at the positions start <= i < stop (in reading order) of the first layer in src_file
+    (SetNextByIndex jumps to start without scanning for drivers with fast feature access by index, e.g.,
+    Shapefile, GeoPackage, and FlatGeobuf)
+    :param src_file: STR of a vector file name, including directory
+    :param epsg: INT of the target EPSG code
+    :param start: INT of the position of the first feature
+    :param stop: INT of the position after the last feature
+    :output: LIST of (geometry WKB, LIST of field values) TUPLEs
+    """
+    src = ogr.Open(src_file)
+    lyr = src.GetLayer()
+    coord_trans = get_coord_trans(lyr.GetSpatialRef(), epsg)
+    field_count = lyr.GetLayerDefn().GetFieldCount()
+
+    field_values = []
+    geometries = []
+    lyr.SetNextByIndex(start)
+    for _ in range(start, stop):
+        feature = lyr.GetNextFeature()
+        if feature is None:
+            break
+        field_values.append([feature.GetField(i) for i in range(field_count)])
+        geometry = feature.GetGeometryRef()
+        geometries.append(geometry.Clone() if geometry is not None else None)
+
+    if lyr.GetGeomType() == ogr.wkbPoint and all(g is not None and g.GetGeometryType() == ogr.wkbPoint
+                                                 for g in geometries):
+        # 2d point layers: transform all coordinates in bulk and pack the WKB with numpy (points with z or m
+        # values take the per-geometry path to keep them)
+        coords = np.array([(g.GetX(), g.GetY()) for g in geometries], dtype=float).reshape(-1, 2)
+        wkbs = points2wkb(transform_points(coord_trans, coords))
+    else:
+        # other geometries: transform each vertex array in one call per geometry
+        wkbs = []
+        for geometry in geometries:
+            if geometry is None:
+                wkbs.append(None)
+                continue
+            geometry.Transform(coord_trans)
+            wkbs.append(bytes(geometry.ExportToWkb()))
+    src = None
+    return list(zip(wkbs, field_values))
+
+
+def get_feature_ranges(lyr, chunk_size):
+    """
+    :param lyr: osgeo.ogr.Layer
+    :param chunk_size: INT of features per range
+    :output: LIST of (start, stop) TUPLEs of feature positions that cover all features of lyr
+    """
+    n_features = lyr.GetFeatureCount()
+    return [(start, min(start + chunk_size, n_features)) for start in range(0, n_features, chunk_size)]
+
+
+def write_records(dst_ds, dst_lyr, results):
+    """
+    Write reprojected records within one transaction (if the target driver supports transactions)
+    :param dst_ds: osgeo.ogr.DataSource of the target file
+    :param dst_lyr: osgeo.ogr.Layer with the fields of the source layer
+    :param results: iterable of LISTs of (geometry WKB, LIST of field values) TUPLEs
+    :output: INT of written features
+    """
+    dst_lyr_def = dst_lyr.GetLayerDefn()
+    use_transaction = dst_ds.TestCapability(ogr.ODsCTransactions)
+    if use_transaction:
+        dst_ds.StartTransaction()
+    n_features = 0
+    for records in results:
+        for wkb, field_values in records:
+            out_feature = ogr.Feature(dst_lyr_def)
+            if wkb is not None:
+                out_feature.SetGeometry(ogr.CreateGeometryFromWkb(wkb))
+            for i, value in enumerate(field_values):
+                if value is not None:
+                    out_feature.SetField(i, value)
+            dst_lyr.CreateFeature(out_feature)
+            n_features += 1
+    if use_transaction:
+        dst_ds.CommitTransaction()
+    return n_features
+
+
+@profiled(n_items=lambda n_features, *args, **kwargs: n_features, unit="features")
+def reproject_layer(src, dst, epsg, n_workers=None, chunk_size=10000):
+    """
+    Reproject the first layer of a vector file; feature ranges are transformed in a process pool and
+    written within one transaction (if the target driver supports transactions)
+    :param src: STR of the source vector file name, including directory
+    :param dst: STR of the target vector file name, including directory (.shp, .gpkg, .fgb, or .geojson)
+    :param epsg: INT of the target EPSG code
+    :param n_workers: INT of worker processes (default: None uses the number of CPUs; 1 runs in this process)
+    :param chunk_size: INT of features per range (default: 10000)
+    :output: INT of written features (or None if src cannot be opened or has no spatial reference system)
+    """
+    try:
+        src_ds = ogr.Open(src)
+    except RuntimeError as e:
+        print("ERROR: Cannot open %s." % str(src))
+        print(e)
+        return None
+    src_lyr = src_ds.GetLayer()
+    if src_lyr.GetSpatialRef() is None:
+        print("ERROR: %s has no spatial reference system (cannot reproject)." % str(src))
+        return None
+    feature_ranges = get_feature_ranges(src_lyr, chunk_size)
+
+    # create the target layer with the fields of the source layer
+    driver = ogr.GetDriverByName(vector_drivers.get(os.path.splitext(dst)[1].lower(), "ESRI Shapefile"))
+    if os.path.exists(dst):
+        driver.DeleteDataSource(dst)
+    dst_ds = driver.CreateDataSource(dst)
+    tar_srs = osr.SpatialReference()
+    tar_srs.ImportFromEPSG(int(epsg))
+    dst_lyr = dst_ds.CreateLayer(src_lyr.GetName(), tar_srs, src_lyr.GetGeomType())
+    src_lyr_def = src_lyr.GetLayerDefn()
+    for i in range(src_lyr_def.GetFieldCount()):
+        dst_lyr.CreateField(src_lyr_def.GetFieldDefn(i))
+    src_ds = None
+
+    starts = [feature_range[0] for feature_range in feature_ranges]
+    stops = [feature_range[1] for feature_range in feature_ranges]
+    args = ([src] * len(starts), [epsg] * len(starts), starts, stops)
+    if n_workers == 1:
+        n_features = write_records(dst_ds, dst_lyr, map(transform_feature_range, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            n_features = write_records(dst_ds, dst_lyr, executor.map(transform_feature_range, *args))
+
+    dst_lyr = None
+    dst_ds = None
+    return n_features
+
+
+def benchmark(n_features=100000, n_workers=None):
+    """
+    Print the reprojection throughput (features/second) of random EPSG:4326 points and polygons to EPSG:3857
+    :param n_features: INT of features per synthetic layer (default: 100000)
+    :param n_workers: INT of worker processes for the parallel run (default: None uses the number of CPUs)
+    """
+    import tempfile
+    import time
+    tmp_dir = tempfile.mkdtemp()
+    src_srs = osr.SpatialReference()
+    src_srs.ImportFromEPSG(4326)
+    for geom_type, geom_name in ((ogr.wkbPoint, "point"), (ogr.wkbPolygon, "polygon")):
+        src = os.path.join(tmp_dir, "bench_%s.shp" % geom_name)
+        src_ds = ogr.GetDriverByName("ESRI Shapefile").CreateDataSource(src)
+        lyr = src_ds.CreateLayer(geom_name, src_srs, geom_type)
+        lyr.CreateField(ogr.FieldDefn("id", ogr.OFTInteger))
+        centers = np.random.rand(n_features, 2) * (20.0, 10.0) + (5.0, 45.0)
+        for i, (x, y) in enumerate(centers):
+            feature = ogr.Feature(lyr.GetLayerDefn())
+            feature.SetField("id", i)
+            if geom_type == ogr.wkbPoint:
+                wkt = "POINT (%f %f)" % (x, y)
+            else:
+                wkt = "POLYGON ((%f %f, %f %f, %f %f, %f %f))" % (x, y, x + 0.01, y, x, y + 0.01, x, y)
+            feature.SetGeometry(ogr.CreateGeometryFromWkt(wkt))
+            lyr.CreateFeature(feature)
+        lyr = None
+        src_ds = None
+        for workers in (1, n_workers):
+            t_start = time.perf_counter()
+            count = reproject_layer(src, os.path.join(tmp_dir, "bench_%s_web.shp" % geom_name), 3857,
+                                    n_workers=workers)
+            elapsed = time.perf_counter() - t_start
+            print("%-8s workers=%-4s %10.0f features/s" % (geom_name, str(workers), count / elapsed))
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        reproject_layer(os.path.abspath("") + "/shapefiles/countries.shp",
+                        os.path.abspath("") + "/shapefiles/country_web.shp", 3857)
@@ -1,37 +1,15 @@
-shp_dir = r"" + os.path.abspath('') + "/geodata/shapefiles/rivers.shp"
-# print(shp_dir)
-river_pts = create_shp(shp_dir, layer_name="basemap", layer_type="point")
-
-# create .prj file for the shapefile for web application references
-with open(shp_dir.split(".shp")[0] + ".prj", "w+") as prj:
-    prj.write(get_epsg_code(3857))
-    prj.write(get_epsg_code(6864))  # results in the same!
-
-# get basemap layer
-lyr = river_pts.GetLayer()
+import os
+from osgeo import ogr
+from feature_writer import write_features
 
-# add string field "rivername"
-field_gname = ogr.FieldDefn("rivername", ogr.OFTString)
-lyr.CreateField(field_gname)
+shp_dir = r"" + os.path.abspath('') + "/geodata/shapefiles/rivers.shp"
 
 # names and coordinates of central EU rivers in EPSG:3857 WG84 / Pseudo-Mercator
 pt_names = {"Aare": (916136.03, 6038687.72),
             "Ain": (623554.12, 5829154.69),
             "Inn": (1494878.95, 6183793.83)}
 
-# add the three rivers as points to the basemap layer
-for n in pt_names.keys():
-    # create Feature as child of the layer
-    pt_feature = ogr.Feature(lyr.GetLayerDefn())
-    # define value n (river) in the rivername field
-    pt_feature.SetField("rivername", n)
-    # use WKT format to add a point geometry to the Feature
-    wkt = "POINT(%f %f)" % (float(pt_names[n][0]), float(pt_names[n][1]))
-    point = ogr.CreateGeometryFromWkt(wkt)
-    pt_feature.SetGeometry(point)
-    # append the new feature to the basement layer
-    lyr.CreateFeature(pt_feature)
-
-# release files
-lyr = None
-river_pts = None
\ No newline at end of file
+if __name__ == "__main__":
+    # use WKT format to define point geometries with the rivername field (the .prj file is created from the EPSG code)
+    records = (("POINT(%f %f)" % (float(x), float(y)), {"rivername": n}) for n, (x, y) in pt_names.items())
+    write_features(shp_dir, records, layer_type="point", fields={"rivername": ogr.OFTString}, epsg=3857)
@@ -1,39 +1,44 @@
-from shp_mgmt import *
-from gdal import ogr
-import pandas as pd
-dreisam_inundation = pd.read_json(r"" + os.path.dirname(__file__) + "/json/hq100-dreisam.json")
-
-shp_dir = r"" + os.path.dirname(__file__) + "/shapefiles/zzzpoly8.shp"
-
-# print(shp_dir)
-dreisam_hq100 = create_shp(shp_dir, layer_name="basemap", layer_type="polygon")
-
-# create .prj file for the shapefile for GIS map applications
-with open(shp_dir.split(".shp")[0] + ".prj", "w+") as prj:
-    prj.write(get_esriwkt(25832))
-
-# get basemap layer
-lyr = dreisam_hq100.GetLayer()
-
-# add string field "tbg_name"
-lyr.CreateField(ogr.FieldDefn("tbg_name", ogr.OFTString))
-
-# add string field "area"
-lyr.CreateField(ogr.FieldDefn("area", ogr.OFTReal))
-
-for wkt, tbg in zip(dreisam_inundation["wkt_geom"], dreisam_inundation["TBG_NAME"]):
-    # create Feature as child of the layer
-    feature = ogr.Feature(lyr.GetLayerDefn())
-    # assign tbg_name
-    feature.SetField("tbg_name", tbg)
-    # use WKT format to add a polygon geometry to the Feature
-    polygon = ogr.CreateGeometryFromWkt(wkt)
-    # define default value of 0 to the area field
-    feature.SetField("area", polygon.GetArea())
-
-    feature.SetGeometry(polygon)
-    # append the new feature to the basement layer
-    lyr.CreateFeature(feature)
-
-lyr = None
-a_new_shp_file = None
+import os
+from itertools import islice
+from osgeo import ogr
+from feature_writer import iter_json_records, write_features
+from geometry_arrays import wkt_metrics
+from profiling_hooks import profiled
+
+
+def inundation_records(json_file, batch_size=10000):
+    """
+    Stream inundation polygons (wkt_geom, TBG_NAME) from a JSON file such as json/hq100-dreisam.json, where
+    area, perimeter, and centroid are computed for batches of polygons at once
+    :param json_file: STR of a JSON file name, including directory
+    :param batch_size: INT of polygons per vectorized batch (default: 10000)
+    :output: generator of (STR of WKT, DICT of attributes) TUPLEs
+    """
+    records = iter_json_records(json_file)
+    batch = list(islice(records, batch_size))
+    while batch:
+        metrics = wkt_metrics([record["wkt_geom"] for record in batch])
+        for i, record in enumerate(batch):
+            yield record["wkt_geom"], {"tbg_name": record["TBG_NAME"], "area": float(metrics["area"][i]),
+                                       "perimeter": float(metrics["perimeter"][i]),
+                                       "cent_x": float(metrics["centroid_x"][i]),
+                                       "cent_y": float(metrics["centroid_y"][i])}
+        batch = list(islice(records, batch_size))
+
+
+@profiled(n_items=lambda n_polygons, *args, **kwargs: n_polygons, unit="polygons")
+def write_inundation_shp(json_file, shp_file, epsg=25832):
+    """
+    :param json_file: STR of a JSON file name with wkt_geom and TBG_NAME entries, including directory
+    :param shp_file: STR of the target file name (.shp, .gpkg, or .fgb), including directory
+    :param epsg: INT of the EPSG code of the polygons (default: 25832)
+    :output: INT of written polygons
+    """
+    return write_features(shp_file, inundation_records(json_file), layer_type="multipolygon",
+                          fields={"tbg_name": ogr.OFTString, "area": ogr.OFTReal, "perimeter": ogr.OFTReal,
+                                  "cent_x": ogr.OFTReal, "cent_y": ogr.OFTReal}, epsg=epsg)
+
+
+if __name__ == "__main__":
+    write_inundation_shp(r"" + os.path.dirname(os.path.abspath(__file__)) + "/json/hq100-dreisam.json",
+                         r"" + os.path.dirname(os.path.abspath(__file__)) + "/shapefiles/zzzpoly8.shp")
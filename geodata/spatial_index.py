@@ -0,0 +1,233 @@
+import heapq
+import os
+import numpy as np
+
+# node table columns (the first row is a header of n_entries, node_capacity, source mtime)
+X_MIN, Y_MIN, X_MAX, Y_MAX, REF = range(5)
+
+
+def str_pack(bboxes, fids, node_capacity=16):
+    """
+    Build a Sort-Tile-Recursive (STR) packed R-tree as one node table, where level sizes follow from the number
+    of entries and the node capacity (children of node i on any level are nodes i * node_capacity ... of the
+    level below)
+    :param bboxes: ndarray of shape (n, 4) with x_min, y_min, x_max, y_max of every feature
+    :param fids: ndarray (INT) of n feature IDs
+    :param node_capacity: INT of children per node (default: 16)
+    :output: ndarray of shape (1 + n_nodes, 5) with a header row and one row per node (leaf entries first)
+    """
+    n = bboxes.shape[0]
+    header = np.array([[n, node_capacity, 0, 0, 0]], dtype=float)
+    if n == 0:
+        return header
+    center_x = (bboxes[:, X_MIN] + bboxes[:, X_MAX]) / 2
+    center_y = (bboxes[:, Y_MIN] + bboxes[:, Y_MAX]) / 2
+
+    # sort by x into vertical slices, then by y within every slice
+    n_slices = int(np.ceil(np.sqrt(np.ceil(n / node_capacity))))
+    slice_size = n_slices * node_capacity
+    rank_x = np.empty(n, dtype=np.int64)
+    rank_x[np.argsort(center_x, kind="stable")] = np.arange(n)
+    order = np.lexsort((center_y, rank_x // slice_size))
+
+    level = np.column_stack((bboxes[order], fids[order]))
+    levels = [level]
+    while level.shape[0] > 1:
+        starts = np.arange(0, level.shape[0], node_capacity)
+        level = np.column_stack((np.minimum.reduceat(level[:, X_MIN], starts),
+                                 np.minimum.reduceat(level[:, Y_MIN], starts),
+                                 np.maximum.reduceat(level[:, X_MAX], starts),
+                                 np.maximum.reduceat(level[:, Y_MAX], starts),
+                                 np.arange(starts.size)))
+        levels.append(level)
+
+    return np.concatenate([header] + levels)
+
+
+class SpatialIndex:
+    def __init__(self, table):
+        """
+        Query a STR packed R-tree node table (see str_pack)
+        :param table: ndarray of shape (1 + n_nodes, 5) (may be memory-mapped)
+        """
+        self.table = table
+        self.n_entries = int(table[0, 0])
+        self.node_capacity = int(table[0, 1])
+        # level sizes and row offsets (level 0 = leaf entries)
+        self.level_sizes = [self.n_entries]
+        while self.level_sizes[-1] > 1:
+            self.level_sizes.append(int(np.ceil(self.level_sizes[-1] / self.node_capacity)))
+        self.level_offsets = np.cumsum([1] + self.level_sizes[:-1])
+
+    def get_children(self, level, nodes):
+        """
+        :param level: INT of the level of nodes (> 0)
+        :param nodes: ndarray (INT) of node indices on level
+        :output: ndarray (INT) of child node indices on level - 1
+        """
+        children = (nodes[:, None] * self.node_capacity + np.arange(self.node_capacity)).ravel()
+        return children[children < self.level_sizes[level - 1]]
+
+    def query_bbox(self, x_min, y_min, x_max, y_max):
+        """
+        :param x_min, y_min, x_max, y_max: FLOATs of a bounding box
+        :output: ndarray (INT) of feature IDs whose bounding boxes intersect the bounding box
+        """
+        if self.n_entries == 0:
+            return np.empty(0, dtype=np.int64)
+        nodes = np.zeros(1, dtype=np.int64)
+        for level in range(len(self.level_sizes) - 1, -1, -1):
+            rows = self.table[self.level_offsets[level] + nodes]
+            hit = ((rows[:, X_MIN] <= x_max) & (rows[:, X_MAX] >= x_min) &
+                   (rows[:, Y_MIN] <= y_max) & (rows[:, Y_MAX] >= y_min))
+            nodes = nodes[hit]
+            if level == 0:
+                return rows[hit, REF].astype(np.int64)
+            nodes = self.get_children(level, nodes)
+        return np.empty(0, dtype=np.int64)
+
+    def min_distance(self, level, nodes, x, y):
+        """
+        :param level: INT of the level of nodes
+        :param nodes: ndarray (INT) of node indices on level
+        :param x: FLOAT of the x-coordinate
+        :param y: FLOAT of the y-coordinate
+        :output: ndarray of the distances between (x, y) and the bounding boxes of nodes
+        """
+        rows = self.table[self.level_offsets[level] + nodes]
+        dx = np.maximum(np.maximum(rows[:, X_MIN] - x, x - rows[:, X_MAX]), 0.0)
+        dy = np.maximum(np.maximum(rows[:, Y_MIN] - y, y - rows[:, Y_MAX]), 0.0)
+        return np.hypot(dx, dy)
+
+    def nearest(self, x, y, k=1):
+        """
+        Best-first k-nearest search by bounding box distance (exact for point layers)
+        :param x: FLOAT of the x-coordinate
+        :param y: FLOAT of the y-coordinate
+        :param k: INT of features to return (default: 1)
+        :output: LIST of (FLOAT of distance, INT of feature ID) TUPLEs sorted by distance
+        """
+        if self.n_entries == 0:
+            return []
+        top = len(self.level_sizes) - 1
+        root = np.zeros(1, dtype=np.int64)
+        heap = [(float(self.min_distance(top, root, x, y)[0]), top, 0)]
+        found = []
+        while heap and len(found) < k:
+            distance, level, node = heapq.heappop(heap)
+            if level == 0:
+                found.append((distance, int(self.table[self.level_offsets[0] + node, REF])))
+                continue
+            children = self.get_children(level, np.array([node]))
+            for child, child_distance in zip(children, self.min_distance(level - 1, children, x, y)):
+                heapq.heappush(heap, (float(child_distance), level - 1, int(child)))
+        return found
+
+
+def get_sidecar_name(shp_file):
+    """
+    :param shp_file: STR of a vector file name, including directory
+    :output: STR of the index file name next to shp_file
+    """
+    return os.path.splitext(shp_file)[0] + ".sidx.npy"
+
+
+def layer_bboxes(shp_file):
+    """
+    :param shp_file: STR of a vector file name, including directory
+    :output: ndarray of shape (n, 4) with feature bounding boxes and ndarray (INT) of feature IDs
+    """
+    from osgeo import ogr
+    ds = ogr.Open(shp_file)
+    lyr = ds.GetLayer()
+    lyr_def = lyr.GetLayerDefn()
+    lyr.SetIgnoredFields([lyr_def.GetFieldDefn(i).GetName() for i in range(lyr_def.GetFieldCount())])
+    bboxes = []
+    fids = []
+    for feature in lyr:
+        geometry = feature.GetGeometryRef()
+        if geometry is None:
+            continue
+        x_min, x_max, y_min, y_max = geometry.GetEnvelope()
+        bboxes.append((x_min, y_min, x_max, y_max))
+        fids.append(feature.GetFID())
+    ds = None
+    return np.array(bboxes, dtype=float).reshape(-1, 4), np.array(fids, dtype=np.int64)
+
+
+def index_layer(shp_file, node_capacity=16, rebuild=False):
+    """
+    Load the memory-mapped spatial index of a vector layer or build and save it (also if shp_file changed)
+    :param shp_file: STR of a vector file name, including directory
+    :param node_capacity: INT of children per node (default: 16)
+    :param rebuild: BOOL to force rebuilding the index (default: False)
+    :output: SpatialIndex
+    """
+    sidecar = get_sidecar_name(shp_file)
+    mtime = os.path.getmtime(shp_file)
+    if not rebuild and os.path.isfile(sidecar):
+        table = np.load(sidecar, mmap_mode="r")
+        if table[0, 2] == mtime:
+            return SpatialIndex(table)
+        table = None
+    bboxes, fids = layer_bboxes(shp_file)
+    table = str_pack(bboxes, fids, node_capacity)
+    table[0, 2] = mtime
+    np.save(sidecar, table)
+    return SpatialIndex(np.load(sidecar, mmap_mode="r"))
+
+
+def containing_polygons(shp_file, x, y, index=None, lyr=None):
+    """
+    Find the polygons that contain a point (e.g., the inundation polygon of a gauge); pass index and lyr to
+    query many points without reloading the index and reopening shp_file
+    :param shp_file: STR of a polygon vector file name, including directory
+    :param x: FLOAT of the x-coordinate
+    :param y: FLOAT of the y-coordinate
+    :param index: SpatialIndex of shp_file (default: None loads it with index_layer)
+    :param lyr: osgeo.ogr.Layer of shp_file (default: None opens shp_file for this query)
+    :output: LIST of INT feature IDs
+    """
+    from osgeo import ogr
+    index = index or index_layer(shp_file)
+    candidates = index.query_bbox(x, y, x, y)
+    if candidates.size == 0:
+        return []
+    point = ogr.Geometry(ogr.wkbPoint)
+    point.AddPoint_2D(float(x), float(y))
+    ds = None
+    if lyr is None:
+        ds = ogr.Open(shp_file)
+        lyr = ds.GetLayer()
+    fids = [int(fid) for fid in candidates if lyr.GetFeature(int(fid)).GetGeometryRef().Contains(point)]
+    ds = None
+    return fids
+
+
+if __name__ == "__main__":
+    # benchmark: build and query an index of 10^6 random points
+    import tempfile
+    import time
+    n = 10 ** 6
+    points = np.random.rand(n, 2) * 1e5
+    t_start = time.perf_counter()
+    table = str_pack(np.column_stack((points, points)), np.arange(n))
+    print("build:   %8.1f ms" % ((time.perf_counter() - t_start) * 1000))
+    sidecar = os.path.join(tempfile.gettempdir(), "benchmark.sidx.npy")
+    np.save(sidecar, table)
+    index = SpatialIndex(np.load(sidecar, mmap_mode="r"))
+
+    n_queries = 1000
+    query_points = np.random.rand(n_queries, 2) * 1e5
+    t_start = time.perf_counter()
+    for qx, qy in query_points:
+        index.query_bbox(qx - 50, qy - 50, qx + 50, qy + 50)
+    print("bbox:    %8.3f ms/query" % ((time.perf_counter() - t_start) * 1000 / n_queries))
+    t_start = time.perf_counter()
+    for qx, qy in query_points:
+        index.nearest(qx, qy, k=5)
+    print("nearest: %8.3f ms/query (k=5)" % ((time.perf_counter() - t_start) * 1000 / n_queries))
+    t_start = time.perf_counter()
+    for qx, qy in query_points[:10]:
+        np.argsort(np.hypot(points[:, 0] - qx, points[:, 1] - qy))[:5]
+    print("scan:    %8.3f ms/query (k=5, brute force)" % ((time.perf_counter() - t_start) * 1000 / 10))
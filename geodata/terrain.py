@@ -0,0 +1,191 @@
+import os
+import sys
+import numpy as np
+from osgeo import gdal
+from raster_algebra import BlockReader, create_output, get_block_windows, process_blocks
+
+gdal.UseExceptions()
+
+# terrain derivatives: (output data type, no-data value)
+terrain_products = {"slope_percent": (gdal.GDT_Float32, -9999.0),
+                    "slope_degree": (gdal.GDT_Float32, -9999.0),
+                    "aspect": (gdal.GDT_Float32, -9999.0),
+                    "hillshade": (gdal.GDT_Byte, 0)}
+
+
+def read_halo_block(reader, file_name, window, x_size, y_size, compute_edges=False):
+    """
+    Read a block with a one-pixel halo, where the halo outside the raster is no-data (np.nan) or a copy of
+    the edge pixels
+    :param reader: raster_algebra.BlockReader
+    :param file_name: STR of a raster file name, including directory
+    :param window: TUPLE of (x_offset, y_offset, x_size, y_size)
+    :param x_size: INT of raster columns
+    :param y_size: INT of raster rows
+    :param compute_edges: BOOL to extrapolate edge pixels instead of setting them to no-data (default: False)
+    :output: ndarray of shape (window y_size + 2, window x_size + 2)
+    """
+    x_start = max(window[0] - 1, 0)
+    y_start = max(window[1] - 1, 0)
+    x_stop = min(window[0] + window[2] + 1, x_size)
+    y_stop = min(window[1] + window[3] + 1, y_size)
+    block = reader.read(file_name, (x_start, y_start, x_stop - x_start, y_stop - y_start))
+    pad = ((y_start - window[1] + 1, window[1] + window[3] + 1 - y_stop),
+           (x_start - window[0] + 1, window[0] + window[2] + 1 - x_stop))
+    if compute_edges:
+        return np.pad(block, pad, mode="edge")
+    return np.pad(block, pad, mode="constant", constant_values=np.nan)
+
+
+def horn_gradient(block, ew_res, ns_res, scale=1.0):
+    """
+    Vectorized Horn (1981) gradients of the inner pixels of a block with a one-pixel halo
+    :param block: ndarray of shape (rows + 2, cols + 2) of elevations
+    :param ew_res: FLOAT of the pixel width (east-west resolution)
+    :param ns_res: FLOAT of the pixel height (north-south resolution, positive)
+    :param scale: FLOAT of horizontal units per vertical unit (default: 1.0)
+    :output: ndarrays of shape (rows, cols) of dz/dx (positive toward east) and dz/dy (positive toward south)
+    """
+    a = block[:-2, :-2]
+    b = block[:-2, 1:-1]
+    c = block[:-2, 2:]
+    d = block[1:-1, :-2]
+    f = block[1:-1, 2:]
+    g = block[2:, :-2]
+    h = block[2:, 1:-1]
+    i = block[2:, 2:]
+    dx = ((c + 2 * f + i) - (a + 2 * d + g)) / (8 * ew_res * scale)
+    dy = ((g + 2 * h + i) - (a + 2 * b + c)) / (8 * ns_res * scale)
+    return dx, dy
+
+
+def get_aspect(dx, dy):
+    """
+    :param dx: ndarray of dz/dx (positive toward east)
+    :param dy: ndarray of dz/dy (positive toward south)
+    :output: ndarray of the downslope direction in degrees clockwise from north (like gdaldem aspect), where
+             flat pixels are np.nan
+    """
+    aspect = np.degrees(np.arctan2(dy, -dx))
+    aspect = np.where(aspect > 90.0, 450.0 - aspect, 90.0 - aspect)
+    aspect[aspect == 360.0] = 0.0
+    aspect[(dx == 0) & (dy == 0)] = np.nan
+    return aspect
+
+
+def get_hillshade(dx, dy, z_factor=1.0, azimuth=315.0, altitude=45.0):
+    """
+    :param dx: ndarray of dz/dx (positive toward east)
+    :param dy: ndarray of dz/dy (positive toward south)
+    :param z_factor: FLOAT of vertical exaggeration (default: 1.0)
+    :param azimuth: FLOAT of the light source direction in degrees clockwise from north (default: 315.0)
+    :param altitude: FLOAT of the light source elevation in degrees above the horizon (default: 45.0)
+    :output: ndarray of shaded relief values between 1 and 255 (like gdaldem hillshade)
+    """
+    zenith = np.radians(90.0 - altitude)
+    light_direction = np.radians(azimuth)
+    slope = np.arctan(z_factor * np.hypot(dx, dy))
+    # downslope direction in radians clockwise from north
+    aspect = np.arctan2(-dx, dy)
+    shade = np.cos(zenith) * np.cos(slope) + np.sin(zenith) * np.sin(slope) * np.cos(light_direction - aspect)
+    return 1.0 + 254.0 * np.maximum(shade, 0.0)
+
+
+def terrain(dem_file_name, out_file_names, scale=1.0, z_factor=1.0, azimuth=315.0, altitude=45.0,
+            compute_edges=False, block_size=(512, 512), n_threads=4):
+    """
+    Compute slope, aspect, and hillshade rasters from a DEM in tiles with one-pixel halos on a thread pool
+    (one read of the DEM for all products)
+    :param dem_file_name: STR of a DEM raster file name, including directory (e.g., rasters/dem.tif)
+    :param out_file_names: DICT of {"slope_percent", "slope_degree", "aspect", or "hillshade": STR of target
+                           file name, including directory; must end on ".tif"}
+    :param scale: FLOAT of horizontal units per vertical unit (e.g., 111120 for degrees and meters, default: 1.0)
+    :param z_factor: FLOAT of vertical exaggeration for the hillshade (default: 1.0)
+    :param azimuth: FLOAT of the hillshade light source direction in degrees (default: 315.0)
+    :param altitude: FLOAT of the hillshade light source elevation in degrees (default: 45.0)
+    :param compute_edges: BOOL to compute edge pixels instead of setting them to no-data (default: False)
+    :param block_size: TUPLE of (x_size, y_size) of tiles (default: (512, 512))
+    :param n_threads: INT of threads (default: 4)
+    :output: None (writes out_file_names) or -1 if a product is unknown
+    """
+    products = list(out_file_names.keys())
+    unknown = [product for product in products if product not in terrain_products]
+    if unknown:
+        print("ERROR: Unknown terrain products: %s (use %s)." % (", ".join(unknown), ", ".join(terrain_products)))
+        return -1
+    dem = gdal.Open(dem_file_name)
+    geo_transform = dem.GetGeoTransform()
+    ew_res = abs(geo_transform[1])
+    ns_res = abs(geo_transform[5])
+    outputs = [create_output(out_file_names[product], dem, block_size, nan_value=terrain_products[product][1],
+                             rdtype=terrain_products[product][0]) for product in products]
+    windows = get_block_windows(dem.RasterXSize, dem.RasterYSize, block_size)
+    reader = BlockReader()
+
+    def task(window, out_blocks):
+        block = read_halo_block(reader, dem_file_name, window, dem.RasterXSize, dem.RasterYSize,
+                                compute_edges=compute_edges)
+        dx, dy = horn_gradient(block, ew_res, ns_res, scale=scale)
+        with np.errstate(invalid="ignore"):
+            for product, out_block in zip(products, out_blocks):
+                if product == "slope_percent":
+                    out_block[...] = 100.0 * np.hypot(dx, dy)
+                elif product == "slope_degree":
+                    out_block[...] = np.degrees(np.arctan(np.hypot(dx, dy)))
+                elif product == "aspect":
+                    out_block[...] = get_aspect(dx, dy)
+                else:
+                    out_block[...] = get_hillshade(dx, dy, z_factor=z_factor, azimuth=azimuth, altitude=altitude)
+                out_block[np.isnan(out_block)] = terrain_products[product][1]
+
+    process_blocks(windows, task, outputs, n_threads=n_threads)
+    for out in outputs:
+        out.FlushCache()
+    outputs = None
+
+
+def benchmark(dem_file_name, n_threads=4):
+    """
+    Print run times and maximum differences of terrain() and gdal.DEMProcessing (gdaldem) for slope (percent),
+    aspect, and hillshade
+    :param dem_file_name: STR of a DEM raster file name, including directory
+    :param n_threads: INT of threads (default: 4)
+    """
+    import tempfile
+    import time
+    tmp_dir = tempfile.mkdtemp()
+    out_files = {product: os.path.join(tmp_dir, product + ".tif") for product in
+                 ("slope_percent", "aspect", "hillshade")}
+    t_start = time.perf_counter()
+    terrain(dem_file_name, out_files, n_threads=n_threads)
+    t_tiles = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    gdaldem = {}
+    for product, mode, options in (("slope_percent", "slope", {"slopeFormat": "percent"}),
+                                   ("aspect", "aspect", {}), ("hillshade", "hillshade", {})):
+        gdaldem[product] = os.path.join(tmp_dir, "gdaldem_" + product + ".tif")
+        gdal.DEMProcessing(gdaldem[product], dem_file_name, mode, **options)
+    t_gdaldem = time.perf_counter() - t_start
+
+    print("%s: terrain %.2f s, gdaldem %.2f s" % (os.path.basename(dem_file_name), t_tiles, t_gdaldem))
+    for product in out_files:
+        ours = gdal.Open(out_files[product]).ReadAsArray().astype(float)
+        reference = gdal.Open(gdaldem[product]).ReadAsArray().astype(float)
+        valid = (ours != terrain_products[product][1]) & np.isfinite(reference) & (reference != -9999.0)
+        if product == "aspect":
+            difference = np.abs((ours[valid] - reference[valid] + 180.0) % 360.0 - 180.0)
+        else:
+            difference = np.abs(ours[valid] - reference[valid])
+        print("  %-14s max. difference to gdaldem: %.4f" % (product, difference.max() if difference.size else 0))
+
+
+if __name__ == "__main__":
+    raster_dir = os.path.dirname(os.path.abspath(__file__)) + "/rasters/"
+    if "--benchmark" in sys.argv:
+        for dem_name in ("dem.tif", "random_unis_dem.tif"):
+            benchmark(raster_dir + dem_name)
+    else:
+        # cost surfaces for least_cost_path from any DEM
+        terrain(raster_dir + "dem.tif", {"slope_percent": raster_dir + "dem-slope-percent.tif",
+                                         "aspect": raster_dir + "dem-aspect.tif"})
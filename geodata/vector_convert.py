@@ -0,0 +1,290 @@
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from osgeo import gdal, ogr, osr
+from feature_writer import vector_drivers, write_features
+from reproject import get_coord_trans
+
+gdal.UseExceptions()
+ogr.UseExceptions()
+
+# drivers that convert() writes (use the file endings of feature_writer.vector_drivers)
+output_formats = ("GeoJSONSeq", "FlatGeobuf", "GPKG")
+
+
+def open_layer(src, layer=None, where=None, bbox=None, fields=None):
+    """
+    Open a vector layer and push attribute, spatial, and field filters down to the OGR driver (e.g., SQL in
+    GeoPackages or the spatial index of FlatGeobuf files)
+    :param src: STR of a vector file name (any OGR source, e.g., .kml, .shp, .geojson), including directory
+    :param layer: STR of a layer name or INT of a layer index (default: None uses the first layer)
+    :param where: STR of an OGR SQL attribute filter (e.g., "depth > 0.5", default: None)
+    :param bbox: TUPLE of (min x, min y, max x, max y) in the source coordinate system (default: None)
+    :param fields: LIST of field names to keep (default: None keeps all fields); fields in where are read too
+    :output: osgeo.ogr.DataSource and osgeo.ogr.Layer (keep a reference to the DataSource) or None, None
+    """
+    try:
+        src_ds = ogr.Open(src)
+        lyr = src_ds.GetLayer() if layer is None else (src_ds.GetLayerByName(layer) if isinstance(layer, str)
+                                                        else src_ds.GetLayer(layer))
+    except (RuntimeError, AttributeError) as e:
+        print("ERROR: Cannot open %s." % str(src))
+        print(e)
+        return None, None
+    if lyr is None:
+        print("ERROR: %s has no layer %s." % (str(src), str(layer)))
+        return None, None
+    if where:
+        lyr.SetAttributeFilter(where)
+    if bbox:
+        lyr.SetSpatialFilterRect(*bbox)
+    if fields is not None:
+        lyr_def = lyr.GetLayerDefn()
+        field_names = [lyr_def.GetFieldDefn(i).GetName() for i in range(lyr_def.GetFieldCount())]
+        # drivers that evaluate the attribute filter in OGR need the values of the fields in where
+        keep = set(fields) | set(get_filter_fields(where, field_names))
+        lyr.SetIgnoredFields([name for name in field_names if name not in keep])
+    return src_ds, lyr
+
+
+def get_filter_fields(where, field_names):
+    """
+    :param where: STR of an OGR SQL attribute filter or None
+    :param field_names: LIST of the field names of a layer
+    :output: LIST of the field names that occur in where (case-insensitive, outside of string literals)
+    """
+    if not where:
+        return []
+    tokens = re.findall(r'"((?:[^"]|"")+)"|([A-Za-z_]\w*)', re.sub(r"'(?:[^']|'')*'", " ", where))
+    names = {(quoted.replace('""', '"') or bare).lower() for quoted, bare in tokens}
+    return [name for name in field_names if name.lower() in names]
+
+
+def get_field_types(lyr, fields=None):
+    """
+    :param lyr: osgeo.ogr.Layer
+    :param fields: LIST of field names to keep (default: None keeps all fields)
+    :output: DICT of {field name: ogr field type} in layer order
+    """
+    lyr_def = lyr.GetLayerDefn()
+    field_types = {}
+    for i in range(lyr_def.GetFieldCount()):
+        field_defn = lyr_def.GetFieldDefn(i)
+        if fields is None or field_defn.GetName() in fields:
+            field_types[field_defn.GetName()] = field_defn.GetType()
+    return field_types
+
+
+def read_chunks(lyr, field_names, chunk_size=10000):
+    """
+    Stream the (filtered) features of a layer in chunks of plain Python objects that can be sent to processes
+    :param lyr: osgeo.ogr.Layer
+    :param field_names: LIST of the field names to read
+    :param chunk_size: INT of features per chunk (default: 10000)
+    :output: generator of LISTs of (geometry WKB or None, LIST of field values) TUPLEs
+    """
+    chunk = []
+    for feature in lyr:
+        geometry = feature.GetGeometryRef()
+        chunk.append((bytes(geometry.ExportToWkb()) if geometry is not None else None,
+                      [feature.GetField(name) for name in field_names]))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def serialize_chunk(records, field_names, src_wkt=None, epsg=None, json_lines=True, precision=7):
+    """
+    Transform and serialize the geometries of one chunk (runs in a worker process)
+    :param records: LIST of (geometry WKB or None, LIST of field values) TUPLEs (see read_chunks)
+    :param field_names: LIST of field names
+    :param src_wkt: STR of the source coordinate system as WKT (default: None does not transform)
+    :param epsg: INT of the target EPSG code (default: None does not transform)
+    :param json_lines: BOOL to return newline-delimited GeoJSON features (default: True) instead of records
+    :param precision: INT of decimal places of GeoJSON coordinates (default: 7)
+    :output: STR of GeoJSON lines or LIST of (geometry WKB, DICT of {field name: value}) TUPLEs
+    """
+    coord_trans = None
+    if src_wkt and epsg:
+        src_srs = osr.SpatialReference()
+        src_srs.ImportFromWkt(src_wkt)
+        coord_trans = get_coord_trans(src_srs, epsg)
+    json_options = ["COORDINATE_PRECISION=%i" % precision]
+    out = []
+    for wkb, values in records:
+        geometry = ogr.CreateGeometryFromWkb(wkb) if wkb is not None else None
+        if geometry is not None and coord_trans is not None:
+            geometry.Transform(coord_trans)
+        if json_lines:
+            out.append('{"type": "Feature", "properties": %s, "geometry": %s}' % (
+                json.dumps(dict(zip(field_names, values))),
+                geometry.ExportToJson(json_options) if geometry is not None else "null"))
+        else:
+            out.append((bytes(geometry.ExportToWkb()) if geometry is not None else None,
+                        dict(zip(field_names, values))))
+    if json_lines:
+        return "\n".join(out) + "\n" if out else ""
+    return out
+
+
+def map_chunks(func, chunks, args, n_workers=None):
+    """
+    Apply func to chunks in order with at most two chunks per worker in flight (bounded memory)
+    :param func: callable(chunk, *args) (module level for pickling)
+    :param chunks: iterable of chunks
+    :param args: TUPLE of further arguments of func
+    :param n_workers: INT of worker processes (default: None uses the number of CPUs; 1 runs in this process)
+    :output: generator of func results
+    """
+    if n_workers == 1:
+        for chunk in chunks:
+            yield func(chunk, *args)
+        return
+    n_workers = n_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk, *args))
+            if len(pending) >= 2 * n_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def convert(src, dst, layer=None, where=None, bbox=None, fields=None, epsg=None, n_workers=1, chunk_size=10000,
+            precision=7):
+    """
+    Stream the features of any OGR source (e.g., multi-GB KML exports) to GeoJSONSeq (.geojsonl), FlatGeobuf
+    (.fgb), or GeoPackage (.gpkg) files with bounded memory; filters are pushed down to the source driver
+    :param src: STR of the source vector file name, including directory
+    :param dst: STR of the target vector file name, including directory (.geojsonl, .geojsons, .fgb, or .gpkg)
+    :param layer: STR of a layer name or INT of a layer index (default: None uses the first layer)
+    :param where: STR of an OGR SQL attribute filter (default: None)
+    :param bbox: TUPLE of (min x, min y, max x, max y) in the source coordinate system (default: None)
+    :param fields: LIST of field names to keep (default: None keeps all fields)
+    :param epsg: INT of the target EPSG code (default: None keeps the source coordinate system, but
+                 GeoJSONSeq files of georeferenced sources are always written in EPSG:4326)
+    :param n_workers: INT of worker processes that transform and serialize geometry chunks (default: 1 streams
+                      with gdal.VectorTranslate; None uses the number of CPUs)
+    :param chunk_size: INT of features per chunk and per transaction (default: 10000)
+    :param precision: INT of decimal places of GeoJSON coordinates (default: 7)
+    :output: INT of written features (or None if src cannot be opened or the target format is not supported)
+    """
+    driver_name = vector_drivers.get(os.path.splitext(dst)[1].lower())
+    if driver_name not in output_formats:
+        print("ERROR: Unsupported target format %s (use %s)." % (
+            str(dst), ", ".join(ext for ext, name in vector_drivers.items() if name in output_formats)))
+        return None
+    src_ds, lyr = open_layer(src, layer=layer, where=where, bbox=bbox, fields=fields)
+    if lyr is None:
+        return None
+    if driver_name == "GeoJSONSeq" and lyr.GetSpatialRef() is not None:
+        # RFC 7946: GeoJSON coordinates are WGS84 longitude and latitude
+        epsg = 4326
+    if os.path.exists(dst):
+        ogr.GetDriverByName(driver_name).DeleteDataSource(dst)
+
+    if n_workers == 1:
+        # the OGR C loop streams the features with the same filters
+        options = gdal.VectorTranslateOptions(
+            format=driver_name, layers=[lyr.GetName()], where=where, spatFilter=list(bbox) if bbox else None,
+            selectFields=list(fields) if fields is not None else None,
+            dstSRS="EPSG:%i" % epsg if epsg else None,
+            layerCreationOptions=["COORDINATE_PRECISION=%i" % precision] if driver_name == "GeoJSONSeq" else None,
+            options=["-gt", str(chunk_size)])
+        dst_ds = gdal.VectorTranslate(dst, src, options=options)
+        n_features = dst_ds.GetLayer(0).GetFeatureCount() if dst_ds else None
+        dst_ds = None
+        return n_features
+
+    field_types = get_field_types(lyr, fields)
+    field_names = list(field_types.keys())
+    src_srs = lyr.GetSpatialRef()
+    src_wkt = src_srs.ExportToWkt() if src_srs is not None and epsg else None
+    json_lines = driver_name == "GeoJSONSeq"
+    results = map_chunks(serialize_chunk, read_chunks(lyr, field_names, chunk_size),
+                         (field_names, src_wkt, epsg, json_lines, precision), n_workers=n_workers)
+    if json_lines:
+        n_features = 0
+        with open(dst, "w") as f:
+            for text in results:
+                f.write(text)
+                n_features += text.count("\n")
+    else:
+        # keep the source coordinate system (also without EPSG code) if the geometries are not transformed
+        n_features = write_features(dst, (record for records in results for record in records),
+                                    layer_type=lyr.GetGeomType(), fields=field_types, epsg=epsg,
+                                    layer_name=lyr.GetName(), batch_size=chunk_size,
+                                    srs=src_srs if epsg is None else None)
+    src_ds = None
+    return n_features
+
+
+def export_features_to_json(src, dst):
+    """
+    Feature-by-feature conversion with ExportToJson and Python dictionaries (reference for the benchmark)
+    :param src: STR of the source vector file name, including directory
+    :param dst: STR of a .geojsonl target file name, including directory
+    :output: INT of written features
+    """
+    src_ds = ogr.Open(src)
+    lyr = src_ds.GetLayer()
+    n_features = 0
+    with open(dst, "w") as f:
+        for feature in lyr:
+            f.write(json.dumps(json.loads(feature.ExportToJson())) + "\n")
+            n_features += 1
+    return n_features
+
+
+def benchmark(n_features=200000, n_workers=None):
+    """
+    Print the throughput (features/second and MB/second) of converting a synthetic GeoPackage of EPSG:4326
+    polygons to GeoJSONSeq and FlatGeobuf files
+    :param n_features: INT of polygons (default: 200000)
+    :param n_workers: INT of worker processes for the parallel run (default: None uses the number of CPUs)
+    """
+    import tempfile
+    import time
+    import numpy as np
+    tmp_dir = tempfile.mkdtemp()
+    src = os.path.join(tmp_dir, "bench.gpkg")
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    centers = np.random.rand(n_features, 2) * (20.0, 10.0) + (5.0, 45.0)
+    records = (("POLYGON ((%f %f, %f %f, %f %f, %f %f))" % (x, y, x + 0.01, y, x, y + 0.01, x, y),
+                {"id": i, "depth": float(x - y)}) for i, (x, y) in enumerate(centers))
+    write_features(src, records, layer_type="polygon", fields={"id": ogr.OFTInteger, "depth": ogr.OFTReal},
+                   epsg=4326, layer_name="bench")
+    size = os.path.getsize(src) / 1e6
+
+    t_start = time.perf_counter()
+    export_features_to_json(src, os.path.join(tmp_dir, "reference.geojsonl"))
+    elapsed = time.perf_counter() - t_start
+    print("%-34s %10.0f features/s %8.1f MB/s" % ("ExportToJson per feature", n_features / elapsed, size / elapsed))
+    for ext in (".geojsonl", ".fgb"):
+        for workers in (1, n_workers):
+            t_start = time.perf_counter()
+            count = convert(src, os.path.join(tmp_dir, "bench_%s%s" % (str(workers), ext)), n_workers=workers)
+            elapsed = time.perf_counter() - t_start
+            print("%-34s %10.0f features/s %8.1f MB/s" % (
+                "convert to %s (workers=%s)" % (ext, str(workers)), count / elapsed, size / elapsed))
+    t_start = time.perf_counter()
+    count = convert(src, os.path.join(tmp_dir, "bench_filtered.fgb"), where="depth > -35",
+                    bbox=(5.0, 45.0, 15.0, 50.0), fields=["id"])
+    elapsed = time.perf_counter() - t_start
+    print("%-34s %10.0f features/s (%i features)" % ("convert with filters to .fgb", n_features / elapsed, count))
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        convert(script_dir + "/pitillal-triangle.kml", script_dir + "/geojson/pitillal-triangle.geojsonl")
+        convert(script_dir + "/geojson/pitillal-river.geojson", script_dir + "/geojson/pitillal-river.fgb")
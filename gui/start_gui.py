@@ -3,6 +3,7 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter.messagebox import askokcancel, askyesno, showinfo
 from tkinter.filedialog import *
+from task_runner import TaskRunner, example_job
 
 
 class MyApp(tk.Frame):
@@ -30,6 +31,8 @@ class MyApp(tk.Frame):
         self.ddmenu = tk.Menu(self, tearoff=0)
         self.mbar.add_cascade(label="A Drop Down Menu", menu=self.ddmenu)  # attach entry it to standard menu bar
         self.ddmenu.add_command(label="Drop Down Entry 1", command=lambda: self.hello("Drop Down Menu!"))
+        self.ddmenu.add_command(label="Run Background Task", command=lambda: self.run_task())
+        self.ddmenu.add_command(label="Cancel Background Tasks", command=lambda: self.runner.cancel())
 
         # Label
         self.a_label = tk.Label(master, text="A Label")
@@ -75,11 +78,30 @@ class MyApp(tk.Frame):
         # create a placeholder to relax layout
         tk.Label(text="                                                    ").grid(row=0, column=1)
 
+        # Progressbar and status label of background tasks (long jobs must not run on the Tk main loop)
+        self.runner = TaskRunner(self)
+        self.pbar = ttk.Progressbar(master, orient=tk.HORIZONTAL, length=200, mode="determinate", maximum=1.0)
+        self.pbar.grid(sticky=tk.W, column=0, row=5, padx=self.dx, pady=self.dy)
+        self.status_label = tk.Label(master, text="No task running")
+        self.status_label.grid(sticky=tk.W, column=1, columnspan=2, row=5, padx=self.dx, pady=self.dy)
+        self.master.protocol("WM_DELETE_WINDOW", self.quit_gui)
+
     @staticmethod
     def hello(message):
         showinfo("Got Message from ...", message)
 
+    def run_task(self):
+        self.runner.submit(example_job, n_items=500, name="Example task", on_progress=self.show_progress,
+                           on_done=lambda task, result: self.show_progress(task),
+                           on_error=lambda task, error: self.hello(error), on_cancel=self.show_progress)
+
+    def show_progress(self, task):
+        if task.fraction is not None:
+            self.pbar["value"] = task.fraction
+        self.status_label.config(text=task.summary())
+
     def quit_gui(self):
+        self.runner.shutdown()
         self.master.destroy()
 
 
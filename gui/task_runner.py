@@ -0,0 +1,256 @@
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """Raised inside a job when its task was cancelled (at the next progress report)"""
+    pass
+
+
+class ProgressReporter:
+    def __init__(self, message_queue, task_id, cancel_event, min_interval=0.05):
+        """
+        Callable that jobs use to report progress (runs in the worker thread or process)
+        :param message_queue: queue.Queue or multiprocessing queue proxy that the GUI polls
+        :param task_id: INT of the task
+        :param cancel_event: threading.Event or multiprocessing event proxy
+        :param min_interval: FLOAT of seconds between two queued progress messages (default: 0.05)
+        """
+        self.message_queue = message_queue
+        self.task_id = task_id
+        self.cancel_event = cancel_event
+        self.min_interval = min_interval
+        # the first report is always queued (perf_counter has an arbitrary reference point)
+        self.last_report = float("-inf")
+
+    def __call__(self, n_done, n_total=None, message=""):
+        """
+        :param n_done: INT of processed items (e.g., raster blocks or features)
+        :param n_total: INT of all items (default: None if unknown)
+        :param message: STR of a status message (default: "")
+        :output: None or raises TaskCancelled if the task was cancelled
+        """
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+        now = time.perf_counter()
+        if now - self.last_report >= self.min_interval or n_done == n_total:
+            self.last_report = now
+            self.message_queue.put(("progress", self.task_id, (n_done, n_total, message)))
+
+    def cancelled(self):
+        """
+        :output: BOOL (True if the task was cancelled) for jobs that stop by themselves
+        """
+        return self.cancel_event.is_set()
+
+
+def run_job(func, message_queue, task_id, cancel_event, args, kwargs):
+    """
+    Run a job in a worker and send its result, error, or cancellation to the GUI (module level for pickling)
+    :param func: callable job that accepts a progress keyword argument (ProgressReporter)
+    :param message_queue: queue.Queue or multiprocessing queue proxy
+    :param task_id: INT of the task
+    :param cancel_event: threading.Event or multiprocessing event proxy
+    :param args: TUPLE of positional job arguments
+    :param kwargs: DICT of keyword job arguments
+    """
+    if cancel_event.is_set():
+        message_queue.put(("cancelled", task_id, None))
+        return
+    try:
+        result = func(*args, progress=ProgressReporter(message_queue, task_id, cancel_event), **kwargs)
+    except TaskCancelled:
+        message_queue.put(("cancelled", task_id, None))
+    except Exception:
+        message_queue.put(("error", task_id, traceback.format_exc()))
+    else:
+        if cancel_event.is_set():
+            message_queue.put(("cancelled", task_id, None))
+        else:
+            message_queue.put(("done", task_id, result))
+
+
+class Task:
+    def __init__(self, task_id, name, cancel_event, on_progress=None, on_done=None, on_error=None,
+                 on_cancel=None):
+        """
+        State of one submitted job (only read and changed on the Tk main loop)
+        :param task_id: INT of the task
+        :param name: STR of the task name (e.g., for status labels)
+        :param cancel_event: threading.Event or multiprocessing event proxy
+        :param on_progress: callable(Task) called on progress reports (default: None)
+        :param on_done: callable(Task, result) (default: None)
+        :param on_error: callable(Task, STR of the traceback) (default: None)
+        :param on_cancel: callable(Task) (default: None)
+        """
+        self.task_id = task_id
+        self.name = name
+        self.cancel_event = cancel_event
+        self.callbacks = {"progress": on_progress, "done": on_done, "error": on_error, "cancelled": on_cancel}
+        self.status = "pending"
+        self.n_done = 0
+        self.n_total = None
+        self.message = ""
+        self.t_start = time.perf_counter()
+        self.t_stop = None
+        self.future = None
+
+    @property
+    def elapsed(self):
+        """
+        :output: FLOAT of seconds since the submission (until the task finished)
+        """
+        return (self.t_stop or time.perf_counter()) - self.t_start
+
+    @property
+    def throughput(self):
+        """
+        :output: FLOAT of processed items per second
+        """
+        return self.n_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def fraction(self):
+        """
+        :output: FLOAT of the processed fraction between 0 and 1 or None if the number of items is unknown
+        """
+        if not self.n_total:
+            return None
+        return min(self.n_done / self.n_total, 1.0)
+
+    def summary(self):
+        """
+        :output: STR of the task name, status, progress, and throughput (e.g., for a status label)
+        """
+        progress = "%i/%i" % (self.n_done, self.n_total) if self.n_total else "%i" % self.n_done
+        return "%s: %s %s items (%.1f items/s, %.1f s)%s" % (self.name, self.status, progress, self.throughput,
+                                                            self.elapsed, " - " + self.message if self.message else "")
+
+
+class TaskRunner:
+    def __init__(self, widget, mode="thread", max_workers=2, poll_interval=100):
+        """
+        Run jobs on a thread or process pool and feed progress and results back to the Tk main loop through a
+        queue that is polled with widget.after() (callbacks always run on the main loop)
+        :param widget: tk.Widget (e.g., a MyApp frame) that owns the polling
+        :param mode: STR of "thread" (numpy/GDAL jobs that release the GIL) or "process" (pure Python jobs)
+        :param max_workers: INT of parallel jobs (default: 2)
+        :param poll_interval: INT of milliseconds between two queue polls (default: 100)
+        """
+        self.widget = widget
+        self.mode = mode
+        self.poll_interval = poll_interval
+        if mode == "process":
+            self.manager = multiprocessing.Manager()
+            self.message_queue = self.manager.Queue()
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self.manager = None
+            self.message_queue = queue.Queue()
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.tasks = {}
+        self.next_id = 0
+        self.after_id = None
+
+    def submit(self, func, *args, name=None, on_progress=None, on_done=None, on_error=None, on_cancel=None,
+               **kwargs):
+        """
+        :param func: callable job that accepts a progress keyword argument (call progress(n_done, n_total) per
+                     item; in process mode, func must be a module-level function)
+        :param args: positional job arguments
+        :param name: STR of the task name (default: None uses func.__name__)
+        :param on_progress: callable(Task) (default: None)
+        :param on_done: callable(Task, result) (default: None)
+        :param on_error: callable(Task, STR of the traceback) (default: None)
+        :param on_cancel: callable(Task) (default: None)
+        :param kwargs: keyword job arguments
+        :output: Task
+        """
+        cancel_event = self.manager.Event() if self.manager else threading.Event()
+        task = Task(self.next_id, name or func.__name__, cancel_event, on_progress=on_progress, on_done=on_done,
+                    on_error=on_error, on_cancel=on_cancel)
+        self.tasks[task.task_id] = task
+        self.next_id += 1
+        task.status = "running"
+        task.future = self.executor.submit(run_job, func, self.message_queue, task.task_id, cancel_event, args,
+                                           kwargs)
+        if self.after_id is None:
+            self.after_id = self.widget.after(self.poll_interval, self.poll)
+        return task
+
+    def cancel(self, task=None):
+        """
+        Cancel a task (or all running tasks); running jobs stop at their next progress report
+        :param task: Task (default: None cancels all tasks)
+        """
+        for t in ([task] if task else list(self.tasks.values())):
+            t.cancel_event.set()
+            if t.future.cancel():
+                # the job did not start yet
+                self.message_queue.put(("cancelled", t.task_id, None))
+
+    def poll(self):
+        """
+        Process all queued messages on the Tk main loop and re-schedule the polling while tasks run
+        """
+        while True:
+            try:
+                kind, task_id, payload = self.message_queue.get_nowait()
+            except queue.Empty:
+                break
+            task = self.tasks.get(task_id)
+            if task is None:
+                continue
+            if kind == "progress":
+                task.n_done, task.n_total, task.message = payload
+            else:
+                task.status = kind
+                task.t_stop = time.perf_counter()
+                del self.tasks[task_id]
+            callback = task.callbacks[kind]
+            if callback is None:
+                if kind == "error":
+                    print("ERROR: Task %s failed:\n%s" % (task.name, payload))
+                continue
+            if kind in ("done", "error"):
+                callback(task, payload)
+            else:
+                callback(task)
+        if self.tasks:
+            self.after_id = self.widget.after(self.poll_interval, self.poll)
+        else:
+            self.after_id = None
+
+    def shutdown(self):
+        """
+        Cancel all tasks and release the pool (call before destroying the window)
+        """
+        self.cancel()
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+        self.executor.shutdown(wait=False)
+        if self.manager:
+            self.manager.shutdown()
+
+
+def example_job(n_items=200, item_size=200000, progress=None):
+    """
+    Example of a long-running job (e.g., a stand-in for a raster block loop) that reports progress per item
+    :param n_items: INT of items to process (default: 200)
+    :param item_size: INT of values per item (default: 200000)
+    :param progress: ProgressReporter (set by TaskRunner)
+    :output: FLOAT of the sum of all item means
+    """
+    import numpy as np
+    rng = np.random.default_rng(0)
+    total = 0.0
+    for i in range(n_items):
+        total += float(np.sqrt(rng.random(item_size)).mean())
+        if progress:
+            progress(i + 1, n_items)
+    return total
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter.messagebox import showinfo
 import random
+from task_runner import TaskRunner, example_job
 
 
 class MyApp(tk.Frame):
@@ -12,7 +13,7 @@ class MyApp(tk.Frame):
 
         # Set geometry: upper-left corner of the window
         ww = 628  # width
-        wh = 100  # height
+        wh = 140  # height
         wx = (self.master.winfo_screenwidth() - ww) / 2
         wy = (self.master.winfo_screenheight() - wh) / 2
         # assign geometry
@@ -36,6 +37,17 @@ class MyApp(tk.Frame):
                                       variable=self.check_variable)
         self.cbutton.grid(sticky=tk.E, column=0, columnspan=3, row=1, padx=5, pady=5)
 
+        # define Buttons to start and cancel a background task and a label that shows its progress
+        self.runner = TaskRunner(self)
+        self.task_button = tk.Button(master, text="Run Task", command=lambda: self.run_task())
+        self.task_button.grid(column=0, row=2, padx=5, pady=5)
+        self.cancel_button = tk.Button(master, text="Cancel Task", command=lambda: self.runner.cancel())
+        self.cancel_button.grid(column=1, row=2, padx=5, pady=5)
+        self.status_variable = tk.StringVar(value="No task running")
+        self.status_label = tk.Label(master, textvariable=self.status_variable)
+        self.status_label.grid(sticky=tk.W, column=0, columnspan=3, row=3, padx=5, pady=5)
+        self.master.protocol("WM_DELETE_WINDOW", self.quit_gui)
+
     def message_distributor(self):
         if not self.check_variable.get():
             showinfo("User message", self.user_entry.get())
@@ -44,7 +56,26 @@ class MyApp(tk.Frame):
 
     def random_message(self):
         random_words = ["summer", "winter", "is", "cold", "hot", "will be"]
-        return " ".join(random.sample(random_words))
+        return " ".join(random.sample(random_words, len(random_words)))
+
+    def run_task(self):
+        self.task_button.config(state=tk.DISABLED)
+        self.runner.submit(example_job, name="Example task", on_progress=self.update_status,
+                           on_done=self.task_finished, on_cancel=self.task_finished,
+                           on_error=lambda task, error: self.task_finished(task, error))
+
+    def update_status(self, task):
+        self.status_variable.set(task.summary())
+
+    def task_finished(self, task, result=None):
+        self.update_status(task)
+        self.task_button.config(state=tk.NORMAL)
+        if task.status == "error":
+            showinfo("Task failed", result)
+
+    def quit_gui(self):
+        self.runner.shutdown()
+        self.master.destroy()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fun.bedload import CategoryIndex, apply_row, bedload, group_bedload, merge_moments, stream_bedload
+
+
+def make_table(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"W": rng.uniform(2.0, 80.0, n), "S": rng.uniform(1e-4, 0.03, n),
+                         "Q": rng.uniform(1.0, 300.0, n), "U": rng.uniform(0.3, 3.0, n),
+                         "H": rng.uniform(0.1, 3.0, n),
+                         "Morphology": rng.choice(["Riffle-pool", "Step-pool", "Plane bed"], n)})
+
+
+def test_bedload_matches_row_wise_reference():
+    table = make_table(200)
+    expected = table.apply(apply_row, axis=1)
+    pd.testing.assert_frame_equal(bedload(table)[expected.columns], expected, rtol=1e-12)
+
+
+def test_group_bedload_matches_groupby():
+    table = make_table()
+    result = group_bedload(table)
+    grouped = bedload(table).groupby(table["Morphology"])
+    np.testing.assert_allclose(result.loc[grouped.mean().index, "mean_Qb_mpm"], grouped.mean()["Qb_mpm"])
+    np.testing.assert_allclose(result.loc[grouped.std().index, "std_tau"], grouped.std()["tau"])
+
+
+def test_group_bedload_skips_missing_morphology():
+    table = make_table()
+    table.loc[[3, 10, 500], "Morphology"] = np.nan
+    result = group_bedload(table)
+    grouped = bedload(table).groupby(table["Morphology"])
+    assert sorted(result.index) == sorted(grouped.size().index)
+    np.testing.assert_array_equal(result.loc[grouped.size().index, "count"], grouped.size())
+    np.testing.assert_allclose(result.loc[grouped.mean().index, "mean_tau"], grouped.mean()["tau"])
+
+
+def test_stream_bedload_with_missing_morphology(tmp_path):
+    table = make_table()
+    table.loc[[0, 1999], "Morphology"] = np.nan
+    csv_file = str(tmp_path / "bedload_dataset")
+    table.to_csv(csv_file, index=False)
+    streamed = stream_bedload(csv_file, chunksize=300)
+    in_memory = group_bedload(table)
+    pd.testing.assert_frame_equal(streamed.sort_index(), in_memory.sort_index(), rtol=1e-10)
+    assert streamed["count"].sum() == len(table) - 2
+
+
+def test_merge_moments_equals_moments_of_all_rows():
+    rng = np.random.default_rng(1)
+    values = rng.normal(1e4, 1.0, (1000, 2))
+    labels = rng.choice(["a", "b", "c"], 1000)
+    index = CategoryIndex()
+    # the first part has no "c" rows: merging pads the categories
+    first = labels[:400] != "c"
+    moments = index.group_moments(index.encode(labels[:400][first]), values[:400][first])
+    moments = merge_moments(moments, index.group_moments(index.encode(labels[400:]), values[400:]))
+    for code, label in enumerate(index.categories):
+        rows = np.r_[values[:400][first & (labels[:400] == label)], values[400:][labels[400:] == label]]
+        assert moments[0][code, 0] == len(rows)
+        np.testing.assert_allclose(moments[1][code], rows.mean(axis=0), rtol=1e-12)
+        np.testing.assert_allclose(moments[2][code], ((rows - rows.mean(axis=0)) ** 2).sum(axis=0), rtol=1e-8)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fun.converter import convert, feet_to_meter
+
+
+def test_convert_matches_feet_to_meter():
+    values = [1.0, 2.5, 10.0]
+    converted, invalid = convert(np.array(values))
+    np.testing.assert_allclose(converted, feet_to_meter(*values))
+    assert not invalid.any()
+
+
+def test_convert_scalar_and_masked_list():
+    assert convert(1.0, "m", "mm") == (1000.0, False)
+    converted, invalid = convert([1, "a", None, 3], "cfs", "m3/s")
+    assert invalid.tolist() == [False, True, True, False]
+    np.testing.assert_allclose(converted[[0, 3]], np.array([1, 3]) * 0.3048 ** 3)
+
+
+def test_convert_unknown_or_incompatible_units():
+    with pytest.raises(ValueError):
+        convert(1.0, "ft", "furlong")
+    with pytest.raises(ValueError):
+        convert(1.0, "ft", "cfs")
+
+
+def test_convert_in_place():
+    values = np.array([1.0, 2.0])
+    converted, invalid = convert(values, out=values)
+    assert converted is values
+    np.testing.assert_allclose(values, [0.3048, 0.6096])
+
+
+def test_convert_pandas_writes_out():
+    series = pd.Series([1.0, 2.0, 4.0], index=["a", "b", "c"], name="depth")
+    out = np.empty(3)
+    converted, invalid = convert(series, out=out)
+    np.testing.assert_allclose(out, [0.3048, 0.6096, 1.2192])
+    assert isinstance(converted, pd.Series)
+    assert converted.name == "depth" and converted.index.tolist() == ["a", "b", "c"]
+    np.testing.assert_array_equal(converted.to_numpy(), out)
+    assert not invalid.any()
+
+
+def test_convert_mixed_dataframe():
+    df = pd.DataFrame({"h": [1.0, 2.0], "note": ["3", "dry"]}, index=[10, 20])
+    converted, invalid = convert(df, "m", "mm")
+    assert isinstance(converted, pd.DataFrame)
+    assert converted.columns.tolist() == ["h", "note"] and converted.index.tolist() == [10, 20]
+    np.testing.assert_allclose(converted.loc[10], [1000.0, 3000.0])
+    assert invalid.to_numpy().tolist() == [[False, False], [False, True]]
+
+
+def test_convert_rejects_non_float_out():
+    with pytest.raises(TypeError, match="float ndarray"):
+        convert(np.array([1.0, 2.0]), out=np.empty(2, dtype=int))
+    with pytest.raises(TypeError, match="float ndarray"):
+        convert(pd.Series([1.0, 2.0]), out=[0.0, 0.0])
@@ -0,0 +1,48 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("osgeo.ogr")
+from feature_writer import iter_json_records, write_features
+
+ITEMS = [{"id": 1, "name": "Dreisam", "wkt": "POINT (7.85 47.99)"}, 12345678, -0.5, "a, b]", [1, [2, 3]],
+         {"nested": {"values": [1.0, 2.0]}}, None, True]
+
+
+def write_text(tmp_path, text):
+    json_file = os.path.join(str(tmp_path), "records.json")
+    with open(json_file, "w") as f:
+        f.write(text)
+    return json_file
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 16, 1 << 16])
+def test_items_straddling_read_size(tmp_path, read_size):
+    json_file = write_text(tmp_path, "  \n" + json.dumps(ITEMS, indent=2))
+    assert list(iter_json_records(json_file, read_size=read_size)) == ITEMS
+
+
+@pytest.mark.parametrize("text", ["[]", " [ ] ", "[\n]"])
+def test_empty_array(tmp_path, text):
+    assert list(iter_json_records(write_text(tmp_path, text), read_size=1)) == []
+
+
+@pytest.mark.parametrize("text", ["[1, 2", "[1, 2,", '[{"id": 1}, {"id": 2', '[1, "open'])
+@pytest.mark.parametrize("read_size", [1, 4, 1 << 16])
+def test_truncated_input(tmp_path, text, read_size):
+    with pytest.raises(ValueError):
+        list(iter_json_records(write_text(tmp_path, text), read_size=read_size))
+
+
+@pytest.mark.parametrize("text", ['{"id": 1}', "12", "", "  "])
+def test_non_array_input(tmp_path, text):
+    with pytest.raises(ValueError):
+        list(iter_json_records(write_text(tmp_path, text)))
+
+
+def test_unknown_layer_type(tmp_path, capsys):
+    out_file = os.path.join(str(tmp_path), "lines.gpkg")
+    assert write_features(out_file, [("LINESTRING (0 0, 1 1)", {})], layer_type="polyline") is None
+    assert "ERROR" in capsys.readouterr().out
+    assert not os.path.exists(out_file)
@@ -0,0 +1,17 @@
+import numpy as np
+from fun.floating_stability import STABLE, evaluate_stability, make_cases, scalar_stability
+
+
+def test_evaluate_stability_matches_scalar_reference():
+    cases = make_cases([2.0, 4.0], [6.0], [0.5, 1.0], [0.05], [1500.0, 2400.0, 7800.0])
+    results = evaluate_stability(cases)
+    for case, result in zip(cases, results):
+        f, h_M = scalar_stability(*case.tolist())
+        np.testing.assert_allclose(result["f"], f)
+        np.testing.assert_allclose(result["h_M"], h_M)
+
+
+def test_light_wide_pontoon_is_stable():
+    result = evaluate_stability(make_cases(4.0, 6.0, 1.0, 0.05, 1500.0))[0]
+    assert result["f"] > 0
+    assert result["stability"] == STABLE
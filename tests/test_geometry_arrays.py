@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from geometry_arrays import wkt2arrays, wkt_metrics
+
+X0, Y0 = 412000.0, 5318000.0
+
+
+def square(x, y, size, clockwise=False):
+    ring = [(x, y), (x + size, y), (x + size, y + size), (x, y + size), (x, y)]
+    if clockwise:
+        ring = ring[::-1]
+    return "(%s)" % ", ".join("%.3f %.3f" % point for point in ring)
+
+
+def test_polygon_with_hole():
+    wkt = "POLYGON (%s, %s)" % (square(X0, Y0, 10.0), square(X0 + 2.0, Y0 + 2.0, 2.0, clockwise=True))
+    metrics = wkt_metrics([wkt])
+    assert metrics["area"][0] == pytest.approx(96.0)
+    assert metrics["perimeter"][0] == pytest.approx(48.0)
+    assert metrics["centroid_x"][0] == pytest.approx(X0 + (100.0 * 5.0 - 4.0 * 3.0) / 96.0)
+    assert metrics["centroid_y"][0] == pytest.approx(Y0 + (100.0 * 5.0 - 4.0 * 3.0) / 96.0)
+    assert (metrics["x_min"][0], metrics["y_max"][0]) == (X0, Y0 + 10.0)
+
+
+def test_multipolygons_with_holes_and_orientations():
+    wkt_list = ["MULTIPOLYGON ((%s), (%s, %s))" % (square(X0, Y0, 1.0, clockwise=True), square(X0 + 5.0, Y0, 4.0),
+                                                   square(X0 + 6.0, Y0 + 1.0, 1.0)),
+                "MultiPolygon (((%.1f %.1f, %.1f %.1f, %.1f %.1f, %.1f %.1f)))" % (X0, Y0, X0 + 4.0, Y0, X0 + 4.0,
+                                                                                   Y0 + 3.0, X0, Y0)]
+    metrics = wkt_metrics(wkt_list)
+    np.testing.assert_allclose(metrics["area"], [1.0 + 16.0 - 1.0, 6.0])
+    np.testing.assert_allclose(metrics["perimeter"], [4.0 + 16.0 + 4.0, 12.0])
+    np.testing.assert_allclose(metrics["x_max"], [X0 + 9.0, X0 + 4.0])
+    np.testing.assert_allclose(metrics["centroid_x"][1], X0 + 8.0 / 3.0)
+    np.testing.assert_allclose(metrics["centroid_y"][1], Y0 + 1.0)
+
+
+def test_coordinates_with_z_and_m():
+    wkt_list = ["POLYGON Z ((0 0 5, 4 0 6, 4 3 7, 0 0 5))", "POLYGON ZM ((0 0 5 1, 3 0 5 2, 3 3 5 3, 0 3 5 4, 0 0 5 1))"]
+    arrays = wkt2arrays(wkt_list)
+    assert arrays["coords"].shape == (9, 2)
+    np.testing.assert_array_equal(arrays["ring_offsets"], [0, 4, 9])
+    np.testing.assert_array_equal(arrays["ring_is_hole"], [False, False])
+    metrics = wkt_metrics(wkt_list)
+    np.testing.assert_allclose(metrics["area"], [6.0, 9.0])
+    np.testing.assert_allclose(metrics["perimeter"], [12.0, 12.0])
+
+
+def test_unclosed_ring_gets_a_closing_segment():
+    metrics = wkt_metrics(["POLYGON ((0 0, 2 0, 2 2, 0 2))"])
+    assert metrics["area"][0] == pytest.approx(4.0)
+    assert metrics["perimeter"][0] == pytest.approx(8.0)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("osgeo.gdal")
+pytest.importorskip("skimage.graph")
+import least_cost_path
+
+
+def test_route_from_source_follows_the_cheap_corridor():
+    cost_array = least_cost_path.create_cost_array(np.where(np.eye(20) > 0, 1.0, 100.0))
+    (index_path, cost), = least_cost_path.route_from_source((0, 0), [(19, 19)], cost_array)
+    np.testing.assert_array_equal(index_path[0], index_path[1])
+    assert cost < 30.0
+
+
+def test_collect_routes_keeps_the_pair_order():
+    sources = {(0, 0): [(2, (5, 5)), (0, (1, 1))], (9, 9): [(1, (3, 3))]}
+    results = [[("path_2", 2.0), ("path_0", 0.0)], [("path_1", 1.0)]]
+    index_paths, costs = least_cost_path.collect_routes(sources, [(0, 0), (9, 9)], results, 3)
+    assert index_paths == ["path_0", "path_1", "path_2"]
+    assert costs == [0.0, 1.0, 2.0]
+
+
+def write_cost_raster(file_name, array, nan_value=-9999.0, epsg=25832):
+    gdal = pytest.importorskip("osgeo.gdal")
+    from osgeo import osr
+    ds = gdal.GetDriverByName("GTiff").Create(file_name, array.shape[1], array.shape[0], 1, gdal.GDT_Float32,
+                                              options=["TILED=YES", "BLOCKXSIZE=16", "BLOCKYSIZE=16"])
+    ds.SetGeoTransform((400000.0, 1.0, 0.0, 5300000.0, 0.0, -1.0))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(epsg)
+    ds.SetProjection(srs.ExportToWkt())
+    band = ds.GetRasterBand(1)
+    band.SetNoDataValue(nan_value)
+    band.WriteArray(np.where(np.isnan(array), nan_value, array))
+    ds = None
+    return file_name
+
+
+def test_get_nan_penalty_without_valid_pixels(tmp_path):
+    gdal = pytest.importorskip("osgeo.gdal")
+    band = gdal.Open(write_cost_raster(str(tmp_path / "nan.tif"), np.full((40, 40), np.nan))).GetRasterBand(1)
+    assert least_cost_path.get_nan_penalty(band, (16, 16)) is None
+    pytest.importorskip("geo_utils")
+    assert least_cost_path.identify_path_tiled(str(tmp_path / "nan.tif"), str(tmp_path / "path.tif"),
+                                               (400005.5, 5299994.5), (400030.5, 5299970.5)) is None
+
+
+def test_get_nan_penalty_streams_the_band_maximum(tmp_path):
+    gdal = pytest.importorskip("osgeo.gdal")
+    array = np.random.default_rng(0).random((50, 70)) * 3.0
+    array[:20, :] = np.nan
+    band = gdal.Open(write_cost_raster(str(tmp_path / "cost.tif"), array)).GetRasterBand(1)
+    assert least_cost_path.get_nan_penalty(band, (16, 16)) == pytest.approx(np.nanmax(array) * 10, rel=1e-6)
+
+
+@pytest.mark.parametrize("buffer_pixels", [5, 100])
+def test_identify_path_tiled_equals_identify_path(tmp_path, buffer_pixels):
+    gdal = pytest.importorskip("osgeo.gdal")
+    pytest.importorskip("geo_utils")
+    rows, cols = np.mgrid[0:60, 0:80]
+    # expensive terrain with a cheap channel from (10, 8) to (50, 70) and a no-data patch
+    array = 5.0 + np.random.default_rng(1).random((60, 80))
+    channel = np.abs(rows - (10 + (cols - 8) * 40 / 62)) < 1.0
+    array[channel & (cols >= 8) & (cols <= 70)] = 1.0
+    array[0:5, 60:75] = np.nan
+    cost_file = write_cost_raster(str(tmp_path / "cost.tif"), array)
+    start_coord = (400000.0 + 8.5, 5300000.0 - 10.5)
+    stop_coord = (400000.0 + 70.5, 5300000.0 - 50.5)
+
+    full_file = str(tmp_path / "path_full.tif")
+    tiled_file = str(tmp_path / "path_tiled.tif")
+    least_cost_path.identify_path(cost_file, full_file, start_coord, stop_coord)
+    cost = least_cost_path.identify_path_tiled(cost_file, tiled_file, start_coord, stop_coord,
+                                               buffer_pixels=buffer_pixels, block_size=(16, 16))
+    full_path = gdal.Open(full_file).GetRasterBand(1).ReadAsArray()
+    tiled_path = gdal.Open(tiled_file).GetRasterBand(1).ReadAsArray()
+    assert cost is not None
+    assert full_path[10, 8] == 1 and full_path[50, 70] == 1
+    np.testing.assert_array_equal(tiled_path, full_path)
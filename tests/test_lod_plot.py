@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from fun.lod_plot import LODSeries, bin_extrema, lttb, minmax_downsample
+
+
+def test_bin_extrema_ignores_nan_and_keeps_positions():
+    y = np.array([1.0, 5.0, np.nan, -2.0, 3.0, 0.0, 7.0])
+    x_min, y_min, x_max, y_max = bin_extrema(y, 3)
+    assert y_min.tolist() == [1.0, -2.0, 7.0]
+    assert y_max.tolist() == [5.0, 3.0, 7.0]
+    assert x_min.tolist() == [0, 3, 6]
+    assert x_max.tolist() == [1, 4, 6]
+
+
+def test_minmax_downsample_keeps_peaks():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=100000)
+    y[12345] = 50.0
+    y[67890] = -50.0
+    x = np.arange(y.size, dtype=float)
+    x_out, y_out = minmax_downsample(x, y, 500)
+    assert len(y_out) <= 1000
+    assert np.all(np.diff(x_out) >= 0)
+    assert y_out.max() == 50.0 and x_out[y_out.argmax()] == 12345
+    assert y_out.min() == -50.0 and x_out[y_out.argmin()] == 67890
+
+
+def test_lttb_selects_endpoints_and_spikes():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[500] = 10.0
+    x_out, y_out = lttb(x, y, 50)
+    assert len(x_out) == 50
+    assert x_out[0] == 0 and x_out[-1] == 999
+    assert np.all(np.diff(x_out) > 0)
+    assert 10.0 in y_out
+
+
+def test_lttb_returns_short_series_unchanged():
+    x_out, y_out = lttb([0, 1, 2], [3, 4, 5], 10)
+    assert x_out.tolist() == [0, 1, 2] and y_out.tolist() == [3, 4, 5]
+
+
+def test_lod_series_view_matches_raw_extrema(tmp_path):
+    rng = np.random.default_rng(1)
+    y = rng.normal(size=200000).cumsum()
+    series = LODSeries(np.arange(y.size, dtype=float), y)
+    x_out, y_out = series.view(50000, 150000, n_pixels=400)
+    window = y[50000:150001]
+    assert y_out.max() == window.max() and y_out.min() == window.min()
+    series.save(str(tmp_path / "pyramid"))
+    loaded = LODSeries.load(str(tmp_path / "pyramid"))
+    x_loaded, y_loaded = loaded.view(50000, 150000, n_pixels=400)
+    np.testing.assert_array_equal(y_loaded, y_out)
+    np.testing.assert_array_equal(x_loaded, x_out)
+
+
+def test_from_csv_cache_depends_on_settings_and_evicts_stale_entries(tmp_path):
+    csv_file = str(tmp_path / "gauge.csv")
+    y = np.random.default_rng(2).normal(size=20000)
+    np.savetxt(csv_file, np.column_stack((np.arange(y.size), y)), delimiter=",", header="t,h", comments="")
+    cache_dir = str(tmp_path / "cache")
+    fine = LODSeries.from_csv(csv_file, "h", x_column="t", cache_dir=cache_dir)
+    coarse = LODSeries.from_csv(csv_file, "h", x_column="t", cache_dir=cache_dir, bin_size=64, factor=4)
+    assert (fine.bin_size, fine.factor) == (16, 8)
+    assert (coarse.bin_size, coarse.factor) == (64, 4)
+    assert len(coarse.levels[0][0]) == -(-y.size // 64)
+    # both settings are cached and reloaded memory-mapped
+    assert len(os.listdir(cache_dir)) == 2
+    reloaded = LODSeries.from_csv(csv_file, "h", x_column="t", cache_dir=cache_dir, bin_size=64, factor=4)
+    assert reloaded.bin_size == 64 and isinstance(reloaded.y, np.memmap)
+    np.testing.assert_array_equal(reloaded.levels[0][1], coarse.levels[0][1])
+    # a modified file replaces the pyramids of all settings
+    stat = os.stat(csv_file)
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    LODSeries.from_csv(csv_file, "h", x_column="t", cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
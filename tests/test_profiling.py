@@ -0,0 +1,75 @@
+import collections
+import json
+import numpy as np
+from benchmarks.__main__ import run_suite
+from fun import profiling
+from fun.converter import convert
+
+
+def test_profiled_stage_emits_record(tmp_path, monkeypatch):
+    output = str(tmp_path / "profile.jsonl")
+    monkeypatch.setitem(profiling.state, "output", output)
+    monkeypatch.setitem(profiling.state, "records", collections.deque(maxlen=profiling.MAX_RECORDS))
+    convert(np.arange(1000.0).reshape(10, 100))
+    with open(output) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 1
+    assert records[0]["stage"] == "fun.converter.convert"
+    assert records[0]["n_items"] == 1000
+    assert records[0]["unit"] == "values"
+    assert records[0]["ok"]
+    assert profiling.get_records("fun.converter.convert") == records
+
+
+def test_profiled_stage_is_silent_while_disabled(monkeypatch):
+    monkeypatch.setitem(profiling.state, "output", None)
+    monkeypatch.setitem(profiling.state, "records", collections.deque(maxlen=profiling.MAX_RECORDS))
+    assert convert(1.0) == (0.3048, False)
+    assert profiling.get_records() == []
+
+
+def test_nested_stage_keeps_the_outer_peak(monkeypatch):
+    monkeypatch.setitem(profiling.state, "output", None)
+    monkeypatch.setitem(profiling.state, "records", collections.deque(maxlen=profiling.MAX_RECORDS))
+    with profiling.Stage("outer") as outer:
+        peak_reset = outer.peak_reset
+        with profiling.Stage("inner") as inner:
+            pass
+    assert inner.record["peak_rss_scope"] == "process"
+    assert outer.record["peak_rss_scope"] == ("stage" if peak_reset else "process")
+    assert profiling.state["active_stages"] == 0
+
+
+def test_records_are_capped(monkeypatch):
+    monkeypatch.setitem(profiling.state, "output", None)
+    monkeypatch.setitem(profiling.state, "records", collections.deque(maxlen=3))
+    for i in range(5):
+        profiling.emit({"stage": "stage%i" % i})
+    assert [record["stage"] for record in profiling.get_records()] == ["stage2", "stage3", "stage4"]
+
+
+class FailingSetupSuite:
+    params = [1, 2]
+    unit = "items"
+    calls = []
+
+    def setup(self, size):
+        self.calls.append(("setup", size))
+        if size == 1:
+            raise RuntimeError("no space left on device")
+
+    def teardown(self, size):
+        self.calls.append(("teardown", size))
+
+    def time_noop(self, size):
+        self.calls.append(("time_noop", size))
+
+
+def test_run_suite_tears_down_after_failed_setup(monkeypatch):
+    monkeypatch.setitem(profiling.state, "output", None)
+    monkeypatch.setitem(profiling.state, "records", collections.deque(maxlen=profiling.MAX_RECORDS))
+    FailingSetupSuite.calls = []
+    records = run_suite(FailingSetupSuite, ["time_noop"])
+    assert FailingSetupSuite.calls == [("setup", 1), ("teardown", 1), ("setup", 2), ("time_noop", 2),
+                                       ("teardown", 2)]
+    assert [record["size"] for record in records] == [2]
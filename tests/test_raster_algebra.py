@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+gdal = pytest.importorskip("osgeo.gdal")
+import raster_algebra
+
+
+def write_tif(file_name, array, nan_value=-9999.0):
+    ds = gdal.GetDriverByName("GTiff").Create(file_name, array.shape[1], array.shape[0], 1, gdal.GDT_Float32)
+    ds.SetGeoTransform((0.0, 1.0, 0.0, 0.0, 0.0, -1.0))
+    band = ds.GetRasterBand(1)
+    band.SetNoDataValue(nan_value)
+    band.WriteArray(array)
+    ds = None
+    return file_name
+
+
+def read_tif(file_name):
+    ds = gdal.Open(file_name)
+    return ds.GetRasterBand(1).ReadAsArray().astype(float)
+
+
+def test_evaluate_reads_each_raster_into_its_own_buffer(tmp_path):
+    h = np.full((40, 30), 2.0)
+    u = np.full((40, 30), 3.0)
+    u[0, 0] = -9999.0
+    rasters = {"h": write_tif(str(tmp_path / "h.tif"), h), "u": write_tif(str(tmp_path / "u.tif"), u)}
+    out_file = str(tmp_path / "out.tif")
+    raster_algebra.evaluate("u - h", rasters, out_file, block_size=(16, 16), n_threads=2)
+    result = read_tif(out_file)
+    assert result[0, 0] == -9999.0
+    np.testing.assert_allclose(result.ravel()[1:], 1.0)
+
+
+def test_evaluate_without_rasters_in_expression(tmp_path):
+    rasters = {"h": write_tif(str(tmp_path / "h.tif"), np.ones((8, 8)))}
+    assert raster_algebra.evaluate("2 * g", rasters, str(tmp_path / "out.tif"), constants={"g": 9.81}) == -1
+
+
+def test_cell_statistics_with_few_open_rasters(tmp_path):
+    rng = np.random.default_rng(0)
+    stack = rng.random((7, 40, 30))
+    stack[2, :5, :5] = -9999.0
+    file_names = [write_tif(str(tmp_path / ("t%i.tif" % i)), layer) for i, layer in enumerate(stack)]
+    outputs = {stat: str(tmp_path / ("%s.tif" % stat)) for stat in ("mean", "max", "count")}
+    raster_algebra.cell_statistics(file_names, outputs, block_size=(16, 16), n_threads=2, max_open=2)
+    stack = np.where(stack == -9999.0, np.nan, stack).astype(np.float32)
+    np.testing.assert_allclose(read_tif(outputs["mean"]), np.nanmean(stack, axis=0), rtol=1e-5)
+    np.testing.assert_allclose(read_tif(outputs["max"]), np.nanmax(stack, axis=0), rtol=1e-6)
+    np.testing.assert_array_equal(read_tif(outputs["count"]), (~np.isnan(stack)).sum(axis=0))
+
+
+def test_cell_statistics_opens_each_raster_once_per_thread(tmp_path, monkeypatch):
+    stack = np.random.default_rng(1).random((12, 48, 48))
+    file_names = [write_tif(str(tmp_path / ("t%i.tif" % i)), layer) for i, layer in enumerate(stack)]
+    opened = []
+    gdal_open = raster_algebra.gdal.Open
+    monkeypatch.setattr(raster_algebra.gdal, "Open", lambda file_name, *args: opened.append(file_name) or
+                        gdal_open(file_name, *args))
+    outputs = {"mean": str(tmp_path / "mean.tif")}
+    raster_algebra.cell_statistics(file_names, outputs, block_size=(16, 16), n_threads=2)
+    # check_alignment opens every raster once and each thread keeps all rasters open
+    assert len(opened) <= 3 * len(file_names)
+    np.testing.assert_allclose(read_tif(outputs["mean"]), stack.mean(axis=0), rtol=1e-5)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+import raster_band_info
+from raster_band_info import coarsen_dyadic, dyadic_histogram, merge_dyadic, rebin_dyadic
+
+
+def merged_histogram(blocks, n_fine=raster_band_info.FINE_BINS):
+    total = {}
+    for block in blocks:
+        merge_dyadic(total, dyadic_histogram(block, n_fine=n_fine), n_fine=n_fine)
+    return total
+
+
+def test_dyadic_histogram_merges_without_loss():
+    rng = np.random.default_rng(0)
+    blocks = [rng.normal(loc, scale, 1000) for loc, scale in ((0.0, 1.0), (500.0, 0.01), (-3e3, 10.0))]
+    total = merged_histogram(blocks, n_fine=1024)
+    assert total["counts"].size <= 1024
+    assert total["counts"].sum() == 3000
+    # every value lies in its bin
+    values = np.concatenate(blocks)
+    index = np.floor(values / 2.0 ** total["k"]).astype(np.int64) - total["offset"]
+    np.testing.assert_array_equal(np.bincount(index, minlength=total["counts"].size), total["counts"])
+
+
+def test_coarsen_dyadic_sums_neighbor_bins():
+    hist = {"k": 0, "offset": -3, "counts": np.array([1, 2, 3, 4, 5], dtype=np.int64)}
+    # bins -3 ... 1 of width 1 become bins -2 (-4 ... -3), -1, and 0 of width 2
+    coarse = coarsen_dyadic(hist, 1)
+    assert coarse["offset"] == -2
+    assert coarse["counts"].tolist() == [1, 5, 9]
+
+
+def test_rebin_dyadic_matches_numpy_histogram():
+    rng = np.random.default_rng(1)
+    values = rng.integers(0, 256, 100000).astype(float)
+    total = merged_histogram(np.array_split(values, 7))
+    expected = np.histogram(values, bins=256, range=(0.0, 255.0))[0]
+    np.testing.assert_array_equal(rebin_dyadic(total, (0.0, 255.0), 256), expected)
+
+    values = rng.normal(size=100000)
+    total = merged_histogram(np.array_split(values, 7))
+    hist_range = (values.min(), values.max())
+    expected = np.histogram(values, bins=100, range=hist_range)[0]
+    rebinned = rebin_dyadic(total, hist_range, 100)
+    assert rebinned.sum() == values.size
+    assert np.abs(rebinned - expected).sum() <= 0.001 * values.size
+
+
+def test_rebin_dyadic_constant_values():
+    total = merged_histogram([np.full(10, 3.0)])
+    np.testing.assert_array_equal(rebin_dyadic(total, (3.0, 3.0), 4), np.histogram(np.full(10, 3.0), bins=4)[0])
+
+
+def test_compute_band_statistics_in_one_pass(tmp_path):
+    gdal = pytest.importorskip("osgeo.gdal")
+    rng = np.random.default_rng(2)
+    data = rng.normal(400.0, 20.0, (300, 200)).astype(np.float32)
+    data[:10, :10] = -9999.0
+    file_name = str(tmp_path / "dem.tif")
+    ds = gdal.GetDriverByName("GTiff").Create(file_name, 200, 300, 1, gdal.GDT_Float32,
+                                              options=["TILED=YES", "BLOCKXSIZE=64", "BLOCKYSIZE=64"])
+    ds.GetRasterBand(1).SetNoDataValue(-9999.0)
+    ds.GetRasterBand(1).WriteArray(data)
+    ds = None
+    values = data[data != -9999.0].astype(float)
+    stats = raster_band_info.compute_band_statistics(file_name, 1, n_bins=64, n_threads=2)
+    exact = raster_band_info.compute_band_statistics(file_name, 1, n_bins=64, n_threads=2, exact_histogram=True)
+    assert stats["nodata"] == 100 and stats["count"] == values.size
+    np.testing.assert_allclose(stats["mean"], values.mean())
+    np.testing.assert_allclose(stats["std"], values.std())
+    np.testing.assert_array_equal(exact["hist"], np.histogram(values, bins=64, range=exact["hist_range"])[0])
+    assert np.abs(stats["hist"] - exact["hist"]).sum() <= 0.001 * values.size
+
+
+def test_write_statistics_skips_bands_without_valid_pixels(tmp_path):
+    gdal = pytest.importorskip("osgeo.gdal")
+    file_name = str(tmp_path / "empty.tif")
+    ds = gdal.GetDriverByName("GTiff").Create(file_name, 20, 10, 1, gdal.GDT_Float32)
+    ds.GetRasterBand(1).SetNoDataValue(-9999.0)
+    ds.GetRasterBand(1).Fill(-9999.0)
+    ds = None
+    stats = raster_band_info.compute_band_statistics(file_name, 1, n_threads=1)
+    assert stats["count"] == 0 and stats["nodata"] == 200
+    raster_band_info.write_statistics(file_name, 1, stats)
+    src = gdal.Open(file_name)
+    band = src.GetRasterBand(1)
+    assert raster_band_info.get_stored_statistics(band) is None
+    assert band.GetMetadataItem("STATISTICS_NODATA_COUNT") is None
+    band = None
+    src = None
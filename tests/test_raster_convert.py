@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+gdal = pytest.importorskip("osgeo.gdal")
+from osgeo import ogr, osr
+import raster_convert
+
+GEO_TRANSFORM = (400000.0, 1.0, 0.0, 5300000.0, 0.0, -1.0)
+
+
+def write_tif(file_name, array, rdtype=gdal.GDT_Int32, nan_value=None):
+    ds = gdal.GetDriverByName("GTiff").Create(file_name, array.shape[1], array.shape[0], 1, rdtype)
+    ds.SetGeoTransform(GEO_TRANSFORM)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(25832)
+    ds.SetProjection(srs.ExportToWkt())
+    band = ds.GetRasterBand(1)
+    if nan_value is not None:
+        band.SetNoDataValue(nan_value)
+    band.WriteArray(array)
+    ds = None
+    return file_name
+
+
+def patches(rows=50, cols=70):
+    y, x = np.mgrid[0:rows, 0:cols]
+    return ((np.sin(x / 7.0) + np.cos(y / 5.0) > 0.3).astype(np.int32) + 2 * (x > 45)).astype(np.int32)
+
+
+def polygon_areas(lyr, field_index=0):
+    return sorted((feature.GetField(field_index), round(feature.GetGeometryRef().GetArea(), 6)) for feature in lyr)
+
+
+def test_tiled_raster2polygon_equals_polygonize(tmp_path):
+    tif = write_tif(str(tmp_path / "patches.tif"), patches())
+    out_shp = str(tmp_path / "tiled.shp")
+    n_polygons = raster_convert.raster2polygon(tif, out_shp, tile_size=16)
+
+    band = gdal.Open(tif).GetRasterBand(1)
+    reference = ogr.GetDriverByName("Memory").CreateDataSource("")
+    reference_lyr = reference.CreateLayer("reference", None, ogr.wkbPolygon)
+    reference_lyr.CreateField(ogr.FieldDefn("values", ogr.OFTInteger))
+    gdal.Polygonize(band, None, reference_lyr, 0, [], callback=None)
+
+    tiled = ogr.Open(out_shp)
+    assert n_polygons == reference_lyr.GetFeatureCount()
+    assert polygon_areas(tiled.GetLayer()) == polygon_areas(reference_lyr)
+
+
+def test_raster2polygon_skips_float_default_no_data(tmp_path):
+    no_data = float(np.finfo(np.float32).min)
+    array = patches().astype(np.float32)
+    array[:10, :] = no_data
+    tif = write_tif(str(tmp_path / "float.tif"), array, rdtype=gdal.GDT_Float32, nan_value=no_data)
+    out_shp = str(tmp_path / "float.shp")
+    raster_convert.raster2polygon(tif, out_shp, tile_size=16, skip_no_data=True)
+    areas = polygon_areas(ogr.Open(out_shp).GetLayer())
+    assert {value for value, area in areas} <= {0, 1, 2, 3}
+    assert sum(area for value, area in areas) == pytest.approx(array.size - 10 * array.shape[1])
+
+
+def test_rasterize_round_trip(tmp_path):
+    array = patches()
+    tif = write_tif(str(tmp_path / "patches.tif"), array)
+    out_shp = str(tmp_path / "patches.shp")
+    raster_convert.raster2polygon(tif, out_shp, tile_size=16)
+    out_tif = str(tmp_path / "round_trip.tif")
+    raster_convert.rasterize(out_shp, out_tif, pixel_size=1, no_data_value=-9999, rdtype=gdal.GDT_Int32,
+                             tile_size=32, field_name="values")
+    ds = gdal.Open(out_tif)
+    assert ds.GetGeoTransform() == GEO_TRANSFORM
+    np.testing.assert_array_equal(ds.GetRasterBand(1).ReadAsArray(), array)
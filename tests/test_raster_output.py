@@ -0,0 +1,63 @@
+import inspect
+import numpy as np
+import pytest
+
+gdal = pytest.importorskip("osgeo.gdal")
+from osgeo import osr
+import raster_output
+
+
+def test_predictor_by_data_type():
+    for name in ("Byte", "Int8", "UInt16", "Int16", "UInt32", "Int32", "UInt64", "Int64"):
+        if hasattr(gdal, "GDT_" + name):
+            assert raster_output.get_predictor(getattr(gdal, "GDT_" + name)) == 2
+    assert raster_output.get_predictor(gdal.GDT_Float32) == 3
+    assert raster_output.get_predictor(gdal.GDT_Float64) == 3
+    assert raster_output.get_predictor(gdal.GDT_CFloat32) is None
+    assert "PREDICTOR=3" in raster_output.get_cog_options(gdal.GDT_Float32)
+
+
+def test_profiles_have_the_same_default():
+    defaults = [inspect.signature(f).parameters["profile"].default
+                for f in (raster_output.create_raster, raster_output.reproject_raster)]
+    assert defaults == ["gtiff", "gtiff"]
+
+
+@pytest.mark.parametrize("profile", raster_output.output_profiles)
+def test_create_raster_round_trip(tmp_path, profile):
+    rdtype = getattr(gdal, "GDT_Int64", gdal.GDT_Int32)
+    array = np.arange(600 * 700).reshape(600, 700) % 1000
+    file_name = str(tmp_path / ("%s.tif" % profile))
+    raster_output.create_raster(file_name, array, origin=(400000.0, 5300000.0), epsg=25832, pixel_width=1,
+                                pixel_height=-1, nan_value=-1, rdtype=rdtype, profile=profile)
+    band = gdal.Open(file_name).GetRasterBand(1)
+    np.testing.assert_array_equal(band.ReadAsArray(), array)
+    assert band.GetNoDataValue() == -1
+    if profile == "cog":
+        assert band.GetOverviewCount() >= 1
+
+
+def test_create_raster_replaces_nan(tmp_path):
+    array = np.ones((20, 30), dtype=np.float32)
+    array[3, 4] = np.nan
+    file_name = str(tmp_path / "nan.tif")
+    raster_output.create_raster(file_name, array, origin=(0.0, 0.0), epsg=25832, pixel_width=1, pixel_height=-1)
+    result = gdal.Open(file_name).GetRasterBand(1).ReadAsArray()
+    assert result[3, 4] == -9999.0
+    assert result.sum() == 20 * 30 - 1 - 9999.0
+
+
+def test_reproject_raster_writes_gtiff(tmp_path):
+    src = gdal.GetDriverByName("MEM").Create("", 40, 30, 1, gdal.GDT_Float32)
+    src.SetGeoTransform((400000.0, 10.0, 0.0, 5300000.0, 0.0, -10.0))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(25832)
+    src.SetProjection(srs.ExportToWkt())
+    src.GetRasterBand(1).WriteArray(np.full((30, 40), 5.0, dtype=np.float32))
+    target = osr.SpatialReference()
+    target.ImportFromEPSG(25832)
+    out_file = str(tmp_path / "reprojected.tif")
+    raster_output.reproject_raster(src, srs, target, out_file_name=out_file).FlushCache()
+    ds = gdal.Open(out_file)
+    assert (ds.RasterXSize, ds.RasterYSize) == (40, 30)
+    assert ds.GetRasterBand(1).GetOverviewCount() == 0
@@ -0,0 +1,56 @@
+import pytest
+
+ogr = pytest.importorskip("osgeo.ogr")
+osr = pytest.importorskip("osgeo.osr")
+import reproject
+
+
+def write_points(file_name, n, epsg=4326, z=None):
+    srs = None
+    if epsg:
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(epsg)
+    ds = ogr.GetDriverByName("ESRI Shapefile").CreateDataSource(file_name)
+    lyr = ds.CreateLayer("points", srs, ogr.wkbPoint if z is None else ogr.wkbPoint25D)
+    lyr.CreateField(ogr.FieldDefn("id", ogr.OFTInteger))
+    for i in range(n):
+        feature = ogr.Feature(lyr.GetLayerDefn())
+        feature.SetField("id", i)
+        if z is None:
+            feature.SetGeometry(ogr.CreateGeometryFromWkt("POINT (%f %f)" % (8.0 + i * 1e-3, 48.0)))
+        else:
+            feature.SetGeometry(ogr.CreateGeometryFromWkt("POINT (%f %f %f)" % (8.0 + i * 1e-3, 48.0, z + i)))
+        lyr.CreateFeature(feature)
+    ds = None
+    return file_name
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_reproject_layer_keeps_all_features_in_order(tmp_path, n_workers):
+    src = write_points(str(tmp_path / "points.shp"), 250)
+    dst = str(tmp_path / "points_web.shp")
+    assert reproject.reproject_layer(src, dst, 3857, n_workers=n_workers, chunk_size=60) == 250
+    ds = ogr.Open(dst)
+    lyr = ds.GetLayer()
+    assert [feature.GetField("id") for feature in lyr] == list(range(250))
+    lyr.ResetReading()
+    # 8 degrees east in web mercator
+    assert lyr.GetNextFeature().GetGeometryRef().GetX() == pytest.approx(890555.93, abs=0.01)
+
+
+def test_get_feature_ranges(tmp_path):
+    ds = ogr.Open(write_points(str(tmp_path / "points.shp"), 25))
+    assert reproject.get_feature_ranges(ds.GetLayer(), 10) == [(0, 10), (10, 20), (20, 25)]
+
+
+def test_reproject_layer_keeps_z(tmp_path):
+    src = write_points(str(tmp_path / "points_z.shp"), 30, z=250.0)
+    dst = str(tmp_path / "points_z_web.shp")
+    assert reproject.reproject_layer(src, dst, 3857, n_workers=1) == 30
+    lyr = ogr.Open(dst).GetLayer()
+    assert [feature.GetGeometryRef().GetZ() for feature in lyr] == [250.0 + i for i in range(30)]
+
+
+def test_reproject_layer_without_srs(tmp_path):
+    src = write_points(str(tmp_path / "points_no_srs.shp"), 5, epsg=None)
+    assert reproject.reproject_layer(src, str(tmp_path / "out.shp"), 3857, n_workers=1) is None
@@ -0,0 +1,109 @@
+import json
+import os
+import numpy as np
+import pytest
+from fun.river_model import RiverModel, ijson, invert_csr, load_river, parse_json, parse_stream, to_csr
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def test_to_csr_and_invert_csr():
+    offsets, nodes = to_csr([[3, 1], [], [1, 4, 0]])
+    assert offsets.tolist() == [0, 2, 2, 5]
+    assert nodes.tolist() == [3, 1, 1, 4, 0]
+    node_offsets, entries = invert_csr(offsets, nodes, n_nodes=6)
+    assert node_offsets.tolist() == [0, 1, 3, 3, 4, 5, 5]
+    # entries of every node in entry order
+    assert [entries[node_offsets[i]:node_offsets[i + 1]].tolist() for i in range(6)] == \
+        [[2], [0, 2], [], [0], [2], []]
+
+
+def test_to_csr_without_nodes():
+    offsets, nodes = to_csr([[], []])
+    assert offsets.tolist() == [0, 0, 0]
+    assert nodes.size == 0
+
+
+def write_river(json_file):
+    data = {"RIVER": {"NAME": "test",
+                      "GEOMETRY": {"FLOWBOUNDARIES": [{"name": "Inflow", "nodes": [0, 1, 2]},
+                                                      {"name": "Outflow", "nodes": [2, 5]}],
+                                   "REGIONS": [{"name": "riverbed", "nodes": [1, 2, 3]},
+                                               {"name": "floodplain"}]},
+                      "HYDRAULICS": {"BOUNDARY": [{"name": "Inflow", "type": "discharge", "value": 12.5}]},
+                      "RESULTS": {"water_depth": [0.5, 1.0, 1.5, 0.0, 0.2, 0.1]}}}
+    with open(json_file, "w") as f:
+        json.dump(data, f)
+
+
+def check_model(model):
+    assert isinstance(model, RiverModel)
+    assert model.name == "test"
+    assert model.boundary_nodes("Inflow").tolist() == [0, 1, 2]
+    assert model.boundary_nodes(1).tolist() == [2, 5]
+    assert model.region_nodes("riverbed").tolist() == [1, 2, 3]
+    assert model.region_nodes("floodplain").size == 0
+    assert model.node_boundaries(2) == ["Inflow", "Outflow"]
+    assert model.node_boundaries(3) == []
+    assert model.node_boundaries(99) == []
+    assert model.node_regions(2) == ["riverbed"]
+    assert model.boundary_condition("Inflow")["value"] == 12.5
+    assert model.boundary_condition("Outflow") is None
+    np.testing.assert_allclose(model.results["water_depth"], [0.5, 1.0, 1.5, 0.0, 0.2, 0.1])
+
+
+def test_parse_json(tmp_path):
+    json_file = str(tmp_path / "river.json")
+    write_river(json_file)
+    check_model(parse_json(json_file))
+
+
+def test_snapshot_round_trip(tmp_path):
+    json_file = str(tmp_path / "river.json")
+    write_river(json_file)
+    cache_dir = str(tmp_path / "cache")
+    check_model(load_river(json_file, streaming=False, cache_dir=cache_dir))
+    # the second load memory-maps the snapshot
+    model = load_river(json_file, streaming=False, cache_dir=cache_dir)
+    assert isinstance(model.arrays["boundary_nodes"], np.memmap)
+    check_model(model)
+
+
+def check_parity(json_file):
+    streamed, loaded = parse_stream(json_file), parse_json(json_file)
+    assert streamed.metadata == loaded.metadata
+    assert streamed.arrays.keys() == loaded.arrays.keys()
+    for key, values in loaded.arrays.items():
+        assert streamed.arrays[key].dtype == values.dtype
+        np.testing.assert_array_equal(streamed.arrays[key], values)
+
+
+@pytest.mark.parametrize("json_file", [os.path.join(DATA_DIR, "river_struct.json"),
+                                       os.path.join(DATA_DIR, "river_results.json")])
+def test_parse_stream_matches_parse_json_on_data(json_file):
+    pytest.importorskip("ijson")
+    check_parity(json_file)
+
+
+def test_parse_stream_matches_parse_json(tmp_path):
+    pytest.importorskip("ijson")
+    json_file = str(tmp_path / "river.json")
+    write_river(json_file)
+    check_model(parse_stream(json_file))
+    check_parity(json_file)
+
+
+def test_float_encoded_node_ids(tmp_path):
+    json_file = str(tmp_path / "river.json")
+    with open(json_file, "w") as f:
+        f.write('{"RIVER": {"GEOMETRY": {"FLOWBOUNDARIES": [{"name": "Inflow", "nodes": [0.0, 1.0, 7.0]}]},'
+                ' "RESULTS": {"water_depth": [[0.5, 1], [2, 0.0]]}}}')
+    parsers = [parse_json]
+    if ijson is not None:
+        parsers.append(parse_stream)
+    for parse in parsers:
+        model = parse(json_file)
+        assert model.boundary_nodes("Inflow").dtype == np.int64
+        assert model.boundary_nodes("Inflow").tolist() == [0, 1, 7]
+        assert model.node_boundaries(7) == ["Inflow"]
+        np.testing.assert_allclose(model.results["water_depth"], [[0.5, 1.0], [2.0, 0.0]])
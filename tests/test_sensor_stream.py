@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from fun.sensor_stream import QuantileSketch, RunningStats, stream_group_stats, stream_sensor_stats
+
+
+def test_running_stats_matches_numpy_across_blocks():
+    rng = np.random.default_rng(0)
+    data = rng.normal(1e6, 0.5, size=(10000, 3))
+    data[::7, 1] = np.nan
+    stats = RunningStats(["a", "b", "c"])
+    for block in np.array_split(data, 13):
+        stats.update(block)
+    np.testing.assert_allclose(stats.mean, np.nanmean(data, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(stats.std(), np.nanstd(data, axis=0, ddof=1), rtol=1e-9)
+    np.testing.assert_array_equal(stats.count, (~np.isnan(data)).sum(axis=0))
+    np.testing.assert_array_equal(stats.min, np.nanmin(data, axis=0))
+    np.testing.assert_array_equal(stats.max, np.nanmax(data, axis=0))
+
+
+def test_quantile_sketch_is_bounded_and_accurate():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=200000)
+    sketch = QuantileSketch(max_centroids=200)
+    for block in np.array_split(values, 20):
+        sketch.update(block)
+    assert sketch.means.size <= 200
+    assert sketch.weights.sum() == values.size
+    for q in (0.05, 0.5, 0.95):
+        # quantile error in rank space
+        rank = np.mean(values <= sketch.quantile(q))
+        assert abs(rank - q) < 0.01
+
+
+def test_quantile_sketch_without_data():
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_stream_sensor_stats(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Time (s)": np.arange(5000) * 0.1, "Sensor 1 (m)": rng.random(5000),
+                       "Sensor 2 (m)": rng.random(5000) + 2})
+    csv_file = str(tmp_path / "FlowDepth.csv")
+    df.to_csv(csv_file, index=False)
+    result = stream_sensor_stats(csv_file, chunksize=700)
+    expected = df.iloc[:, 1:].describe().T
+    np.testing.assert_allclose(result["mean"], expected["mean"])
+    np.testing.assert_allclose(result["std"], expected["std"])
+    np.testing.assert_allclose(result["q50"], expected["50%"], atol=0.01)
+
+
+def test_stream_group_stats_with_large_offset(tmp_path):
+    rng = np.random.default_rng(3)
+    n = 5000
+    table = pd.DataFrame({"Area": rng.choice(["Austria", "Germany", "Italy"], n),
+                          "Months": rng.choice(["January", "February"], n), "Year": np.arange(n),
+                          "Value": 1e6 + rng.normal(0.0, 0.01, n)})
+    table.loc[[5, 50], "Value"] = np.nan
+    # a group that only appears in the last chunk
+    table.loc[n - 3:, "Area"] = "Spain"
+    csv_file = str(tmp_path / "temperature_change.csv")
+    table.to_csv(csv_file, index=False)
+    result = stream_group_stats(csv_file, chunksize=700)
+    expected = pd.read_csv(csv_file).groupby(["Area", "Months"])["Value"].agg(["count", "mean", "std", "min", "max"])
+    result = result.loc[expected.index]
+    np.testing.assert_array_equal(result["count"], expected["count"])
+    np.testing.assert_allclose(result["mean"], expected["mean"], rtol=1e-15)
+    np.testing.assert_allclose(result["std"], expected["std"], rtol=1e-6)
+    np.testing.assert_array_equal(result["min"], expected["min"])
+    np.testing.assert_array_equal(result["max"], expected["max"])
+
+
+def test_stream_group_stats_of_header_only_csv(tmp_path, monkeypatch):
+    csv_file = str(tmp_path / "header.csv")
+    with open(csv_file, "w") as f:
+        f.write("Area,Months,Year,Value\n")
+    result = stream_group_stats(csv_file)
+    assert result.empty
+    assert list(result.columns) == ["count", "mean", "std", "min", "max"]
+    # pandas versions that yield no chunk at all for a header-only file
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: iter(()))
+    result = stream_group_stats(csv_file)
+    assert result.empty
+    assert list(result.columns) == ["count", "mean", "std", "min", "max"]
+    assert list(result.index.names) == ["Area", "Months"]
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from spatial_index import SpatialIndex, str_pack
+
+
+def random_boxes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lower = rng.random((n, 2)) * 1000.0
+    return np.column_stack((lower, lower + rng.random((n, 2)) * 20.0))
+
+
+def brute_force_bbox(bboxes, fids, x_min, y_min, x_max, y_max):
+    hit = ((bboxes[:, 0] <= x_max) & (bboxes[:, 2] >= x_min) & (bboxes[:, 1] <= y_max) & (bboxes[:, 3] >= y_min))
+    return np.sort(fids[hit])
+
+
+@pytest.mark.parametrize("n", [1, 5, 16, 17, 1000])
+def test_query_bbox_equals_brute_force(n):
+    bboxes = random_boxes(n)
+    fids = np.arange(n) * 3 + 7
+    index = SpatialIndex(str_pack(bboxes, fids, node_capacity=16))
+    rng = np.random.default_rng(1)
+    for x, y, size in zip(rng.random(50) * 1000.0, rng.random(50) * 1000.0, rng.random(50) * 200.0):
+        np.testing.assert_array_equal(np.sort(index.query_bbox(x, y, x + size, y + size)),
+                                      brute_force_bbox(bboxes, fids, x, y, x + size, y + size))
+
+
+@pytest.mark.parametrize("n", [1, 5, 1000])
+def test_nearest_equals_brute_force_for_points(n):
+    points = np.random.default_rng(2).random((n, 2)) * 1000.0
+    index = SpatialIndex(str_pack(np.column_stack((points, points)), np.arange(n), node_capacity=8))
+    k = min(5, n)
+    for x, y in np.random.default_rng(3).random((30, 2)) * 1000.0:
+        distances = np.hypot(points[:, 0] - x, points[:, 1] - y)
+        found = index.nearest(x, y, k=k)
+        np.testing.assert_allclose([distance for distance, fid in found], np.sort(distances)[:k])
+        np.testing.assert_allclose(distances[[fid for distance, fid in found]], [d for d, fid in found])
+
+
+def test_empty_index():
+    index = SpatialIndex(str_pack(np.empty((0, 4)), np.empty(0, dtype=np.int64)))
+    assert index.query_bbox(0.0, 0.0, 1.0, 1.0).size == 0
+    assert index.nearest(0.0, 0.0, k=3) == []
+
+
+def test_memory_mapped_table(tmp_path):
+    bboxes = random_boxes(300)
+    sidecar = str(tmp_path / "boxes.sidx.npy")
+    np.save(sidecar, str_pack(bboxes, np.arange(300)))
+    index = SpatialIndex(np.load(sidecar, mmap_mode="r"))
+    np.testing.assert_array_equal(np.sort(index.query_bbox(100.0, 100.0, 300.0, 300.0)),
+                                  brute_force_bbox(bboxes, np.arange(300), 100.0, 100.0, 300.0, 300.0))
+
+
+def test_containing_polygons_with_open_layer(tmp_path):
+    ogr = pytest.importorskip("osgeo.ogr")
+    from spatial_index import containing_polygons, index_layer
+    shp_file = str(tmp_path / "squares.shp")
+    ds = ogr.GetDriverByName("ESRI Shapefile").CreateDataSource(shp_file)
+    lyr = ds.CreateLayer("squares", None, ogr.wkbPolygon)
+    for x, y, size in ((0, 0, 10), (5, 5, 10), (30, 30, 5)):
+        feature = ogr.Feature(lyr.GetLayerDefn())
+        feature.SetGeometry(ogr.CreateGeometryFromWkt("POLYGON ((%i %i, %i %i, %i %i, %i %i, %i %i))" % (
+            x, y, x + size, y, x + size, y + size, x, y + size, x, y)))
+        lyr.CreateFeature(feature)
+    ds = None
+
+    index = index_layer(shp_file)
+    ds = ogr.Open(shp_file)
+    lyr = ds.GetLayer()
+    for (x, y), expected in (((7, 7), [0, 1]), ((12, 12), [1]), ((20, 20), []), ((31, 31), [2])):
+        assert sorted(containing_polygons(shp_file, x, y, index=index, lyr=lyr)) == expected
+        assert sorted(containing_polygons(shp_file, x, y)) == expected
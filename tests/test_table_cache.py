@@ -0,0 +1,48 @@
+import pandas as pd
+import os
+from fun.table_cache import load_cached, read_csv_cached
+
+
+def write_csv(tmp_path):
+    csv_file = str(tmp_path / "temperature_change.csv")
+    pd.DataFrame({"Area": ["Austria", "Brazil", "Chile", "Denmark"], "Months": ["Jan", "Feb", "Jan", "Mar"],
+                  "Year": [2000, 2001, 2002, 2003], "Value": [0.5, -1.25, 2.0, 0.75]}).to_csv(csv_file, index=False)
+    return csv_file
+
+
+def test_cache_hit_equals_cache_miss(tmp_path):
+    csv_file = write_csv(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    miss = read_csv_cached(csv_file, cache_dir=cache_dir)
+    hit = read_csv_cached(csv_file, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(hit, miss)
+    pd.testing.assert_frame_equal(hit, pd.read_csv(csv_file))
+
+
+def test_cache_hit_keeps_index(tmp_path):
+    csv_file = write_csv(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    for index_col in ("Area", ["Area", "Months"]):
+        miss = read_csv_cached(csv_file, cache_dir=cache_dir, index_col=index_col)
+        hit = read_csv_cached(csv_file, cache_dir=cache_dir, index_col=index_col)
+        pd.testing.assert_frame_equal(miss, pd.read_csv(csv_file, index_col=index_col))
+        pd.testing.assert_frame_equal(hit, miss)
+
+
+def test_cache_as_arrow(tmp_path):
+    csv_file = write_csv(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    miss = read_csv_cached(csv_file, as_arrow=True, cache_dir=cache_dir)
+    hit = read_csv_cached(csv_file, as_arrow=True, cache_dir=cache_dir)
+    assert hit.equals(miss)
+    assert hit.column_names == ["Area", "Months", "Year", "Value"]
+
+
+def test_uncachable_table_is_returned_uncached(tmp_path):
+    csv_file = write_csv(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    mixed = pd.DataFrame({"a": [1, "x", 2.5]}, dtype=object)
+    for as_arrow in (False, True):
+        df = load_cached(csv_file, "mixed", lambda: mixed.copy(), as_arrow=as_arrow, cache_dir=cache_dir)
+        pd.testing.assert_frame_equal(df, mixed)
+    assert not [f for f in os.listdir(cache_dir) if f.endswith((".feather", ".tmp"))]
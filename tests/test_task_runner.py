@@ -0,0 +1,177 @@
+import queue
+import threading
+import time
+
+import pytest
+from gui.task_runner import ProgressReporter, TaskCancelled, TaskRunner, run_job
+
+
+class FakeWidget:
+    """Stand-in for a tk.Widget that stores the after() callbacks instead of running a main loop"""
+    def __init__(self):
+        self.scheduled = {}
+        self.n_calls = 0
+
+    def after(self, ms, func):
+        self.n_calls += 1
+        after_id = "after#%i" % self.n_calls
+        self.scheduled[after_id] = func
+        return after_id
+
+    def after_cancel(self, after_id):
+        del self.scheduled[after_id]
+
+
+def run_main_loop(widget, timeout=10.0):
+    """Run the scheduled callbacks until nothing is scheduled anymore"""
+    t_stop = time.perf_counter() + timeout
+    while widget.scheduled:
+        assert time.perf_counter() < t_stop, "tasks did not finish"
+        func = widget.scheduled.pop(next(iter(widget.scheduled)))
+        func()
+        time.sleep(0.005)
+
+
+def count_job(n_items, progress=None):
+    for i in range(n_items):
+        progress(i + 1, n_items)
+    return n_items * 2
+
+
+def failing_job(progress=None):
+    raise ValueError("boom")
+
+
+def wait_for_cancel_job(started, progress=None):
+    started.set()
+    while True:
+        progress(0)
+        time.sleep(0.001)
+
+
+def blocking_job(gate, progress=None):
+    gate.wait(10)
+    return "unblocked"
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_done(mode):
+    widget = FakeWidget()
+    runner = TaskRunner(widget, mode=mode, poll_interval=1)
+    done, progress = [], []
+    try:
+        task = runner.submit(count_job, 5, name="count", on_done=lambda t, result: done.append(result),
+                             on_progress=lambda t: progress.append(t.n_done))
+        run_main_loop(widget)
+    finally:
+        runner.shutdown()
+    assert done == [10]
+    assert task.status == "done"
+    assert progress and progress[-1] == 5
+    assert task.fraction == 1.0
+    assert task.summary().startswith("count: done 5/5 items")
+    assert runner.tasks == {} and runner.after_id is None
+
+
+def test_error(capsys):
+    widget = FakeWidget()
+    runner = TaskRunner(widget, poll_interval=1)
+    errors = []
+    try:
+        task = runner.submit(failing_job, on_error=lambda t, tb: errors.append(tb))
+        # without an error callback the traceback is printed
+        runner.submit(failing_job, name="unhandled")
+        run_main_loop(widget)
+    finally:
+        runner.shutdown()
+    assert task.status == "error"
+    assert len(errors) == 1 and "ValueError: boom" in errors[0]
+    assert "ERROR: Task unhandled failed" in capsys.readouterr().out
+
+
+def test_cancel_running_task():
+    widget = FakeWidget()
+    runner = TaskRunner(widget, poll_interval=1)
+    started = threading.Event()
+    cancelled = []
+    try:
+        task = runner.submit(wait_for_cancel_job, started, on_cancel=cancelled.append)
+        assert started.wait(10)
+        runner.cancel(task)
+        run_main_loop(widget)
+    finally:
+        runner.shutdown()
+    assert cancelled == [task]
+    assert task.status == "cancelled"
+
+
+def test_cancel_pending_task():
+    widget = FakeWidget()
+    runner = TaskRunner(widget, max_workers=1, poll_interval=1)
+    gate = threading.Event()
+    done, cancelled = [], []
+    try:
+        first = runner.submit(blocking_job, gate, on_done=lambda t, result: done.append(result))
+        # the second job waits for the only worker and never starts
+        second = runner.submit(count_job, 3, on_done=lambda t, result: done.append(result),
+                               on_cancel=cancelled.append)
+        runner.cancel(second)
+        assert second.future.cancelled()
+        gate.set()
+        run_main_loop(widget)
+    finally:
+        runner.shutdown()
+    assert done == ["unblocked"]
+    assert cancelled == [second]
+    assert first.status == "done" and second.status == "cancelled"
+
+
+def test_shutdown_stops_polling():
+    widget = FakeWidget()
+    runner = TaskRunner(widget, poll_interval=1)
+    started = threading.Event()
+    runner.submit(wait_for_cancel_job, started)
+    assert widget.scheduled
+    runner.shutdown()
+    assert not widget.scheduled and runner.after_id is None
+
+
+def test_run_job_messages():
+    messages = queue.Queue()
+    cancel_event = threading.Event()
+    run_job(count_job, messages, 0, cancel_event, (2,), {})
+    assert [messages.get_nowait()[0] for _ in range(messages.qsize())][-1] == "done"
+
+    run_job(failing_job, messages, 1, cancel_event, (), {})
+    kind, task_id, payload = messages.get_nowait()
+    assert (kind, task_id) == ("error", 1) and "ValueError: boom" in payload
+
+    cancel_event.set()
+    run_job(count_job, messages, 2, cancel_event, (2,), {})
+    assert messages.get_nowait() == ("cancelled", 2, None)
+    assert messages.empty()
+
+
+def test_run_job_cancelled_after_the_last_report():
+    messages = queue.Queue()
+    cancel_event = threading.Event()
+    run_job(lambda progress=None: cancel_event.set(), messages, 0, cancel_event, (), {})
+    assert messages.get_nowait() == ("cancelled", 0, None)
+
+
+def test_progress_reporter():
+    messages = queue.Queue()
+    cancel_event = threading.Event()
+    progress = ProgressReporter(messages, 3, cancel_event, min_interval=60.0)
+    progress(1, 5, "first")
+    progress(2, 5)
+    progress(5, 5, "last")
+    # the first report and the last item pass the throttling
+    assert messages.get_nowait() == ("progress", 3, (1, 5, "first"))
+    assert messages.get_nowait() == ("progress", 3, (5, 5, "last"))
+    assert messages.empty()
+    assert not progress.cancelled()
+    cancel_event.set()
+    assert progress.cancelled()
+    with pytest.raises(TaskCancelled):
+        progress(6, 5)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("osgeo.gdal")
+from raster_algebra import get_block_windows
+from terrain import get_aspect, get_hillshade, horn_gradient, read_halo_block
+
+
+class ArrayReader:
+    """Stand-in for raster_algebra.BlockReader that reads windows of an in-memory DEM"""
+    def __init__(self, array):
+        self.array = array
+
+    def read(self, file_name, window, slot=0):
+        return self.array[window[1]:window[1] + window[3], window[0]:window[0] + window[2]].astype(float)
+
+
+def planar_dem(rows, cols, east_slope, north_slope, ew_res=2.0, ns_res=3.0):
+    row, col = np.mgrid[0:rows, 0:cols]
+    # rows increase toward south (north-up raster)
+    return 100.0 + east_slope * col * ew_res - north_slope * row * ns_res
+
+
+def test_planar_dem_has_constant_slope_and_aspect():
+    dem = planar_dem(12, 15, 0.3, 0.4)
+    dx, dy = horn_gradient(dem, 2.0, 3.0)
+    assert dx.shape == (10, 13)
+    np.testing.assert_allclose(dx, 0.3)
+    np.testing.assert_allclose(dy, -0.4)
+    np.testing.assert_allclose(100.0 * np.hypot(dx, dy), 50.0)
+    # the terrain rises toward north-east: downslope toward south-west
+    np.testing.assert_allclose(get_aspect(dx, dy), np.degrees(np.arctan2(0.3, 0.4)) + 180.0)
+
+
+def test_aspect_of_cardinal_directions_and_flat_terrain():
+    dx = np.array([0.0, 1.0, 0.0, -1.0, 0.0])
+    dy = np.array([1.0, 0.0, -1.0, 0.0, 0.0])
+    # dz/dy is positive toward south: rising toward south means downslope toward north (0 degrees)
+    aspect = get_aspect(dx, dy)
+    np.testing.assert_allclose(aspect[:4], [0.0, 270.0, 180.0, 90.0])
+    assert np.isnan(aspect[4])
+
+
+def test_hillshade_of_flat_and_lit_planes():
+    np.testing.assert_allclose(get_hillshade(np.zeros(1), np.zeros(1)), 1.0 + 254.0 * np.cos(np.radians(45.0)))
+    # a 45 degree plane facing the light source (downslope toward north-west)
+    dem = planar_dem(5, 5, np.sqrt(0.5), -np.sqrt(0.5), ew_res=1.0, ns_res=1.0)
+    dx, dy = horn_gradient(dem, 1.0, 1.0)
+    np.testing.assert_allclose(get_hillshade(dx, dy), 255.0)
+    np.testing.assert_allclose(get_hillshade(dx, dy, azimuth=135.0), 1.0)
+
+
+@pytest.mark.parametrize("compute_edges", [False, True])
+def test_halo_blocks_equal_the_full_array(compute_edges):
+    dem = np.random.default_rng(0).random((37, 53)) * 50.0
+    full = np.pad(dem, 1, mode="edge") if compute_edges else np.pad(dem, 1, constant_values=np.nan)
+    expected = horn_gradient(full, 2.0, 3.0)
+    reader = ArrayReader(dem)
+    tiled = (np.full(dem.shape, -1.0), np.full(dem.shape, -1.0))
+    for window in get_block_windows(dem.shape[1], dem.shape[0], (16, 16)):
+        block = read_halo_block(reader, "dem.tif", window, dem.shape[1], dem.shape[0], compute_edges=compute_edges)
+        assert block.shape == (window[3] + 2, window[2] + 2)
+        for out, gradient in zip(tiled, horn_gradient(block, 2.0, 3.0)):
+            out[window[1]:window[1] + window[3], window[0]:window[0] + window[2]] = gradient
+    for out, gradient in zip(tiled, expected):
+        np.testing.assert_allclose(out, gradient, equal_nan=True)
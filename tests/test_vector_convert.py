@@ -0,0 +1,54 @@
+import json
+import pytest
+
+ogr = pytest.importorskip("osgeo.ogr")
+osr = pytest.importorskip("osgeo.osr")
+import vector_convert
+
+# Swiss LV03 without authority code (a source coordinate system that AutoIdentifyEPSG cannot resolve)
+CUSTOM_PROJ4 = "+proj=somerc +lat_0=46.9524 +lon_0=7.4395 +k_0=1 +x_0=600000 +y_0=200000 +ellps=bessel +units=m"
+
+
+def write_source(file_name, srs, n=500):
+    ds = ogr.GetDriverByName("ESRI Shapefile").CreateDataSource(file_name)
+    lyr = ds.CreateLayer("points", srs, ogr.wkbPoint)
+    lyr.CreateField(ogr.FieldDefn("id", ogr.OFTInteger))
+    lyr.CreateField(ogr.FieldDefn("depth", ogr.OFTReal))
+    for i in range(n):
+        feature = ogr.Feature(lyr.GetLayerDefn())
+        feature.SetField("id", i)
+        feature.SetField("depth", i / 100.0)
+        feature.SetGeometry(ogr.CreateGeometryFromWkt("POINT (%f %f)" % (600000.0 + i, 200000.0)))
+        lyr.CreateFeature(feature)
+    ds = None
+    return file_name
+
+
+def get_srs(proj4=None, epsg=None):
+    srs = osr.SpatialReference()
+    if epsg:
+        srs.ImportFromEPSG(epsg)
+    else:
+        srs.ImportFromProj4(proj4)
+    return srs
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_where_on_a_field_that_is_not_kept(tmp_path, n_workers):
+    src = write_source(str(tmp_path / "points.shp"), get_srs(epsg=21781))
+    dst = str(tmp_path / "points.geojsonl")
+    n_features = vector_convert.convert(src, dst, where="depth >= 4.0", fields=["id"], n_workers=n_workers,
+                                        chunk_size=64)
+    assert n_features == 100
+    with open(dst) as f:
+        features = [json.loads(line) for line in f]
+    assert [feature["properties"] for feature in features] == [{"id": i} for i in range(400, 500)]
+
+
+def test_parallel_convert_keeps_a_coordinate_system_without_epsg_code(tmp_path):
+    src = write_source(str(tmp_path / "points.shp"), get_srs(proj4=CUSTOM_PROJ4))
+    dst = str(tmp_path / "points.fgb")
+    assert vector_convert.convert(src, dst, n_workers=2, chunk_size=64) == 500
+    ds = ogr.Open(dst)
+    srs = ds.GetLayer().GetSpatialRef()
+    assert srs is not None and srs.IsSame(get_srs(proj4=CUSTOM_PROJ4))
@@ -0,0 +1,54 @@
+import numpy as np
+from fun.weir_design import (bracketed_root, design_defaults, evaluate_designs, get_design_cases, pareto_mask,
+                              scalar_design)
+
+
+def test_bracketed_root_solves_elementwise():
+    targets = np.array([2.0, 3.0, 10.0])
+    roots = bracketed_root(lambda x: x ** 3 - targets, 0.0, 5.0)
+    np.testing.assert_allclose(roots, np.cbrt(targets), rtol=1e-10)
+
+
+def test_bracketed_root_without_sign_change_is_nan():
+    roots = bracketed_root(lambda x: x ** 2 + 1.0, np.array([-1.0, 0.0]), np.array([1.0, 2.0]))
+    assert np.isnan(roots).all()
+
+
+def test_pareto_mask():
+    objectives = np.array([[1.0, 5.0],
+                           [2.0, 2.0],
+                           [3.0, 3.0],   # dominated by [2, 2]
+                           [5.0, 1.0],
+                           [2.0, 2.0],   # duplicate of a non-dominated row
+                           [6.0, 6.0]])  # dominated by all
+    assert pareto_mask(objectives).tolist() == [True, True, False, True, True, False]
+
+
+def test_pareto_mask_matches_brute_force():
+    objectives = np.random.default_rng(0).random((300, 3))
+    dominated = [np.any(np.all(objectives <= row, axis=1) & np.any(objectives < row, axis=1)) for row in objectives]
+    np.testing.assert_array_equal(pareto_mask(objectives), ~np.array(dominated))
+
+
+def test_default_design_matches_notebook():
+    results = evaluate_designs({name: np.array([value]) for name, value in design_defaults.items()})
+    # rechenbeispiel-staustufendurchbildung: n = 5 fields, n_eff = 4, basin for the (n_eff - 1) case
+    np.testing.assert_allclose(results["b_gesamt"], 4 * 10.0 + 3 * 2.25)
+    np.testing.assert_allclose(results["q"], 220.0 / (3 * (10.0 - 2 * 0.10 * 1.0)))
+    np.testing.assert_allclose(results["e_opt"], 2.75)
+    assert results["ok_Fr"][0] and results["ok_eps"][0]
+    # h_ue with n - 1 fields exceeds h_ue_zul and the freeboard criterion fails as in the notebook
+    assert not results["ok_n1"][0] and not results["ok_f"][0] and not results["feasible"][0]
+
+
+def test_evaluate_designs_matches_scalar_design():
+    space = {"n": np.array([4.0, 6.0]), "b_F": np.array([12.0, 16.0]), "mu": np.array([0.5, 0.7])}
+    axes = {name: np.atleast_1d(np.asarray(space.get(name, value), dtype=float))
+            for name, value in design_defaults.items()}
+    cases = get_design_cases(axes, 0, 8)
+    results = evaluate_designs(cases)
+    for i in range(8):
+        h_ue, e_opt, l_T = scalar_design(n=int(cases["n"][i]), b_F=cases["b_F"][i], mu=cases["mu"][i])
+        np.testing.assert_allclose(results["h_ue_n1"][i], h_ue, rtol=1e-5)
+        np.testing.assert_allclose(results["e_opt"][i], e_opt)
+        np.testing.assert_allclose(results["l_T"][i], l_T, rtol=1e-8)